@@ -7,6 +7,7 @@ from backend.api.users import users_bp
 from backend.api.transactions import transactions_bp
 from backend.api.rewards import rewards_bp
 from backend.api.stats import stats_bp
+from backend.api.exports import exports_bp
 
 
 def register_blueprints(app):
@@ -15,6 +16,7 @@ def register_blueprints(app):
     app.register_blueprint(transactions_bp)
     app.register_blueprint(rewards_bp)
     app.register_blueprint(stats_bp)
+    app.register_blueprint(exports_bp)
     
     return app
 
@@ -24,5 +26,6 @@ __all__ = [
     'transactions_bp',
     'rewards_bp',
     'stats_bp',
+    'exports_bp',
     'register_blueprints'
 ]
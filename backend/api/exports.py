@@ -0,0 +1,127 @@
+"""
+API Routes - Exportaciones
+Volcado en streaming (NDJSON o CSV) de transacciones y canjes
+"""
+
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from backend.services import ExportService
+from backend.utils import get_api_logger
+
+logger = get_api_logger()
+
+exports_bp = Blueprint('exports', __name__, url_prefix='/api/export')
+
+TIPOS_CONTENIDO = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+
+def _respuesta_streaming(nombre: str, columnas, consulta):
+    """Construir la respuesta en streaming para el formato pedido"""
+    formato = request.args.get('formato', 'ndjson').lower()
+
+    generador = ExportService.generar(
+        formato,
+        columnas,
+        consulta,
+        tamano_bloque=current_app.config.get('EXPORT_YIELD_PER', 1000),
+        filas_por_bloque=current_app.config.get('EXPORT_FILAS_POR_BLOQUE', 500)
+    )
+
+    logger.info(f"Exportación de {nombre} iniciada ({formato})")
+
+    return Response(
+        stream_with_context(generador),
+        mimetype=TIPOS_CONTENIDO[formato],
+        headers={
+            'Content-Disposition': f'attachment; filename={nombre}.{formato}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@exports_bp.route('/transacciones', methods=['GET'])
+def exportar_transacciones():
+    """
+    Exportar transacciones en streaming.
+
+    Query params:
+        formato (str): ndjson (default) o csv
+        desde (str): Fecha/hora inicial ISO 8601 (incluida)
+        hasta (str): Fecha/hora final ISO 8601 (una fecha sin hora incluye el día)
+        usuario_id (int): Filtrar por usuario
+        uid (str): Filtrar por UID RFID
+        tipo_objeto (str): Filtrar por tipo de objeto
+    """
+    try:
+        desde, hasta = ExportService.parsear_rango(
+            request.args.get('desde'),
+            request.args.get('hasta')
+        )
+        consulta = ExportService.consulta_transacciones(
+            desde=desde,
+            hasta=hasta,
+            usuario_id=request.args.get('usuario_id', type=int),
+            tipo_objeto=request.args.get('tipo_objeto'),
+            uid_rfid=request.args.get('uid')
+        )
+
+        return _respuesta_streaming(
+            'transacciones',
+            ExportService.COLUMNAS_TRANSACCIONES,
+            consulta
+        )
+
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error en exportar_transacciones: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
+
+
+@exports_bp.route('/canjes', methods=['GET'])
+def exportar_canjes():
+    """
+    Exportar canjes en streaming.
+
+    Query params:
+        formato (str): ndjson (default) o csv
+        desde (str): Fecha/hora inicial ISO 8601 (incluida)
+        hasta (str): Fecha/hora final ISO 8601 (una fecha sin hora incluye el día)
+        usuario_id (int): Filtrar por usuario
+        uid (str): Filtrar por UID RFID
+        estado (str): pendiente, entregado o cancelado
+    """
+    try:
+        desde, hasta = ExportService.parsear_rango(
+            request.args.get('desde'),
+            request.args.get('hasta')
+        )
+        consulta = ExportService.consulta_canjes(
+            desde=desde,
+            hasta=hasta,
+            usuario_id=request.args.get('usuario_id', type=int),
+            estado=request.args.get('estado'),
+            uid_rfid=request.args.get('uid')
+        )
+
+        return _respuesta_streaming(
+            'canjes',
+            ExportService.COLUMNAS_CANJES,
+            consulta
+        )
+
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error en exportar_canjes: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
@@ -3,7 +3,7 @@ API Routes - Estadísticas
 Endpoints para estadísticas e impacto ambiental
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from backend.services import StatsService
 from backend.utils import get_api_logger
 
@@ -108,17 +108,26 @@ def reciclajes_por_periodo():
 @stats_bp.route('/top-recicladores', methods=['GET'])
 def top_recicladores():
     """
-    Obtener usuarios con más reciclajes en el mes actual.
+    Obtener usuarios con más reciclajes en un período.
     
     Query params:
         limite (int): Número de usuarios (default: 5)
+        periodo (str): semana, mes o total (default: mes)
     """
     try:
         limite = request.args.get('limite', 5, type=int)
-        top = StatsService.obtener_top_recicladores(limite)
+        periodo = request.args.get('periodo', 'mes')
+        
+        try:
+            top = StatsService.obtener_top_recicladores(limite, periodo)
+        except ValueError as e:
+            return jsonify({
+                'error': str(e)
+            }), 400
         
         return jsonify({
             'total': len(top),
+            'periodo': periodo,
             'top_recicladores': top
         }), 200
         
@@ -134,6 +143,9 @@ def dashboard_completo():
     """
     Obtener todos los datos para el dashboard en una sola llamada.
     
+    El cuerpo se sirve desde una caché de proceso con TTL que se invalida
+    al registrar reciclajes o canjes. La cabecera X-Cache indica HIT/MISS.
+    
     Response JSON:
         {
             "estadisticas": {...},
@@ -143,15 +155,41 @@ def dashboard_completo():
         }
     """
     try:
-        return jsonify({
-            'estadisticas': StatsService.obtener_estadisticas_generales(),
-            'impacto_ambiental': StatsService.obtener_impacto_ambiental(),
-            'reciclajes_semana': StatsService.obtener_reciclajes_por_periodo(7),
-            'top_recicladores': StatsService.obtener_top_recicladores(5)
-        }), 200
+        cuerpo, desde_cache = StatsService.obtener_dashboard_json()
+        
+        response = Response(cuerpo, status=200, mimetype='application/json')
+        response.headers['X-Cache'] = 'HIT' if desde_cache else 'MISS'
+        return response
         
     except Exception as e:
         logger.error(f"Error en dashboard_completo: {e}")
         return jsonify({
             'error': f'Error en el servidor: {str(e)}'
         }), 500
+
+
+@stats_bp.route('/dashboard/cache', methods=['GET'])
+def estadisticas_cache_dashboard():
+    """
+    Obtener contadores de la caché del dashboard.
+    
+    Response JSON:
+        {
+            "hits": 120,
+            "misses": 4,
+            "invalidaciones": 3,
+            "entradas": 1,
+            "ttl_segundos": 30.0,
+            "tasa_aciertos": 0.9677
+        }
+    
+    ttl_segundos es el TTL configurado en DASHBOARD_CACHE_TTL.
+    """
+    try:
+        return jsonify(StatsService.estadisticas_cache_dashboard()), 200
+        
+    except Exception as e:
+        logger.error(f"Error en estadisticas_cache_dashboard: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
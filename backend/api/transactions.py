@@ -3,7 +3,7 @@ API Routes - Transacciones y Puntos
 Endpoints para gestión de puntos y transacciones de reciclaje
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from backend.services import PointsService, UserService
 from backend.utils import get_api_logger
 
@@ -75,6 +75,69 @@ def agregar_puntos():
         }), 500
 
 
+@transactions_bp.route('/add_points/batch', methods=['POST'])
+def agregar_puntos_lote():
+    """
+    Registrar un lote de depósitos (reenvío de una máquina tras una
+    desconexión). Cada depósito tiene el mismo formato que /add_points
+    y admite una fecha_hora ISO 8601 opcional (UTC) y un id_deposito
+    opcional: reenviar un id ya registrado no vuelve a sumar puntos.
+    
+    Request JSON:
+        {
+            "depositos": [
+                {"uid": "04A1B2C3D4E5F6", "puntos": 10, "tipo_objeto": "botella",
+                 "fecha_hora": "2024-05-01T10:15:00",
+                 "id_deposito": "6f1c2b9e-0d4a-4c55-9a43-6b7f0e2d8c11"},
+                ...
+            ]
+        }
+    
+    Response JSON:
+        {
+            "exito": true,
+            "procesados": 9,
+            "fallidos": 1,
+            "duplicados": 0,
+            "resultados": [{"indice": 0, "exito": true, "transaccion_id": 123}, ...],
+            "usuarios": [{"uid": "...", "puntos_nuevos": 150, "badges_nuevos": [...]}]
+        }
+    """
+    try:
+        datos = request.get_json(silent=True)
+        depositos = datos.get('depositos') if isinstance(datos, dict) else None
+        
+        if not isinstance(depositos, list) or not depositos:
+            return jsonify({
+                'error': 'Se requiere una lista no vacía en "depositos"'
+            }), 400
+        
+        maximo = current_app.config.get('BATCH_MAX_DEPOSITOS', 500)
+        if len(depositos) > maximo:
+            return jsonify({
+                'error': f'El lote no puede superar {maximo} depósitos'
+            }), 400
+        
+        exito, mensaje, resultado = PointsService.agregar_puntos_lote(depositos)
+        
+        if exito:
+            return jsonify({
+                'exito': True,
+                'mensaje': mensaje,
+                **resultado
+            }), 200
+        else:
+            return jsonify({
+                'error': mensaje
+            }), 500
+            
+    except Exception as e:
+        logger.error(f"Error en agregar_puntos_lote: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
+
+
 @transactions_bp.route('/transacciones/<int:usuario_id>', methods=['GET'])
 def obtener_transacciones(usuario_id):
     """
@@ -82,6 +145,7 @@ def obtener_transacciones(usuario_id):
     
     Query params:
         limite (int): Número de transacciones a retornar (default: 50)
+        cursor (str): Valor de siguiente_cursor de la página anterior
     """
     try:
         usuario = UserService.obtener_por_id(usuario_id)
@@ -93,15 +157,21 @@ def obtener_transacciones(usuario_id):
         limite = request.args.get('limite', 50, type=int)
         transacciones = PointsService.obtener_transacciones_usuario(
             usuario_id, 
-            limite
+            limite,
+            cursor=request.args.get('cursor')
         )
         
         return jsonify({
             'total': len(transacciones),
             'usuario': usuario.to_dict(),
-            'transacciones': transacciones
+            'transacciones': transacciones,
+            'siguiente_cursor': PointsService.cursor_siguiente(transacciones, limite)
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error en obtener_transacciones: {e}")
         return jsonify({
@@ -116,16 +186,25 @@ def transacciones_recientes():
     
     Query params:
         limite (int): Número de transacciones (default: 20)
+        cursor (str): Valor de siguiente_cursor de la página anterior
     """
     try:
         limite = request.args.get('limite', 20, type=int)
-        transacciones = PointsService.obtener_transacciones_recientes(limite)
+        transacciones = PointsService.obtener_transacciones_recientes(
+            limite,
+            cursor=request.args.get('cursor')
+        )
         
         return jsonify({
             'total': len(transacciones),
-            'transacciones': transacciones
+            'transacciones': transacciones,
+            'siguiente_cursor': PointsService.cursor_siguiente(transacciones, limite)
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Error en transacciones_recientes: {e}")
         return jsonify({
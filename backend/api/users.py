@@ -4,7 +4,7 @@ Endpoints para gestión de usuarios y verificación RFID
 """
 
 from flask import Blueprint, request, jsonify
-from backend.services import UserService
+from backend.services import UserService, RankingService
 from backend.utils import get_api_logger
 
 logger = get_api_logger()
@@ -74,6 +74,48 @@ def listar_usuarios():
         }), 500
 
 
+@users_bp.route('/usuarios/cambios', methods=['GET'])
+def usuarios_modificados():
+    """
+    Usuarios creados o modificados desde la última sincronización (caché
+    local de las máquinas). Incluye usuarios desactivados.
+    
+    Query params:
+        cursor (str): Valor de cursor de la respuesta anterior (vacío = todos)
+        limite (int): Máximo de usuarios por respuesta (default: 500, máx: 1000)
+        margen (float): Segundos a releer antes del cursor, para no perder
+                        cambios confirmados tarde (default: 0, máx: 3600)
+    
+    Response JSON:
+        {"total": 2, "usuarios": [...], "cursor": "...", "hay_mas": false}
+    """
+    try:
+        limite = max(1, min(request.args.get('limite', 500, type=int), 1000))
+        margen = max(0.0, min(request.args.get('margen', 0, type=float), 3600.0))
+        usuarios, cursor = UserService.obtener_cambios(
+            cursor=request.args.get('cursor') or None,
+            limite=limite,
+            margen=margen
+        )
+        
+        return jsonify({
+            'total': len(usuarios),
+            'usuarios': usuarios,
+            'cursor': cursor,
+            'hay_mas': len(usuarios) == limite
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Error en usuarios_modificados: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
+
+
 @users_bp.route('/registrar_usuario', methods=['POST'])
 def registrar_usuario():
     """
@@ -145,6 +187,44 @@ def obtener_ranking():
         }), 500
 
 
+@users_bp.route('/ranking/usuario/<int:usuario_id>', methods=['GET'])
+def obtener_posicion_ranking(usuario_id):
+    """
+    Obtener la posición de un usuario en el ranking y los usuarios cercanos.
+    
+    Query params:
+        vecinos (int): Posiciones a mostrar arriba y abajo (default: 2, máx: 25)
+    
+    Response JSON:
+        {
+            "usuario_id": 12,
+            "posicion": 347,
+            "puntos_totales": 180,
+            "total_usuarios": 1520,
+            "vecinos": [
+                {"posicion": 346, "usuario_id": 40, "nombre_completo": "...", "puntos_totales": 180, "es_usuario": false},
+                ...
+            ]
+        }
+    """
+    try:
+        radio = min(max(request.args.get('vecinos', 2, type=int), 0), 25)
+        posicion = RankingService.obtener_posicion(usuario_id, radio)
+        
+        if not posicion:
+            return jsonify({
+                'error': 'Usuario no encontrado'
+            }), 404
+        
+        return jsonify(posicion), 200
+        
+    except Exception as e:
+        logger.error(f"Error en obtener_posicion_ranking: {e}")
+        return jsonify({
+            'error': f'Error en el servidor: {str(e)}'
+        }), 500
+
+
 @users_bp.route('/usuario/<int:usuario_id>/badges', methods=['GET'])
 def obtener_badges_usuario(usuario_id):
     """Obtener badges de un usuario específico"""
@@ -49,6 +49,7 @@ def create_app(config_class=None):
     with app.app_context():
         db.create_all()
         seed_initial_data()
+        inicializar_resumenes()
     
     return app
 
@@ -144,12 +145,10 @@ def register_web_routes(app):
     @login_required
     def index():
         """Página principal - Dashboard general"""
-        from backend.models import Usuario
-        from backend.services import StatsService
+        from backend.services import StatsService, RankingService
         
-        # Top 10 usuarios
-        usuarios = Usuario.query.filter_by(activo=True)\
-            .order_by(Usuario.puntos_totales.desc()).limit(10).all()
+        # Top 10 usuarios (índice de ranking en memoria)
+        usuarios = RankingService.obtener_top_usuarios(10)
         
         # Estadísticas generales
         stats = StatsService.obtener_estadisticas_generales()
@@ -383,3 +382,20 @@ def seed_initial_data():
         print(f"[DB] Se insertaron {len(BADGES_PREDEFINIDOS)} badges")
     
     db.session.commit()
+
+
+def inicializar_resumenes():
+    """Poblar las tablas de resumen si existen transacciones previas a su creación"""
+    from backend.models import Transaccion, ResumenDiario, RankingPeriodo
+    from backend.services import StatsService
+    
+    if Transaccion.query.first() is None:
+        return
+    
+    if ResumenDiario.query.first() is None:
+        filas = StatsService.reconstruir_resumen_diario()
+        print(f"[DB] Resumen diario generado desde el historial ({filas} filas)")
+    
+    if RankingPeriodo.query.first() is None:
+        filas = StatsService.reconstruir_ranking_periodos()
+        print(f"[DB] Ranking por período generado desde el historial ({filas} filas)")
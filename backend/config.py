@@ -48,6 +48,26 @@ class Config:
     CO2_PER_METAL_CAN = float(os.getenv('CO2_PER_METAL_CAN', 0.03))
     WEIGHT_PER_PLASTIC_BOTTLE = float(os.getenv('WEIGHT_PER_PLASTIC_BOTTLE', 0.025))
     WEIGHT_PER_METAL_CAN = float(os.getenv('WEIGHT_PER_METAL_CAN', 0.015))
+    
+    # Caché del dashboard (segundos); se invalida además con cada escritura
+    DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 30))
+    
+    # Top recicladores desde la tabla ranking_periodo (False = agrupar transacciones)
+    LEADERBOARD_DESDE_TABLA = os.getenv('LEADERBOARD_DESDE_TABLA', 'true').lower() == 'true'
+    
+    # Índice de ranking en memoria: reconstrucción completa cada N segundos
+    # (los cambios locales se aplican al instante tras cada commit)
+    RANKING_INDEX_TTL = float(os.getenv('RANKING_INDEX_TTL', 300))
+    
+    # Catálogo compilado de badges (se invalida además al modificar badges)
+    BADGE_CATALOG_TTL = float(os.getenv('BADGE_CATALOG_TTL', 300))
+    
+    # Máximo de depósitos aceptados por POST /api/add_points/batch
+    BATCH_MAX_DEPOSITOS = int(os.getenv('BATCH_MAX_DEPOSITOS', 500))
+    
+    # Exportaciones en streaming: filas leídas por bloque de la BD y por envío
+    EXPORT_YIELD_PER = int(os.getenv('EXPORT_YIELD_PER', 1000))
+    EXPORT_FILAS_POR_BLOQUE = int(os.getenv('EXPORT_FILAS_POR_BLOQUE', 500))
 
 
 class DevelopmentConfig(Config):
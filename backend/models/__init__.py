@@ -7,6 +7,7 @@ from backend.models.user import Usuario
 from backend.models.transaction import Transaccion
 from backend.models.reward import Recompensa, Canje
 from backend.models.gamification import Badge, UsuarioBadge, BADGES_PREDEFINIDOS
+from backend.models.resumen import ResumenDiario, RankingPeriodo
 
 __all__ = [
     'Usuario',
@@ -15,5 +16,7 @@ __all__ = [
     'Canje',
     'Badge',
     'UsuarioBadge',
-    'BADGES_PREDEFINIDOS'
+    'BADGES_PREDEFINIDOS',
+    'ResumenDiario',
+    'RankingPeriodo'
 ]
@@ -50,7 +50,7 @@ class Badge(db.Model):
             bool: True si cumple la condición
         """
         if self.condicion_tipo == 'reciclajes':
-            return usuario.transacciones.count() >= self.condicion_valor
+            return (usuario.total_reciclajes or 0) >= self.condicion_valor
         elif self.condicion_tipo == 'puntos':
             return usuario.puntos_totales >= self.condicion_valor
         elif self.condicion_tipo == 'racha':
@@ -0,0 +1,173 @@
+"""
+Modelos de Base de Datos - Resúmenes Agregados
+Tablas de acumulados mantenidas en línea para no recorrer el historial completo
+"""
+
+from datetime import datetime, date
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.extensions import db
+
+
+def _acumular(modelo, claves: dict, incrementos: dict):
+    """
+    Insertar la fila de `claves` o, si ya existe, sumarle `incrementos`,
+    en una sola sentencia (INSERT ... ON CONFLICT DO UPDATE).
+
+    Evita que dos transacciones concurrentes creen a la vez la primera
+    fila del día o del período y una falle por la restricción única.
+    """
+    dialecto = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    sentencia = dialecto.insert(modelo).values(**claves, **incrementos)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=list(claves),
+        set_={
+            columna: getattr(modelo, columna) + sentencia.excluded[columna]
+            for columna in incrementos
+        }
+    )
+    db.session.execute(sentencia)
+
+
+class ResumenDiario(db.Model):
+    """
+    Acumulado diario de reciclajes por tipo de objeto.
+    Se actualiza en la misma transacción que registra cada reciclaje,
+    por lo que las estadísticas leen O(días) filas en lugar de O(transacciones).
+    """
+    __tablename__ = 'resumen_diario'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    tipo_objeto = db.Column(db.String(50), nullable=False)
+    total_reciclajes = db.Column(db.Integer, default=0, nullable=False)
+    total_puntos = db.Column(db.Integer, default=0, nullable=False)
+    peso_total_kg = db.Column(db.Float, default=0.0, nullable=False)
+    co2_total_kg = db.Column(db.Float, default=0.0, nullable=False)
+
+    # Una fila por día y tipo de objeto
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'tipo_objeto', name='unique_resumen_dia_tipo'),
+    )
+
+    def __repr__(self):
+        return f'<ResumenDiario {self.fecha} - {self.tipo_objeto}: {self.total_reciclajes}>'
+
+    def to_dict(self):
+        """Serializar resumen a diccionario"""
+        return {
+            'fecha': self.fecha.isoformat(),
+            'tipo_objeto': self.tipo_objeto,
+            'total_reciclajes': self.total_reciclajes,
+            'total_puntos': self.total_puntos,
+            'peso_total_kg': round(self.peso_total_kg, 3),
+            'co2_total_kg': round(self.co2_total_kg, 3)
+        }
+
+    @staticmethod
+    def registrar(
+        fecha: date,
+        tipo_objeto: str,
+        reciclajes: int = 1,
+        puntos: int = 0,
+        peso_kg: float = 0.0,
+        co2_kg: float = 0.0
+    ):
+        """
+        Acumular reciclajes en la fila del día. No hace commit:
+        el llamador confirma junto con la transacción de origen.
+
+        La fila se crea o se incrementa con un upsert (col = col + n), por
+        lo que no se pierden actualizaciones concurrentes ni choca la
+        creación simultánea de la primera fila del día.
+        """
+        _acumular(
+            ResumenDiario,
+            {'fecha': fecha, 'tipo_objeto': tipo_objeto},
+            {
+                'total_reciclajes': reciclajes,
+                'total_puntos': puntos,
+                'peso_total_kg': peso_kg or 0.0,
+                'co2_total_kg': co2_kg or 0.0
+            }
+        )
+
+    @staticmethod
+    def registrar_transaccion(transaccion):
+        """Acumular una transacción recién creada en su día"""
+        fecha_hora = transaccion.fecha_hora or datetime.utcnow()
+        ResumenDiario.registrar(
+            fecha=fecha_hora.date(),
+            tipo_objeto=transaccion.tipo_objeto,
+            reciclajes=1,
+            puntos=transaccion.puntos_otorgados,
+            peso_kg=transaccion.peso_estimado_kg,
+            co2_kg=transaccion.co2_evitado_kg
+        )
+
+
+class RankingPeriodo(db.Model):
+    """
+    Acumulado de reciclajes por usuario y período (semana, mes, total).
+    Permite obtener el top de un período leyendo solo las filas de ese
+    período, ordenadas por índice, sin agrupar transacciones.
+    """
+    __tablename__ = 'ranking_periodo'
+
+    PERIODO_SEMANA = 'semana'
+    PERIODO_MES = 'mes'
+    PERIODO_TOTAL = 'total'
+    PERIODOS = (PERIODO_SEMANA, PERIODO_MES, PERIODO_TOTAL)
+
+    # Inicio fijo para el período acumulado total
+    INICIO_TOTAL = date(1970, 1, 1)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    periodo = db.Column(db.String(10), nullable=False)
+    inicio = db.Column(db.Date, nullable=False)
+    usuario_id = db.Column(
+        db.Integer,
+        db.ForeignKey('usuarios.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    reciclajes = db.Column(db.Integer, default=0, nullable=False)
+    puntos = db.Column(db.Integer, default=0, nullable=False)
+
+    # Relación con el usuario (se eliminan junto con él)
+    usuario = db.relationship(
+        'Usuario',
+        backref=db.backref('rankings', lazy='dynamic', cascade='all, delete-orphan')
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint('periodo', 'inicio', 'usuario_id', name='unique_ranking_periodo_usuario'),
+        db.Index('ix_ranking_periodo_orden', 'periodo', 'inicio', 'reciclajes'),
+    )
+
+    def __repr__(self):
+        return f'<RankingPeriodo {self.periodo} {self.inicio} - Usuario {self.usuario_id}: {self.reciclajes}>'
+
+    @staticmethod
+    def inicio_periodo(periodo: str, fecha: date) -> date:
+        """Fecha de inicio del período que contiene a `fecha`"""
+        if periodo == RankingPeriodo.PERIODO_SEMANA:
+            return date.fromordinal(fecha.toordinal() - fecha.weekday())
+        if periodo == RankingPeriodo.PERIODO_MES:
+            return fecha.replace(day=1)
+        return RankingPeriodo.INICIO_TOTAL
+
+    @staticmethod
+    def registrar(usuario_id: int, fecha: date, reciclajes: int = 1, puntos: int = 0):
+        """
+        Acumular reciclajes del usuario en cada período (upsert). No hace
+        commit: el llamador confirma junto con la transacción de origen.
+        """
+        for periodo in RankingPeriodo.PERIODOS:
+            _acumular(
+                RankingPeriodo,
+                {
+                    'periodo': periodo,
+                    'inicio': RankingPeriodo.inicio_periodo(periodo, fecha),
+                    'usuario_id': usuario_id
+                },
+                {'reciclajes': reciclajes, 'puntos': puntos}
+            )
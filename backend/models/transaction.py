@@ -31,6 +31,16 @@ class Transaccion(db.Model):
     co2_evitado_kg = db.Column(db.Float, nullable=True)
     imagen_path = db.Column(db.String(255), nullable=True)
     
+    # Identificador generado por la máquina (reenvíos idempotentes desde su outbox)
+    id_deposito = db.Column(db.String(36), nullable=True)
+    
+    # Índices para el historial paginado por (fecha_hora, id)
+    __table_args__ = (
+        db.Index('ix_transacciones_usuario_fecha', 'usuario_id', 'fecha_hora', 'id'),
+        db.Index('ix_transacciones_fecha', 'fecha_hora', 'id'),
+        db.UniqueConstraint('id_deposito', name='uq_transacciones_id_deposito'),
+    )
+    
     def __repr__(self):
         return f'<Transaccion {self.id} - Usuario {self.usuario_id} - {self.tipo_objeto}>'
     
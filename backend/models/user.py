@@ -18,6 +18,10 @@ class Usuario(UserMixin, db.Model):
     """
     __tablename__ = 'usuarios'
     
+    # Tipos de objeto con contador propio
+    TIPO_BOTELLA = 'botella_plastico'
+    TIPO_LATA = 'lata_metal'
+    
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     
     # Identificación
@@ -37,11 +41,29 @@ class Usuario(UserMixin, db.Model):
     nivel = db.Column(db.Integer, default=1, nullable=False)
     racha_dias = db.Column(db.Integer, default=0, nullable=False)
     
+    # Contadores denormalizados (mantenidos por los servicios de puntos,
+    # recompensas y badges; reparables con UserService.reparar_contadores)
+    total_reciclajes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    kg_reciclado = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    co2_evitado_kg = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    total_botellas = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    total_latas = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    total_canjes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    total_badges = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # Timestamps
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     ultima_actividad = db.Column(db.DateTime, default=datetime.utcnow)
     ultimo_login = db.Column(db.DateTime, nullable=True)
     
+    # Última modificación del registro (sincronización incremental de las máquinas)
+    fecha_actualizacion = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False
+    )
+    
     # Estado
     activo = db.Column(db.Boolean, default=True, nullable=False)
     
@@ -65,6 +87,11 @@ class Usuario(UserMixin, db.Model):
         cascade='all, delete-orphan'
     )
     
+    # Índice para recorrer los cambios por (fecha_actualizacion, id)
+    __table_args__ = (
+        db.Index('ix_usuarios_actualizacion', 'fecha_actualizacion', 'id'),
+    )
+    
     def __repr__(self):
         return f'<Usuario {self.nombre} {self.apellido}>'
     
@@ -134,15 +161,17 @@ class Usuario(UserMixin, db.Model):
             'nivel': self.nivel,
             'racha_dias': self.racha_dias,
             'fecha_registro': self.fecha_registro.isoformat(),
+            'fecha_actualizacion': self.fecha_actualizacion.isoformat()
+                if self.fecha_actualizacion else None,
             'activo': self.activo
         }
     
     def to_dict_perfil(self):
         """Serialización completa para perfil personal"""
         base = self.to_dict()
-        base['total_transacciones'] = self.transacciones.count()
-        base['total_badges'] = self.badges.count()
-        base['total_canjes'] = self.canjes.count()
+        base['total_transacciones'] = self.total_reciclajes or 0
+        base['total_badges'] = self.total_badges or 0
+        base['total_canjes'] = self.total_canjes or 0
         return base
     
     # ==================== Gamificación ====================
@@ -150,9 +179,43 @@ class Usuario(UserMixin, db.Model):
     def agregar_puntos(self, cantidad: int):
         """Incrementar puntos del usuario y actualizar nivel"""
         self.puntos_totales += cantidad
-        self.ultima_actividad = datetime.utcnow()
         self._actualizar_nivel()
     
+    def registrar_reciclaje(
+        self,
+        tipo_objeto: str,
+        peso_kg: float = 0.0,
+        co2_kg: float = 0.0,
+        cantidad: int = 1
+    ):
+        """Actualizar contadores denormalizados de reciclaje"""
+        self.registrar_reciclajes({tipo_objeto: cantidad}, peso_kg, co2_kg)
+    
+    def registrar_reciclajes(
+        self,
+        por_tipo: dict,
+        peso_kg: float = 0.0,
+        co2_kg: float = 0.0
+    ):
+        """
+        Actualizar los contadores denormalizados con varios reciclajes
+        ({tipo_objeto: cantidad}). No hace commit.
+        
+        Los incrementos se emiten como expresiones SQL (col = col + n)
+        para no perder actualizaciones concurrentes del mismo usuario; los
+        valores se recargan de la base de datos tras el flush.
+        """
+        self.total_reciclajes = Usuario.total_reciclajes + sum(por_tipo.values())
+        self.kg_reciclado = Usuario.kg_reciclado + (peso_kg or 0.0)
+        self.co2_evitado_kg = Usuario.co2_evitado_kg + (co2_kg or 0.0)
+        
+        botellas = por_tipo.get(self.TIPO_BOTELLA, 0)
+        if botellas:
+            self.total_botellas = Usuario.total_botellas + botellas
+        latas = por_tipo.get(self.TIPO_LATA, 0)
+        if latas:
+            self.total_latas = Usuario.total_latas + latas
+    
     def descontar_puntos(self, cantidad: int) -> bool:
         """Descontar puntos si tiene suficientes"""
         if self.puntos_totales >= cantidad:
@@ -165,21 +228,32 @@ class Usuario(UserMixin, db.Model):
         # Cada 100 puntos = 1 nivel
         self.nivel = (self.puntos_totales // 100) + 1
     
-    def actualizar_racha(self):
-        """Actualizar racha de días consecutivos"""
-        from datetime import timedelta
+    def actualizar_racha(self, fecha: datetime = None):
+        """
+        Actualizar racha de días consecutivos con una actividad en `fecha`
+        (default: ahora).
+        
+        Las actividades anteriores a la última registrada (depósitos
+        reenviados tras un corte) no modifican la racha ni hacen
+        retroceder ultima_actividad; con varias, aplicarlas de la más
+        antigua a la más reciente.
+        """
+        fecha = fecha or datetime.utcnow()
         
-        ahora = datetime.utcnow()
         if self.ultima_actividad:
-            diferencia = ahora - self.ultima_actividad
-            if diferencia.days == 1:
-                self.racha_dias += 1
-            elif diferencia.days > 1:
+            if fecha < self.ultima_actividad:
+                return
+            dias = (fecha.date() - self.ultima_actividad.date()).days
+            if dias == 1:
+                self.racha_dias = (self.racha_dias or 0) + 1
+            elif dias > 1:
                 self.racha_dias = 1
+            else:
+                self.racha_dias = max(self.racha_dias or 0, 1)
         else:
             self.racha_dias = 1
         
-        self.ultima_actividad = ahora
+        self.ultima_actividad = fecha
     
     def registrar_login(self):
         """Registrar timestamp de login"""
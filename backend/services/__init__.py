@@ -8,12 +8,16 @@ from backend.services.points_service import PointsService
 from backend.services.reward_service import RewardService
 from backend.services.stats_service import StatsService
 from backend.services.auth_service import AuthService
+from backend.services.ranking_service import RankingService
+from backend.services.export_service import ExportService
 
 __all__ = [
     'UserService',
     'PointsService',
     'RewardService',
     'StatsService',
-    'AuthService'
+    'AuthService',
+    'RankingService',
+    'ExportService'
 ]
 
@@ -0,0 +1,127 @@
+"""
+Motor de Badges - Evaluación de logros por umbrales cruzados
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.models import Badge, Usuario
+from backend.utils import get_service_logger
+from backend.utils.cache import CacheTTL
+
+logger = get_service_logger()
+
+# Catálogo compilado de badges activos, local al proceso
+_cache_catalogo = CacheTTL(ttl=300)
+CLAVE_CATALOGO = 'catalogo'
+CLAVE_BADGES_MODIFICADOS = 'badges_modificados'
+
+
+class MotorBadges:
+    """
+    Evalúa qué badges se obtienen comparando los contadores del usuario
+    antes y después de una operación.
+
+    El catálogo se compila por condicion_tipo en listas ordenadas por
+    umbral, de modo que los badges cruzados se obtienen con dos búsquedas
+    binarias y sin consultar la base de datos.
+    """
+
+    @staticmethod
+    def valores(usuario: Usuario) -> Dict[str, int]:
+        """Valores actuales del usuario para cada tipo de condición"""
+        return {
+            'reciclajes': usuario.total_reciclajes or 0,
+            'puntos': usuario.puntos_totales or 0,
+            'racha': usuario.racha_dias or 0,
+            'nivel': usuario.nivel or 0
+        }
+
+    @staticmethod
+    def _compilar() -> Dict[str, tuple]:
+        """
+        Compilar el catálogo de badges activos.
+
+        Returns:
+            dict: {condicion_tipo: (umbrales_ordenados, badges_en_mismo_orden)}
+        """
+        por_tipo: Dict[str, list] = {}
+        for badge in Badge.query.filter_by(activo=True).all():
+            por_tipo.setdefault(badge.condicion_tipo, []).append(badge.to_dict())
+
+        catalogo = {}
+        for tipo, badges in por_tipo.items():
+            badges.sort(key=lambda b: (b['condicion_valor'], b['id']))
+            catalogo[tipo] = ([b['condicion_valor'] for b in badges], badges)
+
+        logger.info(f"Catálogo de badges compilado: {sum(len(b) for b in por_tipo.values())} badges")
+        return catalogo
+
+    @staticmethod
+    def catalogo() -> Dict[str, tuple]:
+        """Obtener el catálogo compilado (cacheado)"""
+        ttl = current_app.config.get('BADGE_CATALOG_TTL', _cache_catalogo.ttl)
+        catalogo, _ = _cache_catalogo.obtener_o_calcular(
+            CLAVE_CATALOGO,
+            MotorBadges._compilar,
+            ttl=ttl
+        )
+        return catalogo
+
+    @staticmethod
+    def invalidar_catalogo():
+        """Descartar el catálogo compilado"""
+        _cache_catalogo.invalidar(CLAVE_CATALOGO)
+
+    @staticmethod
+    def badges_cruzados(
+        antes: Optional[Dict[str, int]],
+        despues: Dict[str, int]
+    ) -> List[dict]:
+        """
+        Badges cuyo umbral se cruzó: antes < condicion_valor <= despues.
+
+        Args:
+            antes: Valores previos (None = evaluar todos los umbrales alcanzados)
+            despues: Valores actuales
+
+        Returns:
+            list: Badges (dict) candidatos a otorgarse
+        """
+        cruzados = []
+        for tipo, (umbrales, badges) in MotorBadges.catalogo().items():
+            valor_despues = despues.get(tipo, 0)
+            valor_antes = antes.get(tipo, 0) if antes is not None else float('-inf')
+            if valor_despues <= valor_antes:
+                continue
+
+            desde = bisect_right(umbrales, valor_antes)
+            hasta = bisect_right(umbrales, valor_despues)
+            cruzados.extend(badges[desde:hasta])
+
+        return cruzados
+
+
+# ==================== Invalidación del catálogo ====================
+
+@event.listens_for(Session, 'after_flush')
+def _detectar_cambios_badges(session, flush_context):
+    """Marcar la sesión si se modificó algún badge"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Badge):
+            session.info[CLAVE_BADGES_MODIFICADOS] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_catalogo_badges(session):
+    """Invalidar el catálogo tras confirmar cambios en badges"""
+    if session.info.pop(CLAVE_BADGES_MODIFICADOS, False):
+        MotorBadges.invalidar_catalogo()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_cambios_badges(session):
+    session.info.pop(CLAVE_BADGES_MODIFICADOS, None)
@@ -0,0 +1,232 @@
+"""
+Servicio de Exportación - Volcado de transacciones y canjes en streaming
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, date, timedelta
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+from sqlalchemy import select
+from backend.extensions import db
+from backend.models import Transaccion, Canje, Recompensa, Usuario
+from backend.utils import get_service_logger
+
+logger = get_service_logger()
+
+
+class ExportService:
+    """
+    Exportación de historiales sin materializarlos en memoria.
+
+    Las consultas proyectan solo columnas (sin construir objetos ORM) y se
+    leen en bloques con yield_per; cada bloque se serializa y se entrega al
+    cliente antes de pedir el siguiente, de modo que la memoria usada no
+    depende del número de filas exportadas.
+    """
+
+    FORMATOS = ('ndjson', 'csv')
+
+    COLUMNAS_TRANSACCIONES = (
+        'id', 'usuario_id', 'uid_rfid', 'tipo_objeto', 'puntos_otorgados',
+        'fecha_hora', 'resultado_ia', 'confianza_ia', 'peso_estimado_kg',
+        'co2_evitado_kg', 'imagen_path'
+    )
+
+    COLUMNAS_CANJES = (
+        'id', 'usuario_id', 'uid_rfid', 'recompensa_id', 'recompensa_nombre',
+        'puntos_gastados', 'fecha_canje', 'estado', 'codigo_canje'
+    )
+
+    @staticmethod
+    def parsear_rango(
+        desde: Optional[str],
+        hasta: Optional[str]
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        Convertir el rango de fechas (ISO 8601) en límites [desde, hasta).
+        Una fecha sin hora en `hasta` incluye el día completo.
+
+        Raises:
+            ValueError: Si alguna fecha no es válida
+        """
+        def _parsear(valor: str, fin: bool) -> datetime:
+            try:
+                if len(valor) == 10:
+                    dia = date.fromisoformat(valor)
+                    inicio = datetime(dia.year, dia.month, dia.day)
+                    return inicio + timedelta(days=1) if fin else inicio
+                return datetime.fromisoformat(valor)
+            except ValueError:
+                raise ValueError(f"Fecha inválida: {valor} (usar formato ISO 8601)")
+
+        return (
+            _parsear(desde, False) if desde else None,
+            _parsear(hasta, True) if hasta else None
+        )
+
+    @staticmethod
+    def consulta_transacciones(
+        desde: datetime = None,
+        hasta: datetime = None,
+        usuario_id: int = None,
+        tipo_objeto: str = None,
+        uid_rfid: str = None
+    ):
+        """Consulta de transacciones filtradas, en orden cronológico"""
+        consulta = select(
+            Transaccion.id,
+            Transaccion.usuario_id,
+            Usuario.uid_rfid,
+            Transaccion.tipo_objeto,
+            Transaccion.puntos_otorgados,
+            Transaccion.fecha_hora,
+            Transaccion.resultado_ia,
+            Transaccion.confianza_ia,
+            Transaccion.peso_estimado_kg,
+            Transaccion.co2_evitado_kg,
+            Transaccion.imagen_path
+        ).join(Usuario, Usuario.id == Transaccion.usuario_id)
+
+        if desde:
+            consulta = consulta.where(Transaccion.fecha_hora >= desde)
+        if hasta:
+            consulta = consulta.where(Transaccion.fecha_hora < hasta)
+        if usuario_id:
+            consulta = consulta.where(Transaccion.usuario_id == usuario_id)
+        if uid_rfid:
+            consulta = consulta.where(Usuario.uid_rfid == uid_rfid.upper().strip())
+        if tipo_objeto:
+            consulta = consulta.where(Transaccion.tipo_objeto == tipo_objeto)
+
+        return consulta.order_by(Transaccion.fecha_hora, Transaccion.id)
+
+    @staticmethod
+    def consulta_canjes(
+        desde: datetime = None,
+        hasta: datetime = None,
+        usuario_id: int = None,
+        estado: str = None,
+        uid_rfid: str = None
+    ):
+        """Consulta de canjes filtrados, en orden cronológico"""
+        consulta = select(
+            Canje.id,
+            Canje.usuario_id,
+            Usuario.uid_rfid,
+            Canje.recompensa_id,
+            Recompensa.nombre.label('recompensa_nombre'),
+            Canje.puntos_gastados,
+            Canje.fecha_canje,
+            Canje.estado,
+            Canje.codigo_canje
+        ).join(
+            Usuario, Usuario.id == Canje.usuario_id
+        ).outerjoin(
+            Recompensa, Recompensa.id == Canje.recompensa_id
+        )
+
+        if desde:
+            consulta = consulta.where(Canje.fecha_canje >= desde)
+        if hasta:
+            consulta = consulta.where(Canje.fecha_canje < hasta)
+        if usuario_id:
+            consulta = consulta.where(Canje.usuario_id == usuario_id)
+        if uid_rfid:
+            consulta = consulta.where(Usuario.uid_rfid == uid_rfid.upper().strip())
+        if estado:
+            consulta = consulta.where(Canje.estado == estado)
+
+        return consulta.order_by(Canje.fecha_canje, Canje.id)
+
+    @staticmethod
+    def iterar_filas(consulta, tamano_bloque: int = 1000) -> Iterator[tuple]:
+        """Recorrer la consulta en bloques (cursor del lado del servidor si el motor lo soporta)"""
+        resultado = db.session.execute(
+            consulta.execution_options(yield_per=tamano_bloque)
+        )
+        try:
+            for fila in resultado:
+                yield tuple(fila)
+        finally:
+            resultado.close()
+
+    @staticmethod
+    def _valor(valor):
+        """Normalizar valores para JSON/CSV"""
+        if isinstance(valor, (datetime, date)):
+            return valor.isoformat()
+        return valor
+
+    @staticmethod
+    def generar_ndjson(
+        columnas: Sequence[str],
+        filas: Iterable[tuple],
+        filas_por_bloque: int = 500
+    ) -> Iterator[str]:
+        """Serializar filas como NDJSON, entregando bloques de texto"""
+        bloque = []
+        total = 0
+        for fila in filas:
+            registro = {c: ExportService._valor(v) for c, v in zip(columnas, fila)}
+            bloque.append(json.dumps(registro, ensure_ascii=False))
+            if len(bloque) >= filas_por_bloque:
+                total += len(bloque)
+                yield '\n'.join(bloque) + '\n'
+                bloque = []
+
+        if bloque:
+            total += len(bloque)
+            yield '\n'.join(bloque) + '\n'
+
+        logger.info(f"Exportación NDJSON completada: {total} filas")
+
+    @staticmethod
+    def generar_csv(
+        columnas: Sequence[str],
+        filas: Iterable[tuple],
+        filas_por_bloque: int = 500
+    ) -> Iterator[str]:
+        """Serializar filas como CSV (con encabezado), entregando bloques de texto"""
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(columnas)
+
+        pendientes = 0
+        total = 0
+        for fila in filas:
+            escritor.writerow([ExportService._valor(v) for v in fila])
+            pendientes += 1
+            if pendientes >= filas_por_bloque:
+                total += pendientes
+                pendientes = 0
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        total += pendientes
+        yield buffer.getvalue()
+
+        logger.info(f"Exportación CSV completada: {total} filas")
+
+    @staticmethod
+    def generar(
+        formato: str,
+        columnas: Sequence[str],
+        consulta,
+        tamano_bloque: int = 1000,
+        filas_por_bloque: int = 500
+    ) -> Iterator[str]:
+        """
+        Generador de la exportación completa en el formato pedido.
+
+        Raises:
+            ValueError: Si el formato no es válido
+        """
+        if formato not in ExportService.FORMATOS:
+            raise ValueError(f"Formato inválido: {formato} (usar ndjson o csv)")
+
+        filas = ExportService.iterar_filas(consulta, tamano_bloque)
+        if formato == 'csv':
+            return ExportService.generar_csv(columnas, filas, filas_por_bloque)
+        return ExportService.generar_ndjson(columnas, filas, filas_por_bloque)
@@ -2,12 +2,17 @@
 Servicio de Puntos y Transacciones - Lógica de Negocio
 """
 
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List
 from datetime import datetime
+from collections import defaultdict
+from sqlalchemy import tuple_
 from backend.extensions import db
-from backend.models import Usuario, Transaccion
+from backend.models import Usuario, Transaccion, ResumenDiario, RankingPeriodo
 from backend.services.user_service import UserService
+from backend.services.stats_service import StatsService
+from backend.services.badge_engine import MotorBadges
 from backend.utils import get_service_logger
+from backend.utils.cursor import codificar_cursor, decodificar_cursor
 
 logger = get_service_logger()
 
@@ -38,31 +43,41 @@ class PointsService:
             return False, "Usuario no encontrado", None
         
         try:
-            # Calcular impacto ambiental
-            peso_kg, co2_kg = Transaccion.calcular_impacto(tipo_objeto)
+            # Valores previos para detectar badges cruzados
+            valores_previos = MotorBadges.valores(usuario)
             
-            # Agregar puntos al usuario
-            usuario.agregar_puntos(puntos)
-            usuario.actualizar_racha()
-            
-            # Crear transacción
-            transaccion = Transaccion(
-                usuario_id=usuario.id,
-                tipo_objeto=tipo_objeto,
-                puntos_otorgados=puntos,
+            # Crear transacción (incluye impacto ambiental)
+            transaccion = PointsService._nueva_transaccion(
+                usuario.id,
+                puntos,
+                tipo_objeto,
                 resultado_ia=resultado_ia,
                 confianza_ia=confianza_ia,
-                peso_estimado_kg=peso_kg,
-                co2_evitado_kg=co2_kg,
-                imagen_path=imagen_path,
-                fecha_hora=datetime.utcnow()
+                imagen_path=imagen_path
             )
+            peso_kg = transaccion.peso_estimado_kg
+            co2_kg = transaccion.co2_evitado_kg
+            
+            # Agregar puntos al usuario
+            usuario.agregar_puntos(puntos)
+            usuario.actualizar_racha(transaccion.fecha_hora)
+            usuario.registrar_reciclaje(tipo_objeto, peso_kg, co2_kg)
             
             db.session.add(transaccion)
+            
+            # Acumular en el resumen diario y el ranking por período (mismo commit)
+            ResumenDiario.registrar_transaccion(transaccion)
+            RankingPeriodo.registrar(
+                usuario.id,
+                transaccion.fecha_hora.date(),
+                puntos=puntos
+            )
+            
             db.session.commit()
+            StatsService.invalidar_dashboard()
             
             # Verificar badges nuevos
-            badges_nuevos = UserService.verificar_badges(usuario)
+            badges_nuevos = UserService.verificar_badges(usuario, valores_previos)
             
             logger.info(
                 f"Puntos agregados: {puntos} pts a {usuario.nombre} "
@@ -78,7 +93,7 @@ class PointsService:
                     'peso_kg': peso_kg,
                     'co2_evitado_kg': co2_kg
                 },
-                'badges_nuevos': [b.to_dict() for b in badges_nuevos]
+                'badges_nuevos': badges_nuevos
             }
             
         except Exception as e:
@@ -87,25 +102,347 @@ class PointsService:
             return False, f"Error interno: {str(e)}", None
     
     @staticmethod
-    def obtener_transacciones_usuario(
-        usuario_id: int, 
-        limite: int = 50
-    ) -> list:
-        """Obtener historial de transacciones de un usuario"""
-        transacciones = Transaccion.query\
-            .filter_by(usuario_id=usuario_id)\
-            .order_by(Transaccion.fecha_hora.desc())\
-            .limit(limite)\
-            .all()
+    def _nueva_transaccion(
+        usuario_id: int,
+        puntos: int,
+        tipo_objeto: str,
+        resultado_ia: str = None,
+        confianza_ia: float = None,
+        imagen_path: str = None,
+        fecha_hora: datetime = None,
+        id_deposito: str = None
+    ) -> Transaccion:
+        """Construir una transacción con su impacto ambiental (sin agregarla a la sesión)"""
+        peso_kg, co2_kg = Transaccion.calcular_impacto(tipo_objeto)
+        return Transaccion(
+            usuario_id=usuario_id,
+            tipo_objeto=tipo_objeto,
+            puntos_otorgados=puntos,
+            resultado_ia=resultado_ia,
+            confianza_ia=confianza_ia,
+            peso_estimado_kg=peso_kg,
+            co2_evitado_kg=co2_kg,
+            imagen_path=imagen_path,
+            fecha_hora=fecha_hora or datetime.utcnow(),
+            id_deposito=id_deposito
+        )
+    
+    @staticmethod
+    def _validar_deposito(deposito) -> Tuple[Optional[str], Optional[dict]]:
+        """
+        Validar y normalizar un depósito del lote.
         
-        return [t.to_dict() for t in transacciones]
+        Returns:
+            tuple: (error, deposito_normalizado)
+        """
+        if not isinstance(deposito, dict):
+            return "El depósito debe ser un objeto", None
+        
+        if not deposito.get('uid') or 'puntos' not in deposito:
+            return "Faltan parámetros requeridos: uid, puntos", None
+        
+        try:
+            puntos = int(deposito['puntos'])
+        except (TypeError, ValueError):
+            return "El valor de puntos debe ser un número entero", None
+        
+        if puntos <= 0:
+            return "Los puntos deben ser mayores a cero", None
+        
+        id_deposito = deposito.get('id_deposito')
+        if id_deposito is not None:
+            id_deposito = str(id_deposito).strip()
+            if not id_deposito or len(id_deposito) > 36:
+                return "id_deposito debe tener entre 1 y 36 caracteres", None
+        
+        fecha_hora = None
+        if deposito.get('fecha_hora'):
+            try:
+                fecha_hora = datetime.fromisoformat(str(deposito['fecha_hora']))
+            except ValueError:
+                return "fecha_hora debe estar en formato ISO 8601", None
+            if fecha_hora.tzinfo is not None:
+                # Las fechas se almacenan en UTC sin zona horaria
+                fecha_hora = datetime.utcfromtimestamp(fecha_hora.timestamp())
+        
+        return None, {
+            'uid': str(deposito['uid']).upper().strip(),
+            'puntos': puntos,
+            'tipo_objeto': deposito.get('tipo_objeto') or 'desconocido',
+            'resultado_ia': deposito.get('resultado_ia'),
+            'confianza_ia': deposito.get('confianza_ia'),
+            'imagen_path': deposito.get('imagen_path'),
+            'fecha_hora': fecha_hora,
+            'id_deposito': id_deposito
+        }
+    
+    @staticmethod
+    def agregar_puntos_lote(depositos: List[dict]) -> Tuple[bool, str, Optional[dict]]:
+        """
+        Registrar un lote de depósitos (p. ej. los acumulados por una
+        máquina mientras estuvo sin conexión).
+        
+        Los usuarios se resuelven en una sola consulta, las transacciones se
+        insertan juntas y los puntos, contadores, resúmenes y ranking se
+        aplican agregados por usuario en un único commit. Los badges se
+        evalúan una sola vez por usuario.
+        
+        Los depósitos inválidos o de usuarios inexistentes se reportan como
+        fallidos sin afectar al resto del lote. Los que traen un id_deposito
+        ya registrado (reenvíos de una máquina que no recibió la respuesta)
+        se reportan como exitosos con duplicado=True y no suman puntos.
+        
+        Args:
+            depositos: Lista de depósitos con el mismo formato que add_points
+                       (uid, puntos, tipo_objeto, ...), fecha_hora e
+                       id_deposito opcionales
+        
+        Returns:
+            tuple: (exito, mensaje, datos) con el resultado de cada depósito
+        """
+        resultados = [None] * len(depositos)
+        validos = []
+        
+        for indice, deposito in enumerate(depositos):
+            error, normalizado = PointsService._validar_deposito(deposito)
+            if error:
+                resultados[indice] = {'indice': indice, 'exito': False, 'error': error}
+            else:
+                validos.append((indice, normalizado))
+        
+        # Descartar los depósitos ya registrados en una sola consulta
+        ids = {d['id_deposito'] for _, d in validos if d['id_deposito']}
+        registrados = {}
+        if ids:
+            registrados = dict(
+                db.session.query(Transaccion.id_deposito, Transaccion.id)
+                .filter(Transaccion.id_deposito.in_(ids))
+                .all()
+            )
+        
+        nuevos = []
+        vistos = set()
+        duplicados = 0
+        for indice, deposito in validos:
+            id_deposito = deposito['id_deposito']
+            if id_deposito in registrados:
+                resultados[indice] = {
+                    'indice': indice,
+                    'exito': True,
+                    'duplicado': True,
+                    'transaccion_id': registrados[id_deposito]
+                }
+                duplicados += 1
+            elif id_deposito and id_deposito in vistos:
+                resultados[indice] = {
+                    'indice': indice,
+                    'exito': False,
+                    'error': "id_deposito repetido en el lote"
+                }
+            else:
+                if id_deposito:
+                    vistos.add(id_deposito)
+                nuevos.append((indice, deposito))
+        validos = nuevos
+        
+        # Resolver todos los usuarios en una sola consulta
+        uids = {d['uid'] for _, d in validos}
+        usuarios = {}
+        if uids:
+            usuarios = {
+                u.uid_rfid: u for u in Usuario.query.filter(
+                    Usuario.uid_rfid.in_(uids),
+                    Usuario.activo.is_(True)
+                ).all()
+            }
+        
+        aceptados = []
+        for indice, deposito in validos:
+            if deposito['uid'] not in usuarios:
+                resultados[indice] = {
+                    'indice': indice,
+                    'exito': False,
+                    'error': "Usuario no encontrado"
+                }
+            else:
+                aceptados.append((indice, deposito))
+        
+        usuarios_afectados = {}
+        
+        if aceptados:
+            try:
+                transacciones = []
+                por_usuario = defaultdict(list)
+                
+                for indice, deposito in aceptados:
+                    usuario = usuarios[deposito['uid']]
+                    transaccion = PointsService._nueva_transaccion(
+                        usuario.id,
+                        deposito['puntos'],
+                        deposito['tipo_objeto'],
+                        resultado_ia=deposito['resultado_ia'],
+                        confianza_ia=deposito['confianza_ia'],
+                        imagen_path=deposito['imagen_path'],
+                        fecha_hora=deposito['fecha_hora'],
+                        id_deposito=deposito['id_deposito']
+                    )
+                    transacciones.append((indice, transaccion))
+                    por_usuario[usuario.id].append(transaccion)
+                
+                db.session.add_all([t for _, t in transacciones])
+                
+                # Acumular por día y tipo de objeto, y por usuario y día
+                resumen = defaultdict(lambda: [0, 0, 0.0, 0.0])
+                ranking = defaultdict(lambda: [0, 0])
+                for _, t in transacciones:
+                    fila = resumen[(t.fecha_hora.date(), t.tipo_objeto)]
+                    fila[0] += 1
+                    fila[1] += t.puntos_otorgados
+                    fila[2] += t.peso_estimado_kg or 0.0
+                    fila[3] += t.co2_evitado_kg or 0.0
+                    
+                    fila = ranking[(t.usuario_id, t.fecha_hora.date())]
+                    fila[0] += 1
+                    fila[1] += t.puntos_otorgados
+                
+                for (fecha, tipo_objeto), (cantidad, puntos, peso, co2) in resumen.items():
+                    ResumenDiario.registrar(fecha, tipo_objeto, cantidad, puntos, peso, co2)
+                
+                for (usuario_id, fecha), (cantidad, puntos) in ranking.items():
+                    RankingPeriodo.registrar(usuario_id, fecha, cantidad, puntos)
+                
+                # Aplicar puntos y contadores agregados por usuario
+                valores_previos = {}
+                for usuario in usuarios.values():
+                    lista = por_usuario.get(usuario.id)
+                    if not lista:
+                        continue
+                    
+                    valores_previos[usuario.id] = MotorBadges.valores(usuario)
+                    usuario.agregar_puntos(sum(t.puntos_otorgados for t in lista))
+                    
+                    # Racha según la fecha de cada depósito, del más antiguo al más reciente
+                    for t in sorted(lista, key=lambda t: t.fecha_hora):
+                        usuario.actualizar_racha(t.fecha_hora)
+                    
+                    por_tipo = defaultdict(int)
+                    for t in lista:
+                        por_tipo[t.tipo_objeto] += 1
+                    usuario.registrar_reciclajes(
+                        por_tipo,
+                        sum(t.peso_estimado_kg or 0.0 for t in lista),
+                        sum(t.co2_evitado_kg or 0.0 for t in lista)
+                    )
+                    
+                    usuarios_afectados[usuario.id] = usuario
+                
+                db.session.commit()
+                StatsService.invalidar_dashboard()
+                
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error al registrar lote de depósitos: {e}")
+                return False, f"Error interno: {str(e)}", None
+            
+            for indice, transaccion in transacciones:
+                resultados[indice] = {
+                    'indice': indice,
+                    'exito': True,
+                    'transaccion_id': transaccion.id,
+                    'puntos': transaccion.puntos_otorgados
+                }
+        
+        # Verificar badges una vez por usuario
+        resumen_usuarios = []
+        for usuario_id, usuario in usuarios_afectados.items():
+            badges_nuevos = UserService.verificar_badges(usuario, valores_previos[usuario_id])
+            resumen_usuarios.append({
+                'uid': usuario.uid_rfid,
+                'usuario_id': usuario.id,
+                'depositos': len(por_usuario[usuario_id]),
+                'puntos_nuevos': usuario.puntos_totales,
+                'nivel': usuario.nivel,
+                'racha_dias': usuario.racha_dias,
+                'badges_nuevos': badges_nuevos
+            })
+        
+        procesados = sum(1 for r in resultados if r['exito'])
+        fallidos = len(resultados) - procesados
+        
+        logger.info(
+            f"Lote de depósitos: {procesados} procesados ({duplicados} duplicados), "
+            f"{fallidos} fallidos, {len(resumen_usuarios)} usuarios"
+        )
+        
+        return True, f"Se procesaron {procesados} de {len(resultados)} depósitos", {
+            'procesados': procesados,
+            'fallidos': fallidos,
+            'duplicados': duplicados,
+            'resultados': resultados,
+            'usuarios': resumen_usuarios
+        }
     
     @staticmethod
-    def obtener_transacciones_recientes(limite: int = 20) -> list:
-        """Obtener transacciones más recientes del sistema"""
-        transacciones = Transaccion.query\
-            .order_by(Transaccion.fecha_hora.desc())\
+    def _paginar(query, limite: int, cursor: str = None) -> list:
+        """
+        Aplicar orden descendente por (fecha_hora, id) y el cursor.
+        
+        El cursor se traduce en un filtro (fecha_hora, id) < (f, i) que
+        recorre el índice compuesto, por lo que cualquier página cuesta
+        lo mismo que la primera (sin OFFSET).
+        
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        if cursor:
+            fecha_hora, transaccion_id = decodificar_cursor(cursor)
+            query = query.filter(
+                tuple_(Transaccion.fecha_hora, Transaccion.id) < (fecha_hora, transaccion_id)
+            )
+        
+        transacciones = query\
+            .order_by(Transaccion.fecha_hora.desc(), Transaccion.id.desc())\
             .limit(limite)\
             .all()
         
         return [t.to_dict() for t in transacciones]
+    
+    @staticmethod
+    def cursor_siguiente(transacciones: list, limite: int) -> Optional[str]:
+        """
+        Cursor de la página siguiente, o None si la página no se llenó.
+        
+        Args:
+            transacciones: Página devuelta por obtener_transacciones_*
+            limite: Límite usado para obtenerla
+        """
+        if not transacciones or len(transacciones) < limite:
+            return None
+        
+        ultima = transacciones[-1]
+        return codificar_cursor(
+            datetime.fromisoformat(ultima['fecha_hora']),
+            ultima['id']
+        )
+    
+    @staticmethod
+    def obtener_transacciones_usuario(
+        usuario_id: int, 
+        limite: int = 50,
+        cursor: str = None
+    ) -> list:
+        """
+        Obtener historial de transacciones de un usuario.
+        
+        Args:
+            usuario_id: ID del usuario
+            limite: Tamaño de página
+            cursor: Cursor de la página anterior (ver cursor_siguiente)
+        """
+        query = Transaccion.query.filter_by(usuario_id=usuario_id)
+        return PointsService._paginar(query, limite, cursor)
+    
+    @staticmethod
+    def obtener_transacciones_recientes(limite: int = 20, cursor: str = None) -> list:
+        """Obtener transacciones más recientes del sistema (paginables por cursor)"""
+        return PointsService._paginar(Transaccion.query, limite, cursor)
@@ -0,0 +1,159 @@
+"""
+Servicio de Ranking - Posiciones de usuarios por puntos
+"""
+
+from typing import Optional, List, Dict, Any
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from backend.extensions import db
+from backend.models import Usuario
+from backend.utils import get_service_logger
+from backend.utils.ranking import IndiceRanking
+
+logger = get_service_logger()
+
+# Índice del proceso; se mantiene con los commits de la sesión
+_indice = IndiceRanking()
+
+CLAVE_PENDIENTES = 'ranking_pendientes'
+
+
+class RankingService:
+    """Servicio para consultas de ranking sobre el índice en memoria"""
+
+    @staticmethod
+    def _indice_vigente() -> IndiceRanking:
+        """
+        Obtener el índice, construyéndolo si no existe o si superó su TTL.
+        El TTL cubre cambios hechos por otros procesos (workers).
+        """
+        ttl = current_app.config.get('RANKING_INDEX_TTL', 300)
+        if not _indice.construido or _indice.edad() > ttl:
+            RankingService.reconstruir()
+        return _indice
+
+    @staticmethod
+    def reconstruir() -> int:
+        """
+        Cargar el índice desde la base de datos (solo id y puntos).
+
+        Returns:
+            int: Número de usuarios indexados
+        """
+        filas = db.session.query(
+            Usuario.id,
+            Usuario.puntos_totales
+        ).filter(Usuario.activo.is_(True)).all()
+
+        _indice.construir(filas)
+        logger.info(f"Índice de ranking construido: {len(filas)} usuarios")
+        return len(filas)
+
+    @staticmethod
+    def _asegurar_usuario(indice: IndiceRanking, usuario_id: int) -> bool:
+        """Indexar un usuario ausente (p. ej. creado por otro proceso)"""
+        if usuario_id in indice:
+            return True
+
+        usuario = db.session.get(Usuario, usuario_id)
+        if not usuario or not usuario.activo:
+            return False
+
+        indice.actualizar(usuario.id, usuario.puntos_totales)
+        return True
+
+    @staticmethod
+    def _datos_usuarios(ids: List[int]) -> Dict[int, Usuario]:
+        """Cargar usuarios por ID en una sola consulta"""
+        if not ids:
+            return {}
+        usuarios = Usuario.query.filter(Usuario.id.in_(ids)).all()
+        return {u.id: u for u in usuarios}
+
+    @staticmethod
+    def obtener_top_usuarios(limite: int = 10) -> List[Usuario]:
+        """Obtener los usuarios del top en orden de ranking"""
+        entradas = RankingService._indice_vigente().top(limite)
+        usuarios = RankingService._datos_usuarios([e[1] for e in entradas])
+        return [usuarios[uid] for _, uid, _ in entradas if uid in usuarios]
+
+    @staticmethod
+    def obtener_posicion(usuario_id: int, radio: int = 2) -> Optional[Dict[str, Any]]:
+        """
+        Obtener la posición de un usuario y los usuarios cercanos.
+
+        Args:
+            usuario_id: ID del usuario
+            radio: Número de posiciones a incluir arriba y abajo
+
+        Returns:
+            dict o None: Posición y vecinos, o None si el usuario no está activo
+        """
+        indice = RankingService._indice_vigente()
+        if not RankingService._asegurar_usuario(indice, usuario_id):
+            return None
+
+        entradas = indice.vecinos(usuario_id, radio)
+        usuarios = RankingService._datos_usuarios([e[1] for e in entradas])
+
+        vecinos = []
+        for posicion, uid, puntos in entradas:
+            usuario = usuarios.get(uid)
+            if not usuario:
+                continue
+            vecinos.append({
+                'posicion': posicion,
+                'usuario_id': uid,
+                'nombre_completo': f'{usuario.nombre} {usuario.apellido}',
+                'puntos_totales': puntos,
+                'es_usuario': uid == usuario_id
+            })
+
+        return {
+            'usuario_id': usuario_id,
+            'posicion': indice.posicion(usuario_id),
+            'puntos_totales': indice.puntos(usuario_id),
+            'total_usuarios': len(indice),
+            'vecinos': vecinos
+        }
+
+
+# ==================== Sincronización con la sesión ====================
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_cambios_usuario(session, flush_context):
+    """Anotar usuarios modificados; se aplican al índice solo tras el commit"""
+    pendientes = None
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Usuario) and obj.id is not None:
+            if pendientes is None:
+                pendientes = session.info.setdefault(CLAVE_PENDIENTES, {})
+            pendientes[obj.id] = obj.puntos_totales if obj.activo is not False else None
+
+    for obj in session.deleted:
+        if isinstance(obj, Usuario) and obj.id is not None:
+            if pendientes is None:
+                pendientes = session.info.setdefault(CLAVE_PENDIENTES, {})
+            pendientes[obj.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_cambios_usuario(session):
+    """Reflejar en el índice los cambios confirmados"""
+    pendientes = session.info.pop(CLAVE_PENDIENTES, None)
+    if not pendientes or not _indice.construido:
+        return
+
+    for usuario_id, puntos in pendientes.items():
+        if puntos is None:
+            _indice.eliminar(usuario_id)
+        else:
+            _indice.actualizar(usuario_id, puntos)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_cambios_usuario(session):
+    """Descartar cambios no confirmados"""
+    session.info.pop(CLAVE_PENDIENTES, None)
@@ -5,6 +5,7 @@ Servicio de Recompensas - Lógica de Negocio
 from typing import Optional, Tuple, List
 from backend.extensions import db
 from backend.models import Usuario, Recompensa, Canje
+from backend.services.stats_service import StatsService
 from backend.utils import get_service_logger
 
 logger = get_service_logger()
@@ -55,6 +56,7 @@ class RewardService:
         try:
             # Descontar puntos
             usuario.puntos_totales -= recompensa.puntos_requeridos
+            usuario.total_canjes = Usuario.total_canjes + 1
             
             # Descontar stock
             recompensa.stock -= 1
@@ -70,6 +72,7 @@ class RewardService:
             
             db.session.add(canje)
             db.session.commit()
+            StatsService.invalidar_dashboard()
             
             logger.info(
                 f"Canje realizado: {recompensa.nombre} por {usuario.nombre} "
@@ -123,6 +126,7 @@ class RewardService:
             
             canje.estado = nuevo_estado
             db.session.commit()
+            StatsService.invalidar_dashboard()
             
             logger.info(f"Canje {canje_id} actualizado a: {nuevo_estado}")
             return True, f"Estado actualizado a: {nuevo_estado}"
@@ -4,13 +4,19 @@ Servicio de Estadísticas - Cálculos de Impacto Ambiental
 
 from typing import Dict, Any
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from flask import current_app
+from sqlalchemy import func, insert
 from backend.extensions import db
-from backend.models import Usuario, Transaccion
+from backend.models import Usuario, Transaccion, ResumenDiario, RankingPeriodo
 from backend.utils import get_service_logger
+from backend.utils.cache import CacheTTL
 
 logger = get_service_logger()
 
+# Caché del dashboard (cuerpo JSON ya serializado), local al proceso
+_cache_dashboard = CacheTTL(ttl=30)
+CLAVE_DASHBOARD = 'dashboard'
+
 
 class StatsService:
     """Servicio para estadísticas e impacto ambiental"""
@@ -19,7 +25,9 @@ class StatsService:
     def obtener_estadisticas_generales() -> Dict[str, Any]:
         """Obtener estadísticas generales del sistema"""
         total_usuarios = Usuario.query.filter_by(activo=True).count()
-        total_transacciones = Transaccion.query.count()
+        total_transacciones = db.session.query(
+            func.sum(ResumenDiario.total_reciclajes)
+        ).scalar() or 0
         total_puntos = db.session.query(
             func.sum(Usuario.puntos_totales)
         ).scalar() or 0
@@ -41,11 +49,11 @@ class StatsService:
         Returns:
             dict con métricas de impacto ambiental
         """
-        # Sumar totales de impacto
+        # Sumar totales de impacto desde el resumen diario
         resultado = db.session.query(
-            func.sum(Transaccion.peso_estimado_kg).label('peso_total'),
-            func.sum(Transaccion.co2_evitado_kg).label('co2_total'),
-            func.count(Transaccion.id).label('total_reciclajes')
+            func.sum(ResumenDiario.peso_total_kg).label('peso_total'),
+            func.sum(ResumenDiario.co2_total_kg).label('co2_total'),
+            func.sum(ResumenDiario.total_reciclajes).label('total_reciclajes')
         ).first()
         
         peso_total = resultado.peso_total or 0
@@ -76,33 +84,24 @@ class StatsService:
     @staticmethod
     def obtener_impacto_usuario(usuario_id: int) -> Dict[str, Any]:
         """Calcular impacto ambiental de un usuario específico"""
-        resultado = db.session.query(
-            func.sum(Transaccion.peso_estimado_kg).label('peso_total'),
-            func.sum(Transaccion.co2_evitado_kg).label('co2_total'),
-            func.count(Transaccion.id).label('total_reciclajes')
-        ).filter(Transaccion.usuario_id == usuario_id).first()
+        # Contadores denormalizados: una sola lectura por clave primaria
+        usuario = db.session.get(Usuario, usuario_id)
         
-        peso_total = resultado.peso_total or 0
-        co2_total = resultado.co2_total or 0
-        total_reciclajes = resultado.total_reciclajes or 0
-        
-        # Contar por tipo de objeto
-        botellas = Transaccion.query.filter(
-            Transaccion.usuario_id == usuario_id,
-            Transaccion.tipo_objeto == 'botella_plastico'
-        ).count()
-        
-        latas = Transaccion.query.filter(
-            Transaccion.usuario_id == usuario_id,
-            Transaccion.tipo_objeto == 'lata_metal'
-        ).count()
+        if not usuario:
+            return {
+                'kg_reciclado': 0,
+                'co2_evitado': 0,
+                'total_reciclajes': 0,
+                'botellas_plastico': 0,
+                'latas_metal': 0
+            }
         
         return {
-            'kg_reciclado': round(peso_total, 3),
-            'co2_evitado': round(co2_total, 3),
-            'total_reciclajes': total_reciclajes,
-            'botellas_plastico': botellas,
-            'latas_metal': latas
+            'kg_reciclado': round(usuario.kg_reciclado or 0, 3),
+            'co2_evitado': round(usuario.co2_evitado_kg or 0, 3),
+            'total_reciclajes': usuario.total_reciclajes or 0,
+            'botellas_plastico': usuario.total_botellas or 0,
+            'latas_metal': usuario.total_latas or 0
         }
     
     @staticmethod
@@ -113,23 +112,23 @@ class StatsService:
         Returns:
             dict: {fecha_str: cantidad}
         """
-        fecha_inicio = datetime.utcnow() - timedelta(days=dias)
+        fecha_inicio = (datetime.utcnow() - timedelta(days=dias)).date()
         
-        # Agrupar transacciones por fecha
+        # Agrupar el resumen diario por fecha (una fila por día y tipo)
         resultados = db.session.query(
-            func.date(Transaccion.fecha_hora).label('fecha'),
-            func.count(Transaccion.id).label('cantidad')
+            ResumenDiario.fecha.label('fecha'),
+            func.sum(ResumenDiario.total_reciclajes).label('cantidad')
         ).filter(
-            Transaccion.fecha_hora >= fecha_inicio
+            ResumenDiario.fecha >= fecha_inicio
         ).group_by(
-            func.date(Transaccion.fecha_hora)
+            ResumenDiario.fecha
         ).all()
         
         # Convertir a diccionario
         datos = {}
         for r in resultados:
             fecha_str = r.fecha.strftime('%Y-%m-%d') if hasattr(r.fecha, 'strftime') else str(r.fecha)
-            datos[fecha_str] = r.cantidad
+            datos[fecha_str] = int(r.cantidad or 0)
         
         # Rellenar días sin datos
         for i in range(dias):
@@ -141,31 +140,246 @@ class StatsService:
         return dict(sorted(datos.items()))
     
     @staticmethod
-    def obtener_top_recicladores(limite: int = 5) -> list:
-        """Obtener usuarios con más reciclajes en el mes actual"""
-        inicio_mes = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0)
+    def obtener_top_recicladores(
+        limite: int = 5,
+        periodo: str = RankingPeriodo.PERIODO_MES,
+        desde_tabla: bool = None
+    ) -> list:
+        """
+        Obtener usuarios con más reciclajes en el período indicado.
         
-        resultados = db.session.query(
-            Transaccion.usuario_id,
-            func.count(Transaccion.id).label('reciclajes'),
-            func.sum(Transaccion.puntos_otorgados).label('puntos_mes')
-        ).filter(
-            Transaccion.fecha_hora >= inicio_mes
-        ).group_by(
-            Transaccion.usuario_id
-        ).order_by(
-            func.count(Transaccion.id).desc()
-        ).limit(limite).all()
+        Una sola consulta con JOIN a usuarios, proyectando solo las
+        columnas necesarias (sin consultas por fila).
+        
+        Args:
+            limite: Número de usuarios
+            periodo: 'semana', 'mes' o 'total'
+            desde_tabla: Leer de ranking_periodo (None = según configuración)
+        
+        Returns:
+            list: Top de recicladores con posición
+        """
+        if periodo not in RankingPeriodo.PERIODOS:
+            raise ValueError(f"Período inválido. Usar: {list(RankingPeriodo.PERIODOS)}")
+        
+        if desde_tabla is None:
+            desde_tabla = current_app.config.get('LEADERBOARD_DESDE_TABLA', True)
+        
+        columnas_usuario = (
+            Usuario.id,
+            Usuario.nombre,
+            Usuario.apellido,
+            Usuario.nivel,
+            Usuario.puntos_totales
+        )
+        inicio = RankingPeriodo.inicio_periodo(periodo, datetime.utcnow().date())
+        
+        if desde_tabla:
+            resultados = db.session.query(
+                *columnas_usuario,
+                RankingPeriodo.reciclajes.label('reciclajes'),
+                RankingPeriodo.puntos.label('puntos_periodo')
+            ).join(
+                Usuario, Usuario.id == RankingPeriodo.usuario_id
+            ).filter(
+                RankingPeriodo.periodo == periodo,
+                RankingPeriodo.inicio == inicio
+            ).order_by(
+                RankingPeriodo.reciclajes.desc(),
+                RankingPeriodo.puntos.desc(),
+                Usuario.id.asc()
+            ).limit(limite).all()
+        else:
+            reciclajes = func.count(Transaccion.id)
+            puntos_periodo = func.sum(Transaccion.puntos_otorgados)
+            
+            query = db.session.query(
+                *columnas_usuario,
+                reciclajes.label('reciclajes'),
+                puntos_periodo.label('puntos_periodo')
+            ).join(
+                Transaccion, Transaccion.usuario_id == Usuario.id
+            )
+            if periodo != RankingPeriodo.PERIODO_TOTAL:
+                query = query.filter(
+                    Transaccion.fecha_hora >= datetime.combine(inicio, datetime.min.time())
+                )
+            
+            resultados = query.group_by(
+                *columnas_usuario
+            ).order_by(
+                reciclajes.desc(),
+                puntos_periodo.desc(),
+                Usuario.id.asc()
+            ).limit(limite).all()
         
         top = []
         for i, r in enumerate(resultados, 1):
-            usuario = Usuario.query.get(r.usuario_id)
-            if usuario:
-                top.append({
-                    'posicion': i,
-                    'usuario': usuario.to_dict(),
-                    'reciclajes_mes': r.reciclajes,
-                    'puntos_mes': r.puntos_mes
-                })
+            entrada = {
+                'posicion': i,
+                'usuario': {
+                    'id': r.id,
+                    'nombre': r.nombre,
+                    'apellido': r.apellido,
+                    'nombre_completo': f'{r.nombre} {r.apellido}',
+                    'nivel': r.nivel,
+                    'puntos_totales': r.puntos_totales
+                },
+                'periodo': periodo,
+                'reciclajes_periodo': r.reciclajes,
+                'puntos_periodo': r.puntos_periodo or 0
+            }
+            # Claves históricas del top mensual
+            if periodo == RankingPeriodo.PERIODO_MES:
+                entrada['reciclajes_mes'] = r.reciclajes
+                entrada['puntos_mes'] = r.puntos_periodo or 0
+            top.append(entrada)
         
         return top
+    
+    @staticmethod
+    def obtener_dashboard() -> Dict[str, Any]:
+        """Reunir todos los datos del dashboard general"""
+        return {
+            'estadisticas': StatsService.obtener_estadisticas_generales(),
+            'impacto_ambiental': StatsService.obtener_impacto_ambiental(),
+            'reciclajes_semana': StatsService.obtener_reciclajes_por_periodo(7),
+            'top_recicladores': StatsService.obtener_top_recicladores(5)
+        }
+    
+    @staticmethod
+    def obtener_dashboard_json() -> tuple:
+        """
+        Obtener el dashboard serializado a JSON, usando la caché del proceso.
+        
+        Returns:
+            tuple: (cuerpo_json: bytes, desde_cache: bool)
+        """
+        return _cache_dashboard.obtener_o_calcular(
+            CLAVE_DASHBOARD,
+            lambda: current_app.json.dumps(
+                StatsService.obtener_dashboard()
+            ).encode('utf-8'),
+            ttl=StatsService._ttl_dashboard()
+        )
+    
+    @staticmethod
+    def _ttl_dashboard() -> float:
+        """TTL configurado del dashboard (DASHBOARD_CACHE_TTL)"""
+        return current_app.config.get('DASHBOARD_CACHE_TTL', _cache_dashboard.ttl)
+    
+    @staticmethod
+    def invalidar_dashboard():
+        """Descartar el dashboard cacheado tras una escritura confirmada"""
+        _cache_dashboard.invalidar(CLAVE_DASHBOARD)
+    
+    @staticmethod
+    def estadisticas_cache_dashboard() -> Dict[str, Any]:
+        """Contadores de aciertos/fallos de la caché del dashboard"""
+        return _cache_dashboard.estadisticas(ttl=StatsService._ttl_dashboard())
+    
+    @staticmethod
+    def reconstruir_resumen_diario() -> int:
+        """
+        Regenerar el resumen diario a partir de las transacciones.
+        Útil tras cargas masivas o para reparar inconsistencias.
+        
+        Returns:
+            int: Número de filas de resumen generadas
+        """
+        fecha = func.date(Transaccion.fecha_hora)
+        
+        agrupado = db.session.query(
+            fecha,
+            Transaccion.tipo_objeto,
+            func.count(Transaccion.id),
+            func.coalesce(func.sum(Transaccion.puntos_otorgados), 0),
+            func.coalesce(func.sum(Transaccion.peso_estimado_kg), 0.0),
+            func.coalesce(func.sum(Transaccion.co2_evitado_kg), 0.0)
+        ).group_by(
+            fecha,
+            Transaccion.tipo_objeto
+        )
+        
+        try:
+            db.session.query(ResumenDiario).delete()
+            db.session.execute(
+                insert(ResumenDiario).from_select(
+                    [
+                        'fecha',
+                        'tipo_objeto',
+                        'total_reciclajes',
+                        'total_puntos',
+                        'peso_total_kg',
+                        'co2_total_kg'
+                    ],
+                    agrupado
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reconstruyendo resumen diario: {e}")
+            raise
+        
+        StatsService.invalidar_dashboard()
+        
+        total = ResumenDiario.query.count()
+        logger.info(f"Resumen diario reconstruido: {total} filas")
+        return total
+    
+    @staticmethod
+    def reconstruir_ranking_periodos() -> int:
+        """
+        Regenerar la tabla ranking_periodo a partir de las transacciones.
+        
+        Agrupa por usuario y día en la base de datos y acumula semanas,
+        meses y total en memoria (O(usuarios × días activos) filas).
+        
+        Returns:
+            int: Número de filas de ranking generadas
+        """
+        fecha = func.date(Transaccion.fecha_hora)
+        
+        por_dia = db.session.query(
+            Transaccion.usuario_id,
+            fecha.label('fecha'),
+            func.count(Transaccion.id).label('reciclajes'),
+            func.coalesce(func.sum(Transaccion.puntos_otorgados), 0).label('puntos')
+        ).group_by(
+            Transaccion.usuario_id,
+            fecha
+        )
+        
+        acumulado = {}
+        for r in por_dia:
+            dia = r.fecha if hasattr(r.fecha, 'year') else \
+                datetime.strptime(str(r.fecha), '%Y-%m-%d').date()
+            for periodo in RankingPeriodo.PERIODOS:
+                clave = (periodo, RankingPeriodo.inicio_periodo(periodo, dia), r.usuario_id)
+                reciclajes, puntos = acumulado.get(clave, (0, 0))
+                acumulado[clave] = (reciclajes + r.reciclajes, puntos + int(r.puntos))
+        
+        try:
+            db.session.query(RankingPeriodo).delete()
+            filas = [
+                {
+                    'periodo': periodo,
+                    'inicio': inicio,
+                    'usuario_id': usuario_id,
+                    'reciclajes': reciclajes,
+                    'puntos': puntos
+                }
+                for (periodo, inicio, usuario_id), (reciclajes, puntos) in acumulado.items()
+            ]
+            if filas:
+                db.session.execute(insert(RankingPeriodo), filas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reconstruyendo ranking por período: {e}")
+            raise
+        
+        StatsService.invalidar_dashboard()
+        logger.info(f"Ranking por período reconstruido: {len(acumulado)} filas")
+        return len(acumulado)
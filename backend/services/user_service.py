@@ -2,10 +2,15 @@
 Servicio de Usuarios - Lógica de Negocio
 """
 
+from datetime import timedelta
 from typing import Optional, Tuple
+from sqlalchemy import func, case, tuple_
 from backend.extensions import db
-from backend.models import Usuario, Badge, UsuarioBadge
+from backend.models import Usuario, UsuarioBadge, Transaccion, Canje
+from backend.services.ranking_service import RankingService
+from backend.services.badge_engine import MotorBadges
 from backend.utils import get_service_logger
+from backend.utils.cursor import codificar_cursor, decodificar_cursor
 
 logger = get_service_logger()
 
@@ -55,6 +60,63 @@ class UserService:
             query = query.filter_by(activo=True)
         return query.order_by(Usuario.puntos_totales.desc()).all()
     
+    @staticmethod
+    def obtener_cambios(
+        cursor: str = None,
+        limite: int = 500,
+        margen: float = 0
+    ) -> Tuple[list, Optional[str]]:
+        """
+        Usuarios creados o modificados después del cursor, en orden
+        ascendente por (fecha_actualizacion, id). Incluye los desactivados
+        para que las máquinas los descarten de su caché.
+        
+        fecha_actualizacion se asigna al hacer flush, no al confirmar: una
+        transacción que confirma después de una sincronización puede
+        quedar con una fecha anterior al cursor. Con `margen` se vuelven a
+        leer los usuarios modificados en esos segundos previos al cursor
+        (el cliente descarta las versiones que ya tiene); al terminar la
+        sincronización el cursor nunca queda detrás del recibido.
+        
+        Args:
+            cursor: Cursor devuelto por la llamada anterior (None = todos)
+            limite: Máximo de usuarios a retornar
+            margen: Segundos a releer antes del cursor (primera página de
+                    cada sincronización)
+        
+        Returns:
+            tuple: (usuarios serializados, cursor para la siguiente llamada)
+        
+        Raises:
+            ValueError: Si el cursor no es válido
+        """
+        query = Usuario.query
+        posicion = None
+        if cursor:
+            posicion = decodificar_cursor(cursor)
+            if margen > 0:
+                query = query.filter(
+                    Usuario.fecha_actualizacion >= posicion[0] - timedelta(seconds=margen)
+                )
+            else:
+                query = query.filter(
+                    tuple_(Usuario.fecha_actualizacion, Usuario.id) > posicion
+                )
+        
+        usuarios = query\
+            .order_by(Usuario.fecha_actualizacion, Usuario.id)\
+            .limit(limite)\
+            .all()
+        
+        # Sin cambios posteriores al cursor se conserva el recibido (salvo
+        # que la página esté llena: la siguiente continúa desde el último)
+        if usuarios:
+            ultimo = (usuarios[-1].fecha_actualizacion, usuarios[-1].id)
+            if posicion is None or ultimo > posicion or len(usuarios) == limite:
+                cursor = codificar_cursor(*ultimo)
+        
+        return [u.to_dict() for u in usuarios], cursor
+    
     @staticmethod
     def registrar_usuario(
         uid_rfid: str,
@@ -102,11 +164,8 @@ class UserService:
     
     @staticmethod
     def obtener_ranking(limite: int = 10) -> list:
-        """Obtener ranking de usuarios por puntos"""
-        usuarios = Usuario.query.filter_by(activo=True)\
-            .order_by(Usuario.puntos_totales.desc())\
-            .limit(limite)\
-            .all()
+        """Obtener ranking de usuarios por puntos (desde el índice en memoria)"""
+        usuarios = RankingService.obtener_top_usuarios(limite)
         
         ranking = []
         for i, usuario in enumerate(usuarios, 1):
@@ -117,34 +176,51 @@ class UserService:
         return ranking
     
     @staticmethod
-    def verificar_badges(usuario: Usuario) -> list:
+    def verificar_badges(usuario: Usuario, valores_previos: dict = None) -> list:
         """
         Verificar y otorgar badges pendientes a un usuario.
         
+        Solo se evalúan los umbrales cruzados entre `valores_previos` y los
+        valores actuales (ver MotorBadges). Sin valores previos se evalúan
+        todos los umbrales alcanzados.
+        
+        Args:
+            usuario: Usuario a evaluar
+            valores_previos: Resultado de MotorBadges.valores() antes de la operación
+        
         Returns:
-            list: Badges nuevos otorgados
+            list: Badges nuevos otorgados (dict)
         """
-        badges_nuevos = []
+        candidatos = MotorBadges.badges_cruzados(
+            valores_previos,
+            MotorBadges.valores(usuario)
+        )
+        if not candidatos:
+            return []
         
-        # Obtener IDs de badges que ya tiene
-        badges_existentes = {ub.badge_id for ub in usuario.badges.all()}
+        # Descartar los que ya tiene (p. ej. puntos que bajan y vuelven a subir)
+        ids_candidatos = [b['id'] for b in candidatos]
+        existentes = {
+            badge_id for (badge_id,) in db.session.query(UsuarioBadge.badge_id).filter(
+                UsuarioBadge.usuario_id == usuario.id,
+                UsuarioBadge.badge_id.in_(ids_candidatos)
+            )
+        }
         
-        # Verificar cada badge activo
-        for badge in Badge.query.filter_by(activo=True).all():
-            if badge.id in badges_existentes:
+        badges_nuevos = []
+        for badge in candidatos:
+            if badge['id'] in existentes:
                 continue
             
-            if badge.verificar_condicion(usuario):
-                # Otorgar badge
-                usuario_badge = UsuarioBadge(
-                    usuario_id=usuario.id,
-                    badge_id=badge.id
-                )
-                db.session.add(usuario_badge)
-                badges_nuevos.append(badge)
-                logger.info(f"Badge otorgado: {badge.nombre} a {usuario.nombre}")
+            db.session.add(UsuarioBadge(
+                usuario_id=usuario.id,
+                badge_id=badge['id']
+            ))
+            badges_nuevos.append(badge)
+            logger.info(f"Badge otorgado: {badge['nombre']} a {usuario.nombre}")
         
         if badges_nuevos:
+            usuario.total_badges = Usuario.total_badges + len(badges_nuevos)
             db.session.commit()
         
         return badges_nuevos
@@ -154,3 +230,70 @@ class UserService:
         """Obtener todos los badges de un usuario"""
         usuario_badges = UsuarioBadge.query.filter_by(usuario_id=usuario_id).all()
         return [ub.to_dict() for ub in usuario_badges]
+    
+    @staticmethod
+    def reparar_contadores(usuario_id: int = None) -> int:
+        """
+        Recalcular los contadores denormalizados desde las tablas de origen.
+        
+        Args:
+            usuario_id: Usuario a reparar (None = todos)
+        
+        Returns:
+            int: Número de usuarios cuyos contadores se corrigieron
+        """
+        def agrupado(*columnas, modelo):
+            query = db.session.query(modelo.usuario_id, *columnas)
+            if usuario_id is not None:
+                query = query.filter(modelo.usuario_id == usuario_id)
+            return {fila[0]: fila[1:] for fila in query.group_by(modelo.usuario_id)}
+        
+        reciclajes = agrupado(
+            func.count(Transaccion.id),
+            func.coalesce(func.sum(Transaccion.peso_estimado_kg), 0.0),
+            func.coalesce(func.sum(Transaccion.co2_evitado_kg), 0.0),
+            func.sum(case((Transaccion.tipo_objeto == Usuario.TIPO_BOTELLA, 1), else_=0)),
+            func.sum(case((Transaccion.tipo_objeto == Usuario.TIPO_LATA, 1), else_=0)),
+            modelo=Transaccion
+        )
+        canjes = agrupado(func.count(Canje.id), modelo=Canje)
+        badges = agrupado(func.count(UsuarioBadge.id), modelo=UsuarioBadge)
+        
+        query = Usuario.query
+        if usuario_id is not None:
+            query = query.filter_by(id=usuario_id)
+        
+        corregidos = 0
+        try:
+            for usuario in query.all():
+                total, kg, co2, botellas, latas = reciclajes.get(
+                    usuario.id, (0, 0.0, 0.0, 0, 0)
+                )
+                esperado = {
+                    'total_reciclajes': int(total or 0),
+                    'kg_reciclado': float(kg or 0.0),
+                    'co2_evitado_kg': float(co2 or 0.0),
+                    'total_botellas': int(botellas or 0),
+                    'total_latas': int(latas or 0),
+                    'total_canjes': int(canjes.get(usuario.id, (0,))[0]),
+                    'total_badges': int(badges.get(usuario.id, (0,))[0])
+                }
+                
+                difiere = False
+                for campo, valor in esperado.items():
+                    actual = getattr(usuario, campo)
+                    if actual is None or abs(actual - valor) > 1e-9:
+                        setattr(usuario, campo, valor)
+                        difiere = True
+                
+                if difiere:
+                    corregidos += 1
+            
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reparando contadores: {e}")
+            raise
+        
+        logger.info(f"Contadores de usuario reparados: {corregidos}")
+        return corregidos
@@ -0,0 +1,105 @@
+"""
+Caché en memoria de proceso para Eco-RVM
+Valores con tiempo de vida (TTL), invalidación explícita y contadores de uso
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class CacheTTL:
+    """
+    Caché clave/valor con expiración por tiempo, segura entre hilos.
+
+    Es local a cada proceso: con varios workers cada uno mantiene su copia,
+    por lo que el TTL acota cuánto puede tardar en verse un cambio hecho
+    en otro proceso.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        """
+        Args:
+            ttl: Tiempo de vida de cada entrada en segundos
+        """
+        self.ttl = ttl
+        self._datos: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave: str) -> Optional[Any]:
+        """Obtener valor vigente o None si no existe o expiró"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self.hits += 1
+                return entrada[1]
+            self.misses += 1
+            return None
+
+    def guardar(self, clave: str, valor: Any, ttl: float = None):
+        """Guardar valor con el TTL indicado (o el por defecto)"""
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+
+    def obtener_o_calcular(
+        self,
+        clave: str,
+        calcular: Callable[[], Any],
+        ttl: float = None
+    ) -> tuple:
+        """
+        Obtener valor de la caché o calcularlo y guardarlo.
+
+        Returns:
+            tuple: (valor, desde_cache: bool)
+        """
+        valor = self.obtener(clave)
+        if valor is not None:
+            return valor, True
+
+        # Si se invalida mientras se calcula, el resultado ya nace obsoleto
+        # y no se guarda
+        with self._lock:
+            generacion = self._generacion
+
+        valor = calcular()
+
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generacion == self._generacion:
+                self._datos[clave] = (expira, valor)
+        return valor, False
+
+    def invalidar(self, clave: str = None):
+        """Eliminar una entrada, o todas si no se indica clave"""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+            self._generacion += 1
+            self.invalidaciones += 1
+
+    def estadisticas(self, ttl: float = None) -> Dict[str, Any]:
+        """
+        Contadores de uso de la caché.
+
+        Args:
+            ttl: TTL efectivo con que se guardan las entradas, si quien usa
+                 la caché lo pasa en cada llamada (default: el del constructor)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidaciones': self.invalidaciones,
+                'entradas': len(self._datos),
+                'ttl_segundos': self.ttl if ttl is None else ttl,
+                'tasa_aciertos': round(self.hits / total, 4) if total else 0.0
+            }
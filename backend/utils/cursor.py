@@ -0,0 +1,39 @@
+"""
+Cursores de Paginación - Eco-RVM
+Paginación por clave (keyset) sobre (fecha_hora, id) con cursor opaco
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+
+def codificar_cursor(fecha_hora: datetime, registro_id: int) -> str:
+    """
+    Codificar la posición del último registro de una página.
+
+    Returns:
+        str: Cursor opaco (base64 URL-safe)
+    """
+    crudo = f'{fecha_hora.isoformat()}|{registro_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodificar un cursor generado por codificar_cursor.
+
+    Returns:
+        tuple: (fecha_hora, id)
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode('utf-8')
+        fecha_texto, id_texto = crudo.rsplit('|', 1)
+        return datetime.fromisoformat(fecha_texto), int(id_texto)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Cursor de paginación inválido') from e
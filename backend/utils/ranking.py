@@ -0,0 +1,122 @@
+"""
+Índice de Ranking en Memoria - Eco-RVM
+Lista ordenada por (puntos desc, id asc) con búsqueda de posición en O(log n)
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class IndiceRanking:
+    """
+    Índice ordenado de usuarios por puntos, seguro entre hilos.
+
+    Cada usuario se guarda como la clave (-puntos, id), de modo que el orden
+    natural de la lista coincide con el del ranking y los empates se
+    resuelven por antigüedad (id menor primero). La posición se obtiene con
+    búsqueda binaria; insertar o mover un usuario desplaza memoria contigua,
+    lo cual es despreciable frente a ordenar la tabla completa.
+    """
+
+    def __init__(self):
+        self._claves: List[Tuple[int, int]] = []
+        self._puntos: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.construido_en: Optional[float] = None
+
+    @property
+    def construido(self) -> bool:
+        """Indica si el índice ya fue cargado"""
+        return self.construido_en is not None
+
+    def edad(self) -> float:
+        """Segundos desde la última construcción completa"""
+        if self.construido_en is None:
+            return float('inf')
+        return time.monotonic() - self.construido_en
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def __contains__(self, usuario_id: int) -> bool:
+        return usuario_id in self._puntos
+
+    def construir(self, usuarios: Iterable[Tuple[int, int]]):
+        """
+        Reemplazar el contenido del índice.
+
+        Args:
+            usuarios: Pares (usuario_id, puntos)
+        """
+        puntos = {usuario_id: int(p or 0) for usuario_id, p in usuarios}
+        claves = sorted((-p, usuario_id) for usuario_id, p in puntos.items())
+
+        with self._lock:
+            self._puntos = puntos
+            self._claves = claves
+            self.construido_en = time.monotonic()
+
+    def actualizar(self, usuario_id: int, puntos: int):
+        """Insertar o reubicar un usuario con sus puntos actuales"""
+        puntos = int(puntos or 0)
+        with self._lock:
+            anterior = self._puntos.get(usuario_id)
+            if anterior == puntos:
+                return
+            if anterior is not None:
+                self._quitar_clave((-anterior, usuario_id))
+            self._puntos[usuario_id] = puntos
+            insort(self._claves, (-puntos, usuario_id))
+
+    def eliminar(self, usuario_id: int):
+        """Quitar un usuario del índice (si está)"""
+        with self._lock:
+            anterior = self._puntos.pop(usuario_id, None)
+            if anterior is not None:
+                self._quitar_clave((-anterior, usuario_id))
+
+    def _quitar_clave(self, clave: Tuple[int, int]):
+        i = bisect_left(self._claves, clave)
+        if i < len(self._claves) and self._claves[i] == clave:
+            del self._claves[i]
+
+    def puntos(self, usuario_id: int) -> Optional[int]:
+        """Puntos indexados del usuario, o None si no está"""
+        with self._lock:
+            return self._puntos.get(usuario_id)
+
+    def posicion(self, usuario_id: int) -> Optional[int]:
+        """Posición (1 = primero) del usuario, o None si no está"""
+        with self._lock:
+            puntos = self._puntos.get(usuario_id)
+            if puntos is None:
+                return None
+            return bisect_left(self._claves, (-puntos, usuario_id)) + 1
+
+    def rango(self, inicio: int, fin: int) -> List[Tuple[int, int, int]]:
+        """
+        Entradas entre dos posiciones (base 1, ambas incluidas).
+
+        Returns:
+            list: Tuplas (posicion, usuario_id, puntos)
+        """
+        inicio = max(inicio, 1)
+        with self._lock:
+            return [
+                (inicio + i, usuario_id, -puntos_neg)
+                for i, (puntos_neg, usuario_id) in enumerate(self._claves[inicio - 1:fin])
+            ]
+
+    def top(self, limite: int) -> List[Tuple[int, int, int]]:
+        """Primeras `limite` entradas del ranking"""
+        return self.rango(1, limite)
+
+    def vecinos(self, usuario_id: int, radio: int = 2) -> List[Tuple[int, int, int]]:
+        """Entradas alrededor del usuario (radio posiciones arriba y abajo)"""
+        with self._lock:
+            posicion = self.posicion(usuario_id)
+            if posicion is None:
+                return []
+            return self.rango(posicion - radio, posicion + radio)
@@ -7,11 +7,20 @@ from controller.config import ControllerConfig
 from controller.arduino_handler import ArduinoHandler
 from controller.vision_system import VisionSystem
 from controller.api_client import APIClient
+from controller.pipeline import ControllerPipeline, PipelineMetrics
+from controller.outbox import DepositOutbox
+from controller.roster_cache import RosterCache
+from controller.startup import StartupOrchestrator
 from backend.utils import get_controller_logger
 
 __all__ = [
     'ControllerConfig',
     'ArduinoHandler', 
     'VisionSystem',
-    'APIClient'
+    'APIClient',
+    'ControllerPipeline',
+    'PipelineMetrics',
+    'DepositOutbox',
+    'RosterCache',
+    'StartupOrchestrator'
 ]
@@ -30,7 +30,8 @@ class APIClient:
         self, 
         method: str, 
         endpoint: str, 
-        data: Dict = None
+        data: Dict = None,
+        error_http: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Realizar request HTTP.
@@ -39,6 +40,8 @@ class APIClient:
             method: Método HTTP (GET, POST, PUT, DELETE)
             endpoint: Endpoint del API
             data: Datos a enviar (para POST/PUT)
+            error_http: Si el backend responde con un error HTTP, retornar
+                        {'exito': False, 'status', 'error'} en lugar de None
         
         Returns:
             dict o None: Respuesta JSON o None si hay error
@@ -64,6 +67,12 @@ class APIClient:
             return None
         except requests.exceptions.HTTPError as e:
             logger.error(f"Error HTTP {e.response.status_code}: {e.response.text}")
+            if error_http:
+                return {
+                    'exito': False,
+                    'status': e.response.status_code,
+                    'error': e.response.text[:500]
+                }
             return None
         except Exception as e:
             logger.error(f"Error en request: {e}")
@@ -114,6 +123,29 @@ class APIClient:
             logger.error(f"Error verificando código: {codigo} - {e}")
             return None
     
+    def link_card(self, uid_fisico: str, codigo_virtual: str) -> Optional[Dict]:
+        """
+        Vincular una tarjeta RFID nueva a la cuenta del código virtual.
+        
+        Args:
+            uid_fisico: UID leído por el lector RFID
+            codigo_virtual: Código de 6 caracteres ingresado por keypad
+        
+        Returns:
+            dict o None: Datos del usuario si se vinculó
+        """
+        result = self._request('POST', '/vincular_tarjeta', {
+            'uid_fisico': uid_fisico,
+            'codigo_virtual': codigo_virtual
+        })
+        
+        if result and result.get('exito'):
+            logger.info(f"Tarjeta {uid_fisico} vinculada a {result['usuario']['nombre']}")
+            return result['usuario']
+        
+        logger.warning(f"No se pudo vincular la tarjeta {uid_fisico}")
+        return None
+    
     def add_points(
         self,
         uid: str,
@@ -158,6 +190,50 @@ class APIClient:
         logger.warning(f"Error agregando puntos: {result}")
         return None
     
+    def add_points_batch(self, depositos: list) -> Optional[Dict]:
+        """
+        Registrar un lote de depósitos (usado por el outbox del controlador).
+    
+        Args:
+            depositos: Lista de depósitos con el formato de add_points,
+                       fecha_hora e id_deposito
+    
+        Returns:
+            dict o None: Resultado por depósito; si el backend respondió con
+            un error HTTP, {'exito': False, 'status', 'error'}; None si no
+            respondió (el lote debe reintentarse)
+        """
+        return self._request(
+            'POST',
+            '/add_points/batch',
+            {'depositos': depositos},
+            error_http=True
+        )
+    
+    def get_user_changes(
+        self,
+        cursor: str = None,
+        limite: int = 500,
+        margen: float = 0
+    ) -> Optional[Dict]:
+        """
+        Obtener los usuarios modificados desde un cursor (caché local).
+        
+        Args:
+            cursor: Cursor de la respuesta anterior (None = todos)
+            limite: Máximo de usuarios por respuesta
+            margen: Segundos a releer antes del cursor
+        
+        Returns:
+            dict o None: {usuarios, cursor, hay_mas}
+        """
+        endpoint = f'/usuarios/cambios?limite={limite}'
+        if cursor:
+            endpoint += f'&cursor={cursor}'
+        if margen:
+            endpoint += f'&margen={margen}'
+        return self._request('GET', endpoint)
+    
     def get_ranking(self, limite: int = 10) -> Optional[list]:
         """
         Obtener ranking de usuarios.
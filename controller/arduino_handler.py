@@ -2,9 +2,11 @@
 Manejador de Arduino - Comunicación Serial
 """
 
+import queue
 import serial
+import threading
 import time
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, Tuple
 from backend.utils import setup_logger
 
 logger = setup_logger('eco_rvm.arduino')
@@ -23,7 +25,17 @@ class ArduinoHandler:
     CMD_REJECTED = "REJECTED"
     CMD_RFID_SCANNED = "RFID:"
     
-    def __init__(self, port: str, baudrate: int = 9600, timeout: int = 1):
+    # Mensajes emitidos por el firmware (arduino/eco_rvm/main.ino)
+    MSG_UID = "UID:"
+    MSG_LOGIN = "LOGIN:"
+    MSG_LINK = "LINK:"
+    MSG_STATUS = "STATUS:"
+    MSG_SYSTEM_READY = "SYSTEM:READY"
+    
+    # Mensajes recibidos pendientes de despachar
+    MESSAGE_QUEUE_SIZE = 256
+    
+    def __init__(self, port: str, baudrate: int = 9600, timeout: int = 1, ready_timeout: float = 3.0):
         """
         Inicializar conexión serial.
         
@@ -31,12 +43,25 @@ class ArduinoHandler:
             port: Puerto serial (ej: COM3, /dev/ttyUSB0)
             baudrate: Velocidad de comunicación
             timeout: Timeout de lectura en segundos
+            ready_timeout: Espera máxima de SYSTEM:READY al conectar
         """
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.ready_timeout = ready_timeout
         self.serial: Optional[serial.Serial] = None
         self._connected = False
+        
+        # Varios hilos del pipeline pueden enviar comandos
+        self._write_lock = threading.Lock()
+        
+        # Hilo lector: readline() bloqueante → cola de (mensaje, instante)
+        self.messages: queue.Queue = queue.Queue(maxsize=self.MESSAGE_QUEUE_SIZE)
+        self._reader: Optional[threading.Thread] = None
+        self._reader_running = False
+        
+        # Instante de lectura del mensaje que se está despachando
+        self.last_received_at: Optional[float] = None
     
     def connect(self) -> bool:
         """
@@ -51,9 +76,20 @@ class ArduinoHandler:
                 baudrate=self.baudrate,
                 timeout=self.timeout
             )
-            time.sleep(2)  # Esperar inicialización de Arduino
             self._connected = True
-            logger.info(f"Conectado a Arduino en {self.port}")
+            
+            # Esperar el fin del setup() del firmware en lugar de una pausa fija
+            inicio = time.perf_counter()
+            if self._wait_system_ready(self.ready_timeout):
+                logger.info(
+                    f"Conectado a Arduino en {self.port} "
+                    f"(SYSTEM:READY en {time.perf_counter() - inicio:.2f}s)"
+                )
+            else:
+                logger.warning(
+                    f"Conectado a Arduino en {self.port} sin recibir SYSTEM:READY "
+                    f"en {self.ready_timeout:.1f}s (¿la placa no se reinició al abrir el puerto?)"
+                )
             return True
             
         except serial.SerialException as e:
@@ -61,8 +97,28 @@ class ArduinoHandler:
             self._connected = False
             return False
     
+    def _wait_system_ready(self, timeout: float) -> bool:
+        """
+        Leer hasta recibir SYSTEM:READY (se descartan las demás líneas).
+        
+        Returns:
+            bool: True si llegó antes del timeout
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                restante = deadline - time.monotonic()
+                if restante <= 0:
+                    return False
+                self.serial.timeout = restante
+                if self._read_serial_line() == self.MSG_SYSTEM_READY:
+                    return True
+        finally:
+            self.serial.timeout = self.timeout
+    
     def disconnect(self):
         """Cerrar conexión serial"""
+        self.stop_reader()
         if self.serial and self.serial.is_open:
             self.serial.close()
             self._connected = False
@@ -89,8 +145,9 @@ class ArduinoHandler:
         
         try:
             message = f"{command}\n".encode('utf-8')
-            self.serial.write(message)
-            self.serial.flush()
+            with self._write_lock:
+                self.serial.write(message)
+                self.serial.flush()
             logger.debug(f"Enviado: {command}")
             return True
             
@@ -98,22 +155,97 @@ class ArduinoHandler:
             logger.error(f"Error enviando comando: {e}")
             return False
     
+    def _read_serial_line(self) -> Optional[str]:
+        """Bloquear en readline() hasta una línea o el timeout del puerto"""
+        raw = self.serial.readline()
+        if not raw:
+            return None
+        line = raw.decode('utf-8', errors='replace').strip()
+        if line:
+            logger.debug(f"Recibido: {line}")
+            return line
+        return None
+    
+    def start_reader(self):
+        """
+        Iniciar el hilo lector. A partir de aquí las líneas recibidas se
+        leen de la cola `messages` como tuplas (mensaje, instante).
+        """
+        if self._reader_running or not self.is_connected:
+            return
+        
+        self._reader_running = True
+        self._reader = threading.Thread(
+            target=self._reader_loop,
+            name='arduino-lector',
+            daemon=True
+        )
+        self._reader.start()
+        logger.info("Hilo lector serial iniciado")
+    
+    def stop_reader(self):
+        """Detener el hilo lector (termina al vencer el timeout de readline)"""
+        if not self._reader_running:
+            return
+        
+        self._reader_running = False
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(self.timeout + 1)
+        self._reader = None
+    
+    @property
+    def reader_active(self) -> bool:
+        """Verificar si el hilo lector está en marcha"""
+        return self._reader_running and self._reader is not None and self._reader.is_alive()
+    
+    def _reader_loop(self):
+        """Leer líneas continuamente y encolarlas con su instante de llegada"""
+        while self._reader_running and self.is_connected:
+            try:
+                line = self._read_serial_line()
+            except (serial.SerialException, OSError) as e:
+                logger.error(f"Error leyendo del puerto serial: {e}")
+                break
+            
+            if not line:
+                continue
+            
+            item = (line, time.perf_counter())
+            try:
+                self.messages.put_nowait(item)
+            except queue.Full:
+                # Priorizar lo más reciente: descartar el mensaje más antiguo
+                try:
+                    descartado, _ = self.messages.get_nowait()
+                    logger.warning(f"Cola serial llena, mensaje descartado: {descartado}")
+                except queue.Empty:
+                    pass
+                self.messages.put_nowait(item)
+        
+        self._reader_running = False
+        logger.info("Hilo lector serial detenido")
+    
     def read_line(self) -> Optional[str]:
         """
         Leer una línea del Arduino.
         
+        Con el hilo lector activo retorna el siguiente mensaje encolado sin
+        esperar; si no, bloquea hasta el timeout del puerto.
+        
         Returns:
             str o None: Línea leída o None si no hay datos
         """
+        if self.reader_active:
+            try:
+                return self.messages.get_nowait()[0]
+            except queue.Empty:
+                return None
+        
         if not self.is_connected:
             return None
         
         try:
-            if self.serial.in_waiting > 0:
-                line = self.serial.readline().decode('utf-8').strip()
-                if line:
-                    logger.debug(f"Recibido: {line}")
-                    return line
+            return self._read_serial_line()
         except Exception as e:
             logger.error(f"Error leyendo: {e}")
         
@@ -129,13 +261,19 @@ class ArduinoHandler:
         Returns:
             str o None: Mensaje recibido o None si hay timeout
         """
-        start_time = time.time()
+        if self.reader_active:
+            try:
+                return self.messages.get(timeout=timeout)[0]
+            except queue.Empty:
+                return None
         
-        while (time.time() - start_time) < timeout:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
             message = self.read_line()
             if message:
                 return message
-            time.sleep(0.1)
+            if not self.is_connected:
+                break
         
         return None
     
@@ -157,59 +295,152 @@ class ArduinoHandler:
         Returns:
             str o None: UID extraído o None si no es un mensaje RFID
         """
-        if message.startswith(self.CMD_RFID_SCANNED):
-            return message[len(self.CMD_RFID_SCANNED):].strip()
+        for prefix in (self.MSG_UID, self.CMD_RFID_SCANNED):
+            if message.startswith(prefix):
+                return message[len(prefix):].strip()
         return None
     
-    def run_loop(
+    def build_dispatch_table(
         self,
         on_rfid: Callable[[str], None] = None,
-        on_login: Callable[[str], None] = None,  # NUEVO: Callback para login por keypad
+        on_login: Callable[[str], None] = None,
+        on_link: Callable[[str, str], None] = None,
         on_object_detected: Callable[[], None] = None,
         on_ready: Callable[[], None] = None
+    ) -> Tuple[Dict[str, Callable[[], None]], Dict[str, Callable[[str], None]]]:
+        """
+        Construir las tablas de despacho del protocolo.
+        
+        Returns:
+            tuple: (mensajes_exactos, prefijos) donde cada prefijo termina
+                   en ':' y su handler recibe el resto del mensaje
+        """
+        def _rfid(payload: str):
+            uid = payload.strip()
+            if uid and on_rfid:
+                on_rfid(uid)
+        
+        def _login(payload: str):
+            codigo = payload.strip()
+            if codigo and on_login:
+                on_login(codigo)
+        
+        def _link(payload: str):
+            uid, _, codigo = payload.strip().partition(':')
+            if uid and codigo and on_link:
+                on_link(uid, codigo)
+            elif uid:
+                logger.warning(f"Mensaje LINK mal formado: {payload}")
+        
+        def _status(payload: str):
+            if payload.strip() == "CHECK" and on_object_detected:
+                on_object_detected()
+        
+        def _ready():
+            if on_ready:
+                on_ready()
+        
+        def _object():
+            if on_object_detected:
+                on_object_detected()
+        
+        exactos = {
+            self.CMD_READY: _ready,
+            self.MSG_SYSTEM_READY: _ready,
+            self.CMD_OBJECT_DETECTED: _object
+        }
+        prefijos = {
+            self.MSG_UID: _rfid,
+            self.CMD_RFID_SCANNED: _rfid,
+            self.MSG_LOGIN: _login,
+            self.MSG_LINK: _link,
+            self.MSG_STATUS: _status
+        }
+        return exactos, prefijos
+    
+    @staticmethod
+    def dispatch(message: str, tables) -> bool:
+        """
+        Despachar un mensaje según las tablas de build_dispatch_table.
+        
+        Returns:
+            bool: True si el mensaje tenía handler
+        """
+        exactos, prefijos = tables
+        
+        handler = exactos.get(message)
+        if handler:
+            handler()
+            return True
+        
+        separador = message.find(':')
+        if separador >= 0:
+            handler = prefijos.get(message[:separador + 1])
+            if handler:
+                handler(message[separador + 1:])
+                return True
+        
+        logger.debug(f"Mensaje sin handler: {message}")
+        return False
+    
+    def run_loop(
+        self,
+        on_rfid: Callable[[str], None] = None,
+        on_login: Callable[[str], None] = None,
+        on_object_detected: Callable[[], None] = None,
+        on_ready: Callable[[], None] = None,
+        on_link: Callable[[str, str], None] = None,
+        metrics=None
     ):
         """
         Ejecutar loop principal de comunicación.
         
+        Un hilo lector bloquea en readline() y encola cada línea con su
+        instante de llegada; este loop las despacha en cuanto están
+        disponibles, sin sondeo ni pausas fijas.
+        
         Args:
             on_rfid: Callback cuando se detecta una tarjeta RFID
-            on_login: Callback cuando se ingresa ID por keypad (NUEVO)
+            on_login: Callback cuando se ingresa ID por keypad
             on_object_detected: Callback cuando se detecta un objeto
             on_ready: Callback cuando Arduino está listo
+            on_link: Callback para vincular una tarjeta nueva (uid, codigo)
+            metrics: PipelineMetrics donde registrar la latencia
+                     evento→callback (etapa 'serial_callback')
+        
+        Durante cada callback, last_received_at contiene el instante en que
+        el hilo lector leyó el mensaje.
         """
         logger.info("Iniciando loop de comunicación con Arduino")
         
+        tables = self.build_dispatch_table(
+            on_rfid=on_rfid,
+            on_login=on_login,
+            on_link=on_link,
+            on_object_detected=on_object_detected,
+            on_ready=on_ready
+        )
+        self.start_reader()
+        
         try:
-            while True:
-                message = self.read_line()
+            while self.reader_active or not self.messages.empty():
+                try:
+                    message, recibido_en = self.messages.get(timeout=0.5)
+                except queue.Empty:
+                    continue
                 
-                if message:
-                    # Detectar tipo de mensaje
-                    if message == self.CMD_READY:
-                        if on_ready:
-                            on_ready()
-                    
-                    elif message == self.CMD_OBJECT_DETECTED:
-                        if on_object_detected:
-                            on_object_detected()
-                    
-                    elif message.startswith(self.CMD_RFID_SCANNED):
-                        uid = self.parse_rfid(message)
-                        if uid and on_rfid:
-                            on_rfid(uid)
-                    
-                    # NUEVO: Soporte para LOGIN por keypad
-                    elif message.startswith("LOGIN:"):
-                        user_id = message[6:].strip()
-                        if user_id and on_login:
-                            on_login(user_id)
-                    
-                    # Soporte adicional para STATUS:CHECK
-                    elif message.startswith("STATUS:"):
-                        if "CHECK" in message and on_object_detected:
-                            on_object_detected()
+                latencia = time.perf_counter() - recibido_en
+                if metrics is not None:
+                    metrics.record('serial_callback', latencia)
+                logger.debug(f"Despachando '{message}' ({latencia * 1000:.2f} ms desde la lectura)")
                 
-                time.sleep(0.05)  # Pequeña pausa para no saturar CPU
+                self.last_received_at = recibido_en
+                try:
+                    self.dispatch(message, tables)
+                except Exception as e:
+                    logger.error(f"Error despachando '{message}': {e}")
+            
+            logger.warning("Hilo lector detenido, finalizando loop")
                 
         except KeyboardInterrupt:
             logger.info("Loop interrumpido por usuario")
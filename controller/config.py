@@ -5,6 +5,7 @@ Configuración del Controlador Eco-RVM
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from controller.preprocessing import parse_roi
 
 # Cargar variables de entorno
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,12 +19,28 @@ class ControllerConfig:
     SERIAL_PORT = os.getenv('SERIAL_PORT', 'COM5')
     SERIAL_BAUDRATE = int(os.getenv('SERIAL_BAUDRATE', 115200))
     SERIAL_TIMEOUT = int(os.getenv('SERIAL_TIMEOUT', 1))
+    ARDUINO_READY_TIMEOUT = float(os.getenv('ARDUINO_READY_TIMEOUT', 3.0))  # espera de SYSTEM:READY
     
     # Cámara
     CAMERA_ID = int(os.getenv('CAMERA_ID', 0))
     FRAME_WIDTH = 640
     FRAME_HEIGHT = 480
     
+    # Captura en segundo plano (buffer de frames recientes)
+    CAMERA_GRABBER = os.getenv('CAMERA_GRABBER', 'true').lower() == 'true'
+    FRAME_BUFFER_SIZE = int(os.getenv('FRAME_BUFFER_SIZE', 8))
+    CAPTURE_MODE = os.getenv('CAPTURE_MODE', 'latest')  # latest | sharpest
+    SHARPEST_WINDOW = float(os.getenv('SHARPEST_WINDOW', 0.15))  # segundos
+    
+    # Región de interés (cámara de depósito): "x,y,ancho,alto" en fracciones del frame
+    ROI = parse_roi(os.getenv('ROI', ''))
+    
+    # Clasificación en ráfaga (1 = un solo frame); regla: mean | majority | max
+    BURST_SIZE = int(os.getenv('BURST_SIZE', 1))
+    BURST_WINDOW = float(os.getenv('BURST_WINDOW', 0.25))  # segundos
+    BURST_VOTE = os.getenv('BURST_VOTE', 'mean')
+    BURST_EARLY_STOP = os.getenv('BURST_EARLY_STOP', 'true').lower() == 'true'
+    
     # API Backend
     API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:5000/api')
     API_TIMEOUT = 10  # segundos
@@ -32,9 +49,36 @@ class ControllerConfig:
     MODEL_PATH = BASE_DIR / os.getenv('MODEL_PATH', 'ml/models/modelo_reciclaje.h5')
     MIN_CONFIDENCE = float(os.getenv('MIN_CONFIDENCE', 0.70))
     
+    # Runtime de inferencia: auto (según extensión de MODEL_PATH), keras, savedmodel, tflite u onnx
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'auto')
+    INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', 0)) or None
+    
+    # El modelo se carga en segundo plano; espera máxima del primer depósito
+    MODEL_WAIT_TIMEOUT = float(os.getenv('MODEL_WAIT_TIMEOUT', 30))  # segundos
+    
+    # Arranque: tiempo máximo para backend, Arduino y cámara
+    STARTUP_TIMEOUT = float(os.getenv('STARTUP_TIMEOUT', 30))  # segundos
+    
     # Sistema de Puntos
     POINTS_PER_RECYCLE = int(os.getenv('POINTS_PER_RECYCLE', 10))
     
+    # Pipeline (colas acotadas entre etapas)
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 32))
+    API_QUEUE_SIZE = int(os.getenv('API_QUEUE_SIZE', 256))
+    METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', 60))
+    
+    # Outbox de depósitos (SQLite local + envío en lotes con backoff)
+    OUTBOX_PATH = BASE_DIR / os.getenv('OUTBOX_PATH', 'data/controller_outbox.db')
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+    OUTBOX_BASE_DELAY = float(os.getenv('OUTBOX_BASE_DELAY', 1.0))  # segundos
+    OUTBOX_MAX_DELAY = float(os.getenv('OUTBOX_MAX_DELAY', 300.0))  # segundos
+    
+    # Caché local de usuarios (login sin consultar al backend)
+    ROSTER_CAPACITY = int(os.getenv('ROSTER_CAPACITY', 5000))
+    ROSTER_TTL = float(os.getenv('ROSTER_TTL', 300))  # segundos
+    ROSTER_SYNC_INTERVAL = float(os.getenv('ROSTER_SYNC_INTERVAL', 30))  # segundos
+    ROSTER_SYNC_OVERLAP = float(os.getenv('ROSTER_SYNC_OVERLAP', 120))  # segundos releídos antes del cursor
+    
     # Capturas
     CAPTURES_DIR = BASE_DIR / 'capturas'
     CAPTURES_DIR.mkdir(exist_ok=True)
@@ -52,7 +96,11 @@ class ControllerConfig:
             'camera_id': cls.CAMERA_ID,
             'api_url': cls.API_BASE_URL,
             'model_path': str(cls.MODEL_PATH),
-            'min_confidence': cls.MIN_CONFIDENCE
+            'min_confidence': cls.MIN_CONFIDENCE,
+            'inference_backend': cls.INFERENCE_BACKEND,
+            'roi': cls.ROI,
+            'burst_size': cls.BURST_SIZE,
+            'burst_vote': cls.BURST_VOTE
         }
     
     @classmethod
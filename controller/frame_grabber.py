@@ -0,0 +1,185 @@
+"""
+Capturador de Frames en Segundo Plano
+Lee la cámara continuamente y conserva los últimos frames con su instante
+"""
+
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.grabber')
+
+
+class FrameGrabber:
+    """
+    Hilo que vacía el buffer del driver de la cámara (V4L2/DirectShow)
+    leyendo frames sin pausa y guardando los más recientes en un buffer
+    circular de (instante, frame).
+
+    Así, al detectar un objeto, el frame disponible es de hace unos pocos
+    milisegundos y no uno acumulado en la cola del driver.
+    """
+
+    def __init__(self, camera, buffer_size: int = 8):
+        """
+        Args:
+            camera: cv2.VideoCapture ya abierta
+            buffer_size: Número de frames a conservar
+        """
+        self.camera = camera
+        self._frames: deque = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.frames_leidos = 0
+
+    @property
+    def is_running(self) -> bool:
+        """Verificar si el hilo de captura está activo"""
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Iniciar el hilo de captura"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name='camara-captura', daemon=True)
+        self._thread.start()
+        logger.info("Captura de cámara en segundo plano iniciada")
+
+    def stop(self):
+        """Detener el hilo de captura"""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(2.0)
+            self._thread = None
+        logger.info(f"Captura de cámara detenida ({self.frames_leidos} frames leídos)")
+
+    def _loop(self):
+        errores = 0
+        while self._running:
+            ret, frame = self.camera.read()
+            instante = time.perf_counter()
+
+            if not ret:
+                errores += 1
+                if errores == 1 or errores % 100 == 0:
+                    logger.error(f"Error capturando frame ({errores} consecutivos)")
+                time.sleep(0.01)
+                continue
+
+            errores = 0
+            with self._cond:
+                self._frames.append((instante, frame))
+                self.frames_leidos += 1
+                self._cond.notify_all()
+
+        self._running = False
+
+    def latest(self) -> Optional[Tuple[float, np.ndarray]]:
+        """Último frame disponible como (instante, frame), o None"""
+        with self._cond:
+            return self._frames[-1] if self._frames else None
+
+    def frame_after(self, instante: float, timeout: float = 0.5) -> Optional[np.ndarray]:
+        """
+        Frame más reciente tomado en o después de `instante`.
+        Si aún no existe espera a lo sumo `timeout` (normalmente un período
+        de frame).
+
+        Returns:
+            np.ndarray o None: Frame, o None si no llegó ninguno a tiempo
+        """
+        limite = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                if self._frames and self._frames[-1][0] >= instante:
+                    return self._frames[-1][1]
+                restante = limite - time.perf_counter()
+                if restante <= 0 or not self._running:
+                    return None
+                self._cond.wait(restante)
+
+    def frames_after(
+        self,
+        instante: float,
+        cantidad: int,
+        hasta: float,
+        timeout: float = 0.5
+    ) -> List[Tuple[float, np.ndarray]]:
+        """
+        Hasta `cantidad` frames tomados después de `instante` (en orden),
+        esperando como máximo hasta el instante `hasta`. Los frames se
+        acumulan a medida que llegan, así que la ráfaga puede ser mayor que
+        el buffer circular.
+
+        Si al llegar a `hasta` no hay ninguno, espera a lo sumo `timeout`
+        por el siguiente.
+
+        Returns:
+            list: [(instante, frame), ...] (vacía si no llegó ninguno a tiempo)
+        """
+        rafaga = []
+        with self._cond:
+            while True:
+                ultimo = rafaga[-1][0] if rafaga else instante
+                rafaga.extend(item for item in self._frames if item[0] > ultimo)
+                if len(rafaga) >= cantidad:
+                    return rafaga[:cantidad]
+
+                restante = hasta - time.perf_counter()
+                if restante <= 0 or not self._running:
+                    break
+                self._cond.wait(restante)
+
+        if rafaga:
+            return rafaga
+
+        limite = time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                if self._frames and self._frames[-1][0] > instante:
+                    return [self._frames[-1]]
+                restante = limite - time.perf_counter()
+                if restante <= 0 or not self._running:
+                    return []
+                self._cond.wait(restante)
+
+    @staticmethod
+    def sharpness(frame: np.ndarray) -> float:
+        """Nitidez como varianza del Laplaciano (sobre una versión reducida en grises)"""
+        gris = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        reducido = cv2.resize(gris, (gris.shape[1] // 2, gris.shape[0] // 2))
+        return float(cv2.Laplacian(reducido, cv2.CV_64F).var())
+
+    def sharpest_after(
+        self,
+        instante: float,
+        ventana: float = 0.15,
+        timeout: float = 0.5
+    ) -> Optional[np.ndarray]:
+        """
+        Frame más nítido de los tomados en [instante, instante + ventana].
+        Útil cuando el objeto aún se mueve al caer en la bandeja.
+
+        Returns:
+            np.ndarray o None: Frame, o None si no llegó ninguno a tiempo
+        """
+        fin = instante + ventana
+        espera = fin - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+
+        with self._cond:
+            candidatos = [(t, f) for t, f in self._frames if instante <= t <= fin]
+
+        if not candidatos:
+            return self.frame_after(instante, timeout)
+
+        return max(candidatos, key=lambda item: self.sharpness(item[1]))[1]
@@ -0,0 +1,323 @@
+"""
+Backends de Inferencia - Keras, SavedModel, TFLite y ONNX Runtime
+Interfaz común para ejecutar el clasificador con el runtime más liviano disponible
+"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.inference')
+
+
+class InferenceBackend(ABC):
+    """
+    Interfaz de un backend de inferencia.
+
+    Cada backend carga el modelo una sola vez, reutiliza sus estructuras
+    (intérprete, tensores, sesión) entre llamadas y mide la latencia de
+    cada inferencia.
+    """
+
+    name = "base"
+
+    def __init__(self, model_path: Path, num_threads: int = None):
+        """
+        Args:
+            model_path: Ruta al modelo
+            num_threads: Hilos de cómputo (None = valor por defecto del runtime)
+        """
+        self.model_path = Path(model_path)
+        self.num_threads = num_threads or None
+        self.input_shape = None
+        self.load_seconds: Optional[float] = None
+        self._latencias = deque(maxlen=200)
+        self.inferencias = 0
+
+    def load(self):
+        """Cargar el modelo y medir el tiempo de carga"""
+        inicio = time.perf_counter()
+        self._load()
+        self.load_seconds = time.perf_counter() - inicio
+        logger.info(
+            f"Backend {self.name} cargado en {self.load_seconds:.2f}s "
+            f"(entrada {self.input_shape})"
+        )
+
+    @abstractmethod
+    def _load(self):
+        """Cargar el modelo en el runtime y fijar input_shape"""
+
+    @abstractmethod
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Ejecutar una inferencia sobre el lote ya preprocesado"""
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Ejecutar la inferencia.
+
+        Args:
+            batch: Tensor float32 (N, alto, ancho, 3) normalizado a [0, 1]
+
+        Returns:
+            np.ndarray: Salidas del modelo (N, clases)
+        """
+        inicio = time.perf_counter()
+        salida = self._run(batch)
+        self._latencias.append(time.perf_counter() - inicio)
+        self.inferencias += 1
+        return salida
+
+    def warmup(self, lotes=(1,)):
+        """
+        Ejecutar una inferencia vacía por tamaño de lote para inicializar
+        kernels y buffers.
+        """
+        if self.input_shape:
+            for lote in lotes:
+                forma = [lote] + [d or 1 for d in self.input_shape[1:]]
+                self._run(np.zeros(forma, dtype=np.float32))
+
+    @property
+    def last_latency_ms(self) -> Optional[float]:
+        """Latencia de la última inferencia en milisegundos"""
+        return self._latencias[-1] * 1000 if self._latencias else None
+
+    def latency_stats(self) -> Dict[str, float]:
+        """
+        Estadísticas de latencia de las últimas inferencias.
+
+        Returns:
+            dict: {n, media_ms, p95_ms, max_ms}
+        """
+        muestras = sorted(self._latencias)
+        if not muestras:
+            return {'n': 0}
+        p95 = muestras[min(len(muestras) - 1, int(len(muestras) * 0.95))]
+        return {
+            'n': self.inferencias,
+            'media_ms': round(sum(muestras) / len(muestras) * 1000, 2),
+            'p95_ms': round(p95 * 1000, 2),
+            'max_ms': round(muestras[-1] * 1000, 2)
+        }
+
+
+class KerasBackend(InferenceBackend):
+    """Modelo Keras (.h5 / .keras / SavedModel) con TensorFlow completo"""
+
+    name = "keras"
+
+    def _load(self):
+        import tensorflow as tf
+        tf.get_logger().setLevel('ERROR')
+
+        if self.num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(self.num_threads)
+
+        self.model = tf.keras.models.load_model(str(self.model_path))
+        self.input_shape = tuple(self.model.input_shape)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        # Llamada directa: evita el armado de tf.data que hace predict() por cada imagen
+        return np.asarray(self.model(batch, training=False))
+
+
+class SavedModelBackend(InferenceBackend):
+    """SavedModel de TensorFlow (firma serving_default)"""
+
+    name = "savedmodel"
+
+    def _load(self):
+        import tensorflow as tf
+        tf.get_logger().setLevel('ERROR')
+
+        if self.num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(self.num_threads)
+
+        self._tf = tf
+        self.model = tf.saved_model.load(str(self.model_path))
+        self._fn = self.model.signatures['serving_default']
+
+        nombre, spec = next(iter(self._fn.structured_input_signature[1].items()))
+        self._input_name = nombre
+        self.input_shape = tuple(spec.shape)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        salida = self._fn(**{self._input_name: self._tf.constant(batch, dtype=self._tf.float32)})
+        return np.asarray(next(iter(salida.values())))
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    Intérprete TFLite. Usa tflite_runtime si está instalado (sin importar
+    TensorFlow completo) y si no, tf.lite.
+
+    Se mantiene un intérprete con los tensores ya asignados por cada tamaño
+    de lote usado: la ráfaga con early stop alterna lotes de 1 y de N-1
+    frames y redimensionar un único intérprete reasignaría los tensores
+    dos veces por depósito.
+    """
+
+    name = "tflite"
+
+    def _load(self):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self._Interpreter = Interpreter
+        self._modelo = self.model_path.read_bytes()
+        self._interpretes: Dict[int, tuple] = {}
+
+        self.interpreter = Interpreter(model_content=self._modelo, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._input['shape'])
+        self._interpretes[int(self._input['shape'][0])] = (self.interpreter, self._input, self._output)
+
+    def _interprete(self, forma: tuple) -> tuple:
+        """(intérprete, entrada, salida) con los tensores asignados para `forma`"""
+        listo = self._interpretes.get(forma[0])
+        if listo is not None:
+            return listo
+
+        interprete = self._Interpreter(model_content=self._modelo, num_threads=self.num_threads)
+        indice = interprete.get_input_details()[0]['index']
+        interprete.resize_tensor_input(indice, list(forma))
+        interprete.allocate_tensors()
+        listo = (interprete, interprete.get_input_details()[0], interprete.get_output_details()[0])
+        self._interpretes[forma[0]] = listo
+        logger.debug(f"Intérprete TFLite preparado para lotes de {forma[0]}")
+        return listo
+
+    def _prepare_input(self, batch: np.ndarray) -> np.ndarray:
+        """Cuantizar la entrada si el modelo espera enteros"""
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+
+        escala, cero = self._input['quantization']
+        if escala:
+            batch = batch / escala + cero
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch), info.min, info.max).astype(dtype)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        interprete, entrada, salida_info = self._interprete(batch.shape)
+
+        interprete.set_tensor(entrada['index'], self._prepare_input(batch))
+        interprete.invoke()
+        salida = interprete.get_tensor(salida_info['index'])
+
+        escala, cero = salida_info['quantization']
+        if salida.dtype != np.float32 and escala:
+            salida = (salida.astype(np.float32) - cero) * escala
+        return salida
+
+
+class ONNXBackend(InferenceBackend):
+    """Modelo ONNX con ONNX Runtime (CPU)"""
+
+    name = "onnx"
+
+    def _load(self):
+        import onnxruntime as ort
+
+        opciones = ort.SessionOptions()
+        if self.num_threads:
+            opciones.intra_op_num_threads = self.num_threads
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            str(self.model_path),
+            sess_options=opciones,
+            providers=['CPUExecutionProvider']
+        )
+        entrada = self.session.get_inputs()[0]
+        self._input_name = entrada.name
+        self._output_names = [o.name for o in self.session.get_outputs()]
+        self.input_shape = tuple(d if isinstance(d, int) else None for d in entrada.shape)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(
+            self._output_names,
+            {self._input_name: batch.astype(np.float32, copy=False)}
+        )[0]
+
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    SavedModelBackend.name: SavedModelBackend,
+    TFLiteBackend.name: TFLiteBackend,
+    ONNXBackend.name: ONNXBackend
+}
+
+EXTENSIONES = {
+    '.h5': KerasBackend.name,
+    '.keras': KerasBackend.name,
+    '.tflite': TFLiteBackend.name,
+    '.onnx': ONNXBackend.name
+}
+
+
+def resolve_backend_name(model_path: Path, backend: str = 'auto') -> str:
+    """
+    Determinar el backend a usar.
+
+    Args:
+        model_path: Ruta al modelo
+        backend: 'auto' (según extensión), 'keras', 'savedmodel', 'tflite' u 'onnx'
+
+    Raises:
+        ValueError: Si el backend o la extensión no son reconocidos
+    """
+    backend = (backend or 'auto').lower()
+    if backend != 'auto':
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de inferencia desconocido: {backend}")
+        return backend
+
+    model_path = Path(model_path)
+    if model_path.is_dir():
+        if (model_path / 'saved_model.pb').exists():
+            return SavedModelBackend.name
+        return KerasBackend.name
+
+    nombre = EXTENSIONES.get(model_path.suffix.lower())
+    if nombre is None:
+        raise ValueError(f"No se reconoce el formato del modelo: {model_path.name}")
+    return nombre
+
+
+def create_backend(
+    model_path: Path,
+    backend: str = 'auto',
+    num_threads: int = None,
+    warmup: bool = True
+) -> InferenceBackend:
+    """
+    Crear y cargar el backend de inferencia para un modelo.
+
+    Args:
+        model_path: Ruta al modelo
+        backend: 'auto', 'keras', 'savedmodel', 'tflite' u 'onnx'
+        num_threads: Hilos de cómputo (None = por defecto)
+        warmup: Ejecutar una inferencia inicial
+
+    Returns:
+        InferenceBackend: Backend listo para predict()
+    """
+    clase = BACKENDS[resolve_backend_name(model_path, backend)]
+    instancia = clase(model_path, num_threads=num_threads)
+    instancia.load()
+    if warmup:
+        instancia.warmup()
+    return instancia
@@ -15,6 +15,13 @@ from controller.config import ControllerConfig
 from controller.arduino_handler import ArduinoHandler
 from controller.vision_system import VisionSystem
 from controller.api_client import APIClient
+from controller.outbox import DepositOutbox
+from controller.roster_cache import RosterCache
+from controller.startup import StartupOrchestrator
+from controller.pipeline import (
+    ControllerPipeline, DepositJob, PipelineEvent,
+    EVENT_RFID, EVENT_LOGIN, EVENT_LINK, EVENT_OBJECT, EVENT_READY
+)
 from backend.utils import setup_logger
 
 logger = setup_logger('eco_rvm.main')
@@ -33,76 +40,159 @@ class EcoRVMController:
         # Componentes
         self.arduino = ArduinoHandler(
             port=self.config.SERIAL_PORT,
-            baudrate=self.config.SERIAL_BAUDRATE
+            baudrate=self.config.SERIAL_BAUDRATE,
+            ready_timeout=self.config.ARDUINO_READY_TIMEOUT
         )
         
         self.vision = VisionSystem(
             camera_id=self.config.CAMERA_ID,
             model_path=str(self.config.MODEL_PATH),
             min_confidence=self.config.MIN_CONFIDENCE,
-            captures_dir=str(self.config.CAPTURES_DIR)
+            captures_dir=str(self.config.CAPTURES_DIR),
+            use_grabber=self.config.CAMERA_GRABBER,
+            buffer_size=self.config.FRAME_BUFFER_SIZE,
+            capture_mode=self.config.CAPTURE_MODE,
+            sharpest_window=self.config.SHARPEST_WINDOW,
+            inference_backend=self.config.INFERENCE_BACKEND,
+            inference_threads=self.config.INFERENCE_THREADS,
+            model_wait_timeout=self.config.MODEL_WAIT_TIMEOUT,
+            roi=self.config.ROI,
+            burst_size=self.config.BURST_SIZE,
+            burst_window=self.config.BURST_WINDOW,
+            burst_vote=self.config.BURST_VOTE,
+            burst_early_stop=self.config.BURST_EARLY_STOP
         )
         
         self.api = APIClient(
             base_url=self.config.API_BASE_URL
         )
         
-        # Estado del sistema
+        # Outbox durable: los depósitos se registran localmente y se envían en lotes
+        self.outbox = DepositOutbox(
+            path=str(self.config.OUTBOX_PATH),
+            api_client=self.api,
+            batch_size=self.config.OUTBOX_BATCH_SIZE,
+            base_delay=self.config.OUTBOX_BASE_DELAY,
+            max_delay=self.config.OUTBOX_MAX_DELAY,
+            on_registered=self.handle_points_registered
+        )
+        
+        # Arranque concurrente de componentes
+        self.startup = StartupOrchestrator()
+        
+        # Caché local de usuarios para el login por tarjeta o keypad
+        self.roster = RosterCache(
+            api_client=self.api,
+            capacity=self.config.ROSTER_CAPACITY,
+            ttl=self.config.ROSTER_TTL,
+            sync_interval=self.config.ROSTER_SYNC_INTERVAL,
+            overlap=self.config.ROSTER_SYNC_OVERLAP
+        )
+        
+        # Pipeline: el loop serial solo publica eventos
+        self.pipeline = ControllerPipeline(
+            handlers={
+                EVENT_RFID: lambda evento: self.handle_rfid(evento.dato),
+                EVENT_LOGIN: lambda evento: self.handle_login_keypad(evento.dato),
+                EVENT_LINK: lambda evento: self.handle_link(*evento.dato),
+                EVENT_OBJECT: self.handle_object_detected,
+                EVENT_READY: lambda evento: self.handle_ready()
+            },
+            deposit_handler=self.register_deposit,
+            on_event_dropped=self.handle_event_dropped,
+            event_queue_size=self.config.EVENT_QUEUE_SIZE,
+            api_queue_size=self.config.API_QUEUE_SIZE,
+            metrics_interval=self.config.METRICS_LOG_INTERVAL
+        )
+        
+        # Estado del sistema (solo lo modifica el worker de eventos)
         self.current_user = None
         self.running = False
     
     def initialize(self) -> bool:
         """
-        Inicializar todos los componentes.
+        Inicializar todos los componentes en paralelo.
+        
+        Backend, Arduino y cámara son críticos: el sistema queda listo en
+        cuanto los tres responden. El modelo de IA se carga (y precalienta)
+        en segundo plano; si llega un objeto antes de que termine, la
+        clasificación espera a que esté listo.
         
         Returns:
-            bool: True si todo se inicializó correctamente
+            bool: True si los componentes críticos se inicializaron
         """
         logger.info("=" * 60)
         logger.info("ECO-RVM - Inicializando Sistema")
         logger.info("=" * 60)
         
-        # Verificar backend
+        # La caché de usuarios se sincroniza mientras arranca el resto
+        self.roster.start()
+        
+        self.startup.add('backend', self._init_backend)
+        self.startup.add('arduino', self._init_arduino)
+        self.startup.add('camara', self._init_camera)
+        self.startup.add('modelo', self._init_model, critico=False)
+        
+        # Antes de lanzar los hilos: un depósito temprano espera al modelo
+        self.vision.begin_model_load()
+        self.startup.start()
+        
+        if not self.startup.wait_critical(self.config.STARTUP_TIMEOUT):
+            self.startup.log_summary()
+            return False
+        
+        logger.info("=" * 60)
+        logger.info(f"Sistema listo en {self.startup.elapsed():.2f}s")
+        self.startup.log_summary()
+        logger.info("=" * 60)
+        
+        return True
+    
+    def _init_backend(self) -> bool:
+        """Verificar conexión con el backend"""
         logger.info("Verificando conexión con backend...")
         if not self.api.health_check():
             logger.error("❌ No se puede conectar al backend")
             logger.error(f"   Asegúrate de que esté corriendo en {self.config.API_BASE_URL}")
             return False
         logger.info("✅ Backend conectado")
-        
-        # Conectar Arduino
+        return True
+    
+    def _init_arduino(self) -> bool:
+        """Conectar Arduino (espera SYSTEM:READY del firmware)"""
         logger.info(f"Conectando a Arduino en {self.config.SERIAL_PORT}...")
         if not self.arduino.connect():
             logger.error("❌ No se pudo conectar al Arduino")
             return False
         logger.info("✅ Arduino conectado")
-        
-        # Abrir cámara
+        return True
+    
+    def _init_camera(self) -> bool:
+        """Abrir cámara"""
         logger.info(f"Abriendo cámara {self.config.CAMERA_ID}...")
         if not self.vision.open_camera():
             logger.error("❌ No se pudo abrir la cámara")
             return False
         logger.info("✅ Cámara abierta")
-        
-        # Cargar modelo de IA (opcional para pruebas)
-        logger.info(f"Cargando modelo de IA...")
+        return True
+    
+    def _init_model(self) -> bool:
+        """Cargar y precalentar el modelo de IA (en segundo plano)"""
+        logger.info("Cargando modelo de IA en segundo plano...")
         if not self.vision.load_model():
             logger.warning("⚠️  Modelo de IA no disponible")
-            logger.warning("   Sistema funcionará en MODO SIMULACIÓN")
-            logger.warning("   Todos los objetos serán ACEPTADOS automáticamente")
-        else:
-            logger.info("✅ Modelo de IA cargado")
-        
-        logger.info("=" * 60)
-        logger.info("Sistema inicializado correctamente")
-        logger.info("=" * 60)
-        
+            logger.warning("   Todos los objetos serán RECHAZADOS")
+            return False
+        logger.info("✅ Modelo de IA cargado")
         return True
     
     def shutdown(self):
         """Apagar todos los componentes"""
         logger.info("Apagando sistema...")
         self.running = False
+        self.pipeline.stop()
+        self.outbox.stop()
+        self.roster.stop()
         self.arduino.disconnect()
         self.vision.close_camera()
         logger.info("Sistema apagado")
@@ -116,8 +206,12 @@ class EcoRVMController:
         """
         logger.info(f"Tarjeta RFID detectada: {uid}")
         
-        # Verificar usuario
-        user = self.api.check_user(uid)
+        # Verificar usuario (caché local; el backend solo ante un fallo de caché)
+        user = self.roster.get_by_uid(uid)
+        if user is None:
+            user = self.api.check_user(uid)
+            if user:
+                self.roster.put(user)
         
         if user:
             self.current_user = user
@@ -134,49 +228,94 @@ class EcoRVMController:
             # ✅ FIX: Enviar notificación al Arduino
             self.arduino.send_command("USER:NEW")
     
-    def handle_object_detected(self):
-        """Manejar detección de objeto en el sensor"""
+    def handle_object_detected(self, evento: PipelineEvent = None):
+        """
+        Manejar detección de objeto en el sensor.
+        
+        Envía el veredicto al Arduino en cuanto termina la clasificación;
+        el registro de puntos se encola para el worker de API.
+        """
         logger.info("Objeto detectado por sensor ultrasónico")
+        recibido_en = evento.recibido_en if evento else time.perf_counter()
         
         if not self.current_user:
             logger.warning("No hay usuario identificado")
             self.arduino.send_rejected()
             return
         
-        # Esperar un momento para que el objeto esté en posición
-        time.sleep(0.3)
-        
-        # Capturar y clasificar
-        clase, confianza, imagen_path = self.vision.capture_and_classify()
+        # Capturar (frames posteriores al aviso del sensor) y clasificar
+        inicio = time.perf_counter()
+        if self.vision.burst_size > 1:
+            clase, confianza, frame = self.vision.classify_burst(after=recibido_en)
+        else:
+            frame = self.vision.capture_frame(after=recibido_en)
+            if frame is None:
+                clase, confianza = VisionSystem.CLASE_RECHAZADO, 0.0
+            else:
+                clase, confianza = self.vision.classify(frame)
+        self.pipeline.metrics.record('vision', time.perf_counter() - inicio)
         
         logger.info(f"Clasificación: {clase} ({confianza:.2%})")
         
         if clase == VisionSystem.CLASE_ACEPTADO:
-            # Objeto aceptado - agregar puntos
-            result = self.api.add_points(
+            self.arduino.send_accepted()
+            self.pipeline.metrics.record('veredicto', time.perf_counter() - recibido_en)
+            
+            # Registrar en el backend fuera del camino del servo
+            self.pipeline.submit_deposit(DepositJob(
                 uid=self.current_user['uid_rfid'],
-                puntos=self.config.POINTS_PER_RECYCLE,
-                tipo_objeto='plastico_metal',
                 resultado_ia=clase,
                 confianza_ia=confianza,
-                imagen_path=imagen_path
-            )
-            
-            if result:
-                logger.info(f"✅ Puntos agregados. Nuevo total: {result['puntos_nuevos']}")
-                self.arduino.send_accepted()
-                
-                # Verificar badges nuevos
-                if result.get('badges_nuevos'):
-                    for badge in result['badges_nuevos']:
-                        logger.info(f"🏆 ¡Nuevo badge obtenido: {badge['nombre']}!")
-            else:
-                logger.error("Error agregando puntos")
-                self.arduino.send_rejected()
+                frame=frame,
+                recibido_en=recibido_en
+            ))
         else:
             # Objeto rechazado
             logger.info("❌ Objeto rechazado")
             self.arduino.send_rejected()
+            self.pipeline.metrics.record('veredicto', time.perf_counter() - recibido_en)
+            
+            if frame is not None:
+                self.vision.save_capture(frame, clase)
+    
+    def register_deposit(self, job: DepositJob):
+        """
+        Guardar la captura y registrar el depósito aceptado en el outbox
+        (se ejecuta en el worker de API). El envío al backend lo hace el
+        outbox en segundo plano, con reintentos si no hay conexión.
+        """
+        imagen_path = None
+        if job.frame is not None:
+            imagen_path = self.vision.save_capture(job.frame, job.resultado_ia)
+        
+        inicio = time.perf_counter()
+        self.outbox.enqueue(
+            uid=job.uid,
+            puntos=self.config.POINTS_PER_RECYCLE,
+            tipo_objeto='plastico_metal',
+            resultado_ia=job.resultado_ia,
+            confianza_ia=job.confianza_ia,
+            imagen_path=imagen_path,
+            fecha_hora=job.fecha_hora
+        )
+        self.pipeline.metrics.record('outbox', time.perf_counter() - inicio)
+        logger.info(f"Depósito de {job.uid} registrado en el outbox")
+    
+    def handle_points_registered(self, usuario: dict):
+        """Informar los puntos confirmados por el backend (hilo del outbox)"""
+        logger.info(
+            f"✅ Puntos agregados a {usuario['uid']} ({usuario['depositos']} depósitos). "
+            f"Nuevo total: {usuario['puntos_nuevos']}"
+        )
+        
+        # Verificar badges nuevos
+        for badge in usuario.get('badges_nuevos') or []:
+            logger.info(f"🏆 ¡Nuevo badge obtenido: {badge['nombre']}!")
+    
+    def handle_event_dropped(self, evento: PipelineEvent):
+        """Responder al Arduino si un objeto no pudo encolarse"""
+        if evento.tipo == EVENT_OBJECT:
+            self.arduino.send_rejected()
     
     def handle_login_keypad(self, codigo: str):
         """
@@ -187,8 +326,12 @@ class EcoRVMController:
         """
         logger.info(f"Login por keypad - Código: {codigo}")
         
-        # Buscar usuario por codigo_virtual
-        user = self.api.check_user_by_code(codigo)
+        # Buscar usuario por codigo_virtual (caché local primero)
+        user = self.roster.get_by_code(codigo)
+        if user is None:
+            user = self.api.check_user_by_code(codigo)
+            if user:
+                self.roster.put(user)
         
         if user:
             self.current_user = user
@@ -205,11 +348,37 @@ class EcoRVMController:
             # Enviar error al Arduino
             self.arduino.send_command("USER:ERROR")
     
+    def handle_link(self, uid: str, codigo: str):
+        """
+        Manejar vinculación de una tarjeta nueva con un código virtual.
+        
+        Args:
+            uid: UID de la tarjeta nueva
+            codigo: Código virtual ingresado por keypad
+        """
+        logger.info(f"Vinculación solicitada - Tarjeta: {uid}, Código: {codigo}")
+        
+        user = self.api.link_card(uid, codigo)
+        
+        if user:
+            self.roster.put(user)
+            self.current_user = user
+            logger.info(f"✅ Tarjeta vinculada a {user['nombre_completo']}")
+            self.arduino.send_command(f"USER:OK:{user['nombre'][:16]}")
+        else:
+            self.current_user = None
+            logger.warning(f"❌ No se pudo vincular la tarjeta {uid}")
+            self.arduino.send_command("USER:ERROR")
+    
     def handle_ready(self):
         """Manejar señal de Arduino listo"""
         logger.debug("Arduino listo para siguiente operación")
         self.current_user = None
     
+    def _publish(self, tipo: str, dato=None):
+        """Publicar un evento con el instante en que se leyó la línea serial"""
+        self.pipeline.publish(tipo, dato, self.arduino.last_received_at)
+    
     def run(self):
         """Ejecutar loop principal del controlador"""
         self.running = True
@@ -218,12 +387,18 @@ class EcoRVMController:
         logger.info("Esperando tarjetas RFID...")
         logger.info("Presiona Ctrl+C para detener")
         
+        self.pipeline.start()
+        self.outbox.start()
+        
         try:
+            # El loop serial solo publica eventos; el trabajo lo hacen los workers
             self.arduino.run_loop(
-                on_rfid=self.handle_rfid,
-                on_login=self.handle_login_keypad,  # NUEVO: Soporte para login por keypad
-                on_object_detected=self.handle_object_detected,
-                on_ready=self.handle_ready
+                on_rfid=lambda uid: self._publish(EVENT_RFID, uid),
+                on_login=lambda codigo: self._publish(EVENT_LOGIN, codigo),
+                on_object_detected=lambda: self._publish(EVENT_OBJECT),
+                on_ready=lambda: self._publish(EVENT_READY),
+                on_link=lambda uid, codigo: self._publish(EVENT_LINK, (uid, codigo)),
+                metrics=self.pipeline.metrics
             )
         except KeyboardInterrupt:
             logger.info("Interrupción de usuario")
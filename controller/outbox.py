@@ -0,0 +1,330 @@
+"""
+Outbox de Depósitos - Registro local durable con envío en segundo plano
+Worker de API → SQLite local (commit en microsegundos) → flusher →
+POST /add_points/batch con reintentos y backoff exponencial
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.outbox')
+
+
+# Estados de un depósito en el outbox
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_FALLIDO = 'fallido'
+
+# Tamaño máximo de lote que acepta el backend (BATCH_MAX_DEPOSITOS por defecto)
+LOTE_MAXIMO = 500
+
+# Errores de servidor (5xx) que tolera un depósito aislado antes de darlo por fallido
+MAX_ERRORES_SERVIDOR = 10
+
+
+class DepositOutbox:
+    """
+    Cola durable de depósitos pendientes de registrar en el backend.
+
+    `enqueue` solo escribe una fila en una base SQLite local (modo WAL), por
+    lo que un backend lento o caído no retrasa ni pierde depósitos. Un hilo
+    envía los pendientes en lotes a /add_points/batch; si el backend no
+    responde, espera con backoff exponencial (con jitter) y reintenta. Los
+    depósitos sobreviven a un reinicio del controlador y el backlog se
+    vacía cuando vuelve la conexión.
+
+    Cada depósito lleva un id_deposito único: si una respuesta se pierde y
+    el lote se reenvía, el backend no vuelve a sumar los puntos.
+
+    Los depósitos que el backend rechaza (p. ej. usuario inexistente) se
+    marcan como fallidos y se conservan para revisión en lugar de
+    reintentarse indefinidamente. Si el backend rechaza el lote completo
+    (error HTTP), el tamaño de lote se reduce a la mitad hasta aislar el
+    depósito problemático, de modo que no bloquee a los que vienen detrás;
+    tras un envío exitoso el tamaño vuelve a crecer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        api_client,
+        batch_size: int = 50,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        on_registered: Callable[[Dict], None] = None
+    ):
+        """
+        Args:
+            path: Archivo SQLite del outbox
+            api_client: APIClient con add_points_batch
+            batch_size: Depósitos por request (se limita a LOTE_MAXIMO)
+            base_delay: Espera inicial tras un fallo de envío (segundos)
+            max_delay: Espera máxima entre reintentos (segundos)
+            on_registered: Llamada con el resumen de cada usuario actualizado
+        """
+        self.path = Path(path)
+        self.api = api_client
+        self.batch_size = max(1, min(batch_size, LOTE_MAXIMO))
+        if self.batch_size != batch_size:
+            logger.warning(f"Tamaño de lote del outbox ajustado de {batch_size} a {self.batch_size}")
+        self._limite = self.batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_registered = on_registered
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS depositos ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' id_deposito TEXT NOT NULL UNIQUE,'
+            ' payload TEXT NOT NULL,'
+            ' estado TEXT NOT NULL DEFAULT \'pendiente\','
+            ' intentos INTEGER NOT NULL DEFAULT 0,'
+            ' error TEXT,'
+            ' creado_en REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_depositos_estado ON depositos (estado, id)')
+        self._lock = threading.Lock()
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        self._errores_servidor: Dict[int, int] = {}
+
+    def enqueue(
+        self,
+        uid: str,
+        puntos: int,
+        tipo_objeto: str,
+        resultado_ia: str = None,
+        confianza_ia: float = None,
+        imagen_path: str = None,
+        fecha_hora: datetime = None
+    ) -> str:
+        """
+        Guardar un depósito de forma durable (no hace I/O de red).
+
+        Args:
+            fecha_hora: Instante UTC del depósito (default: ahora); se pasa
+                        el del veredicto para que una cola de API atrasada
+                        no corra la fecha registrada
+
+        Returns:
+            str: id_deposito asignado
+        """
+        id_deposito = str(uuid.uuid4())
+        payload = {
+            'id_deposito': id_deposito,
+            'uid': uid,
+            'puntos': puntos,
+            'tipo_objeto': tipo_objeto,
+            'resultado_ia': resultado_ia,
+            'confianza_ia': confianza_ia,
+            'imagen_path': imagen_path,
+            # Hora real del depósito, aunque se envíe tras una desconexión
+            'fecha_hora': (fecha_hora or datetime.utcnow()).isoformat()
+        }
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO depositos (id_deposito, payload, creado_en) VALUES (?, ?, ?)',
+                (id_deposito, json.dumps(payload), time.time())
+            )
+        self._wake.set()
+        return id_deposito
+
+    def start(self):
+        """Iniciar el hilo de envío"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='outbox-flusher', daemon=True)
+        self._thread.start()
+
+        pendientes = self.pending()
+        if pendientes:
+            logger.info(f"Outbox iniciado con {pendientes} depósitos pendientes")
+        else:
+            logger.info("Outbox iniciado")
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Detener el hilo de envío. Lo que no se envió queda en disco y se
+        retoma en el próximo arranque.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+        pendientes = self.pending()
+        if pendientes:
+            logger.warning(f"Outbox detenido con {pendientes} depósitos pendientes")
+        with self._lock:
+            self._conn.close()
+
+    def pending(self) -> int:
+        """Depósitos pendientes de envío"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM depositos WHERE estado = ?', (ESTADO_PENDIENTE,)
+            ).fetchone()[0]
+
+    def failed(self) -> int:
+        """Depósitos rechazados por el backend"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM depositos WHERE estado = ?', (ESTADO_FALLIDO,)
+            ).fetchone()[0]
+
+    def flush_once(self) -> Optional[int]:
+        """
+        Enviar un lote de pendientes.
+
+        Returns:
+            int o None: Depósitos resueltos (registrados o rechazados), o
+            None si el backend no respondió
+        """
+        with self._lock:
+            filas = self._conn.execute(
+                'SELECT id, payload FROM depositos WHERE estado = ? ORDER BY id LIMIT ?',
+                (ESTADO_PENDIENTE, self._limite)
+            ).fetchall()
+        if not filas:
+            return 0
+
+        result = self.api.add_points_batch([json.loads(payload) for _, payload in filas])
+        if result is None:
+            self._sumar_intentos(filas)
+            return None
+
+        if not result.get('exito'):
+            return self._lote_rechazado(filas, result)
+
+        # Lote aceptado: recuperar el tamaño de lote tras una reducción
+        self._limite = min(self.batch_size, self._limite * 2)
+
+        registrados: List[tuple] = []
+        rechazados: List[tuple] = []
+        for r in result.get('resultados', []):
+            id_fila = filas[r['indice']][0]
+            if r.get('exito'):
+                registrados.append((id_fila,))
+                self._errores_servidor.pop(id_fila, None)
+            else:
+                rechazados.append((ESTADO_FALLIDO, r.get('error'), id_fila))
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany('DELETE FROM depositos WHERE id = ?', registrados)
+            self._conn.executemany(
+                'UPDATE depositos SET estado = ?, error = ?, intentos = intentos + 1 WHERE id = ?',
+                rechazados
+            )
+            self._conn.execute('COMMIT')
+
+        for r in rechazados:
+            logger.error(f"Depósito rechazado por el backend: {r[1]}")
+        if self.on_registered:
+            for usuario in result.get('usuarios', []):
+                self.on_registered(usuario)
+
+        return len(registrados) + len(rechazados)
+
+    def _sumar_intentos(self, filas: list):
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE depositos SET intentos = intentos + 1 WHERE id = ?',
+                [(fila[0],) for fila in filas]
+            )
+
+    def _lote_rechazado(self, filas: list, result: Dict) -> Optional[int]:
+        """
+        El backend respondió con un error HTTP para el lote completo.
+
+        Un lote de varios depósitos se reintenta a la mitad de tamaño para
+        aislar el que provoca el error. Un depósito aislado se marca como
+        fallido si el error es del cliente (4xx), o tras
+        MAX_ERRORES_SERVIDOR errores de servidor (5xx) seguidos estando
+        aislado (las caídas de conexión no cuentan).
+
+        Returns:
+            int o None: Depósitos resueltos, o None si hay que esperar
+            (backoff) antes de reintentar
+        """
+        status = result.get('status') or 0
+        error = f"HTTP {status}: {result.get('error', '')}"
+        # 408/429 son transitorios: se tratan como errores de servidor
+        es_del_cliente = 400 <= status < 500 and status not in (408, 429)
+
+        if len(filas) > 1:
+            self._limite = max(1, len(filas) // 2)
+            logger.warning(f"Lote de {len(filas)} depósitos rechazado ({error}); "
+                           f"reintentando en lotes de {self._limite}")
+            if es_del_cliente:
+                return 0
+            self._sumar_intentos(filas)
+            return None
+
+        id_fila = filas[0][0]
+        if not es_del_cliente:
+            errores = self._errores_servidor.get(id_fila, 0) + 1
+            if errores < MAX_ERRORES_SERVIDOR:
+                self._errores_servidor[id_fila] = errores
+                self._sumar_intentos(filas)
+                return None
+        self._errores_servidor.pop(id_fila, None)
+
+        with self._lock:
+            self._conn.execute(
+                'UPDATE depositos SET estado = ?, error = ?, intentos = intentos + 1 WHERE id = ?',
+                (ESTADO_FALLIDO, error, id_fila)
+            )
+        logger.error(f"Depósito rechazado por el backend: {error}")
+        return 1
+
+    def _backoff(self) -> float:
+        """Espera exponencial (con jitter) según los fallos seguidos"""
+        techo = min(self.max_delay, self.base_delay * (2 ** min(self._failures - 1, 16)))
+        return random.uniform(techo / 2, techo)
+
+    def _run(self):
+        """Enviar pendientes hasta que se pida detener"""
+        while not self._stop.is_set():
+            # Limpiar antes de enviar: un enqueue durante el envío no se pierde
+            self._wake.clear()
+            try:
+                enviados = self.flush_once()
+            except Exception as e:
+                logger.error(f"Error en el outbox: {e}")
+                enviados = None
+
+            if enviados is None:
+                self._failures += 1
+                espera = self._backoff()
+                logger.warning(
+                    f"Backend no disponible ({self._failures} fallos seguidos), "
+                    f"reintento en {espera:.1f}s"
+                )
+                self._stop.wait(espera)
+                continue
+
+            if self._failures:
+                logger.info("Conexión con el backend restablecida")
+                self._failures = 0
+
+            if not self.pending():
+                # Sin backlog: esperar al próximo depósito
+                self._wake.wait(timeout=30.0)
@@ -0,0 +1,285 @@
+"""
+Pipeline del Controlador - Etapas desacopladas con colas acotadas
+Lector serial → cola de eventos → worker de eventos (login / visión)
+→ cola de API → worker de API
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.pipeline')
+
+
+# Tipos de evento publicados por el lector serial
+EVENT_RFID = 'rfid'
+EVENT_LOGIN = 'login'
+EVENT_LINK = 'link'
+EVENT_OBJECT = 'objeto'
+EVENT_READY = 'ready'
+
+
+@dataclass
+class PipelineEvent:
+    """Evento recibido del Arduino, con su instante de llegada"""
+    tipo: str
+    dato: Any = None
+    recibido_en: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class DepositJob:
+    """Depósito aceptado pendiente de registrar en el backend"""
+    uid: str
+    resultado_ia: str
+    confianza_ia: float
+    frame: Any = None
+    fecha_hora: datetime = field(default_factory=datetime.utcnow)
+    recibido_en: float = field(default_factory=time.perf_counter)
+    encolado_en: float = field(default_factory=time.perf_counter)
+
+
+class PipelineMetrics:
+    """
+    Latencias por etapa y depósitos por minuto, seguras entre hilos.
+    Se conservan las últimas `ventana` muestras de cada etapa.
+    """
+
+    def __init__(self, ventana: int = 200):
+        self._ventana = ventana
+        self._muestras: Dict[str, deque] = {}
+        self._totales: Dict[str, int] = {}
+        self._depositos: deque = deque()
+        self._lock = threading.Lock()
+
+    def record(self, etapa: str, segundos: float):
+        """Registrar la duración de una etapa"""
+        with self._lock:
+            muestras = self._muestras.get(etapa)
+            if muestras is None:
+                muestras = self._muestras[etapa] = deque(maxlen=self._ventana)
+            muestras.append(segundos)
+            self._totales[etapa] = self._totales.get(etapa, 0) + 1
+
+    def record_deposit(self):
+        """Registrar un depósito procesado"""
+        with self._lock:
+            self._depositos.append(time.monotonic())
+
+    def deposits_per_minute(self) -> int:
+        """Depósitos procesados en los últimos 60 segundos"""
+        limite = time.monotonic() - 60
+        with self._lock:
+            while self._depositos and self._depositos[0] < limite:
+                self._depositos.popleft()
+            return len(self._depositos)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Resumen por etapa en milisegundos.
+
+        Returns:
+            dict: {etapa: {n, media_ms, p95_ms, max_ms}}
+        """
+        with self._lock:
+            copia = {etapa: sorted(m) for etapa, m in self._muestras.items()}
+            totales = dict(self._totales)
+
+        resumen = {}
+        for etapa, muestras in copia.items():
+            if not muestras:
+                continue
+            p95 = muestras[min(len(muestras) - 1, int(len(muestras) * 0.95))]
+            resumen[etapa] = {
+                'n': totales[etapa],
+                'media_ms': round(sum(muestras) / len(muestras) * 1000, 1),
+                'p95_ms': round(p95 * 1000, 1),
+                'max_ms': round(muestras[-1] * 1000, 1)
+            }
+        return resumen
+
+    def log_summary(self):
+        """Escribir el resumen en el log"""
+        for etapa, datos in self.summary().items():
+            logger.info(
+                f"[métricas] {etapa}: n={datos['n']} media={datos['media_ms']}ms "
+                f"p95={datos['p95_ms']}ms max={datos['max_ms']}ms"
+            )
+        logger.info(f"[métricas] depósitos/min: {self.deposits_per_minute()}")
+
+
+class ControllerPipeline:
+    """
+    Desacopla la lectura serial del trabajo lento.
+
+    El lector serial solo publica eventos. Un worker procesa los eventos en
+    orden (login, detección de objeto) y envía el veredicto al Arduino en
+    cuanto la clasificación termina; el registro en el backend (guardar la
+    captura y llamar a la API) se delega a un segundo worker, de modo que
+    ni la red ni el disco retrasan la respuesta del servo ni la lectura
+    del siguiente evento.
+    """
+
+    _FIN = object()
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[[PipelineEvent], None]],
+        deposit_handler: Callable[[DepositJob], None],
+        on_event_dropped: Callable[[PipelineEvent], None] = None,
+        event_queue_size: int = 32,
+        api_queue_size: int = 256,
+        metrics_interval: float = 60.0
+    ):
+        """
+        Args:
+            handlers: Función por tipo de evento (se ejecutan en el worker de eventos)
+            deposit_handler: Registra un depósito (se ejecuta en el worker de API)
+            on_event_dropped: Llamada si un evento se descarta por cola llena
+            event_queue_size: Capacidad de la cola de eventos
+            api_queue_size: Capacidad de la cola de depósitos
+            metrics_interval: Segundos entre resúmenes de métricas en el log
+        """
+        self.handlers = handlers
+        self.deposit_handler = deposit_handler
+        self.on_event_dropped = on_event_dropped
+        self.metrics = PipelineMetrics()
+        self.metrics_interval = metrics_interval
+
+        self._events: queue.Queue = queue.Queue(maxsize=event_queue_size)
+        self._deposits: queue.Queue = queue.Queue(maxsize=api_queue_size)
+        self._threads = []
+        self._running = False
+        self._last_metrics_log = time.monotonic()
+
+    def start(self):
+        """Iniciar los workers"""
+        if self._running:
+            return
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._event_worker, name='pipeline-eventos', daemon=True),
+            threading.Thread(target=self._api_worker, name='pipeline-api', daemon=True)
+        ]
+        for hilo in self._threads:
+            hilo.start()
+        logger.info("Pipeline del controlador iniciado")
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Detener los workers, procesando antes lo que ya está en cola.
+
+        Args:
+            timeout: Tiempo máximo de espera por worker
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._events.put(self._FIN)
+        self._threads[0].join(timeout)
+        self._deposits.put(self._FIN)
+        self._threads[1].join(timeout)
+
+        pendientes = self._deposits.qsize()
+        if pendientes:
+            logger.warning(f"Pipeline detenido con {pendientes} depósitos sin registrar")
+        self.metrics.log_summary()
+        logger.info("Pipeline del controlador detenido")
+
+    def publish(self, tipo: str, dato: Any = None, recibido_en: float = None) -> bool:
+        """
+        Publicar un evento desde el lector serial (no bloquea).
+
+        Args:
+            tipo: Tipo de evento
+            dato: Contenido del evento
+            recibido_en: Instante (perf_counter) en que se leyó la línea
+                         serial; por defecto, el de la publicación
+
+        Returns:
+            bool: False si la cola estaba llena y el evento se descartó
+        """
+        if recibido_en is None:
+            recibido_en = time.perf_counter()
+        evento = PipelineEvent(tipo, dato, recibido_en)
+        try:
+            self._events.put_nowait(evento)
+            return True
+        except queue.Full:
+            logger.warning(f"Cola de eventos llena, evento descartado: {tipo}")
+            if self.on_event_dropped:
+                self.on_event_dropped(evento)
+            return False
+
+    def submit_deposit(self, job: DepositJob):
+        """
+        Encolar un depósito aceptado para registrarlo en el backend.
+
+        El servo ya aceptó el objeto, así que el depósito no se descarta: si
+        la cola está llena se espera a que el worker de API libere espacio.
+        """
+        job.encolado_en = time.perf_counter()
+        try:
+            self._deposits.put(job, timeout=1.0)
+        except queue.Full:
+            logger.warning(f"Cola de API llena, esperando para encolar el depósito de {job.uid}")
+            self._deposits.put(job)
+
+    def _event_worker(self):
+        """Procesar eventos en orden de llegada"""
+        while True:
+            evento = self._events.get()
+            if evento is self._FIN:
+                break
+
+            self.metrics.record('cola_eventos', time.perf_counter() - evento.recibido_en)
+            handler = self.handlers.get(evento.tipo)
+            if handler is None:
+                logger.debug(f"Evento sin handler: {evento.tipo}")
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                handler(evento)
+            except Exception as e:
+                logger.error(f"Error procesando evento {evento.tipo}: {e}")
+            self.metrics.record(f'evento_{evento.tipo}', time.perf_counter() - inicio)
+
+    def _api_worker(self):
+        """Registrar depósitos en el backend"""
+        while True:
+            job = self._deposits.get()
+            if job is self._FIN:
+                break
+
+            self.metrics.record('cola_api', time.perf_counter() - job.encolado_en)
+            inicio = time.perf_counter()
+            try:
+                self.deposit_handler(job)
+            except Exception as e:
+                logger.error(f"Error registrando depósito de {job.uid}: {e}")
+
+            ahora = time.perf_counter()
+            self.metrics.record('api', ahora - inicio)
+            self.metrics.record('deposito_total', ahora - job.recibido_en)
+            self.metrics.record_deposit()
+            self._maybe_log_metrics()
+
+    def _maybe_log_metrics(self):
+        ahora = time.monotonic()
+        if ahora - self._last_metrics_log >= self.metrics_interval:
+            self._last_metrics_log = ahora
+            self.metrics.log_summary()
+
+    @property
+    def pending(self) -> Dict[str, int]:
+        """Elementos en cada cola"""
+        return {
+            'eventos': self._events.qsize(),
+            'api': self._deposits.qsize()
+        }
@@ -0,0 +1,109 @@
+"""
+Preprocesado de Frames - Sin asignaciones por frame
+Recorte de la región de interés (vista), resize a un buffer fijo y
+BGR→RGB + normalización en un único paso vectorizado
+"""
+
+from typing import Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+
+def parse_roi(texto: str) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Interpretar una región de interés "x,y,ancho,alto" en fracciones del
+    frame (0-1). Vacío = frame completo.
+
+    Raises:
+        ValueError: Si el formato o los valores no son válidos
+    """
+    if not texto or not texto.strip():
+        return None
+
+    partes = [float(p) for p in texto.split(',')]
+    if len(partes) != 4:
+        raise ValueError(f"ROI debe tener 4 valores x,y,ancho,alto: {texto}")
+
+    x, y, ancho, alto = partes
+    if min(partes) < 0 or ancho <= 0 or alto <= 0 or x + ancho > 1 or y + alto > 1:
+        raise ValueError(f"ROI fuera del frame (fracciones 0-1): {texto}")
+    return x, y, ancho, alto
+
+
+class FramePreprocessor:
+    """
+    Convierte frames BGR de la cámara en el tensor de entrada del modelo
+    reutilizando buffers preasignados.
+
+    Por frame solo se crea una vista del recorte (sin copia); el resize
+    escribe en un buffer uint8 fijo y la inversión de canales (vista con
+    paso negativo) se combina con la división por 255 en una sola pasada
+    que escribe directamente en el lote float32.
+
+    El array retornado es una vista del buffer interno: su contenido se
+    sobrescribe en la siguiente llamada, por lo que debe consumirse (o
+    copiarse) antes.
+    """
+
+    def __init__(
+        self,
+        input_size: Tuple[int, int] = (224, 224),
+        roi: Optional[Tuple[float, float, float, float]] = None,
+        max_batch: int = 1
+    ):
+        """
+        Args:
+            input_size: (alto, ancho) de entrada del modelo
+            roi: Región de interés (x, y, ancho, alto) en fracciones del frame
+            max_batch: Capacidad inicial del lote (crece si hace falta)
+        """
+        self.input_size = tuple(input_size)
+        self.roi = roi
+
+        alto, ancho = self.input_size
+        self._resized = np.empty((alto, ancho, 3), dtype=np.uint8)
+        self._batch = np.empty((max_batch, alto, ancho, 3), dtype=np.float32)
+        self._escala = np.float32(255.0)
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """Vista de la región de interés del frame (sin copia)"""
+        if self.roi is None:
+            return frame
+
+        alto, ancho = frame.shape[:2]
+        x, y, w, h = self.roi
+        x0, y0 = int(round(x * ancho)), int(round(y * alto))
+        x1, y1 = int(round((x + w) * ancho)), int(round((y + h) * alto))
+        return frame[y0:max(y1, y0 + 1), x0:max(x1, x0 + 1)]
+
+    def _into(self, frame: np.ndarray, destino: np.ndarray):
+        """Recortar, redimensionar y normalizar un frame en `destino`"""
+        alto, ancho = self.input_size
+        cv2.resize(self.crop(frame), (ancho, alto), dst=self._resized)
+
+        # BGR→RGB (vista) y normalización a [0, 1] en un solo paso
+        np.divide(self._resized[..., ::-1], self._escala, out=destino, dtype=np.float32)
+
+    def process(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Preprocesar un frame.
+
+        Returns:
+            np.ndarray: Vista (1, alto, ancho, 3) float32 del buffer interno
+        """
+        self._into(frame, self._batch[0])
+        return self._batch[:1]
+
+    def process_batch(self, frames: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Preprocesar varios frames en un único lote.
+
+        Returns:
+            np.ndarray: Vista (N, alto, ancho, 3) float32 del buffer interno
+        """
+        if len(frames) > len(self._batch):
+            self._batch = np.empty((len(frames),) + self._batch.shape[1:], dtype=np.float32)
+
+        for i, frame in enumerate(frames):
+            self._into(frame, self._batch[i])
+        return self._batch[:len(frames)]
@@ -0,0 +1,219 @@
+"""
+Caché Local de Usuarios - Login por RFID/keypad sin ida y vuelta al backend
+LRU con TTL indexada por uid_rfid y codigo_virtual, mantenida al día con
+sincronización incremental (GET /usuarios/cambios)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.roster_cache')
+
+
+class RosterCache:
+    """
+    Caché de usuarios del controlador.
+
+    Las lecturas de tarjeta y los códigos de keypad se resuelven en memoria;
+    el backend solo se consulta ante un fallo de caché o una entrada vencida.
+    Un hilo trae periódicamente los usuarios modificados desde la última
+    sincronización (altas, cambios de puntos, tarjetas vinculadas y bajas).
+
+    Una entrada se considera vigente durante `ttl` segundos desde que se
+    recibió del backend (por login o por sincronización) o desde el inicio
+    de la última sincronización completa, lo que sea más reciente: si el
+    delta no trajo al usuario, es que no cambió. Cada sincronización relee los cambios de los últimos `overlap` segundos
+    previos al cursor, porque un cambio confirmado tarde puede tener una
+    fecha_actualizacion anterior; las versiones ya conocidas se descartan.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        capacity: int = 5000,
+        ttl: float = 300.0,
+        sync_interval: float = 30.0,
+        page_size: int = 500,
+        overlap: float = 120.0
+    ):
+        """
+        Args:
+            api_client: APIClient con get_user_changes
+            capacity: Máximo de usuarios en memoria (se descartan los menos usados)
+            ttl: Segundos de validez de una entrada sin sincronizar
+            sync_interval: Segundos entre sincronizaciones incrementales
+            page_size: Usuarios por request de sincronización
+            overlap: Segundos a releer antes del cursor en cada sincronización
+        """
+        self.api = api_client
+        self.capacity = capacity
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.page_size = page_size
+        self.overlap = overlap
+
+        self._users: 'OrderedDict[int, tuple]' = OrderedDict()  # id -> (usuario, cargado_en)
+        self._by_uid: Dict[str, int] = {}
+        self._by_code: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._cursor: Optional[str] = None
+        self._ultimo_sync_ok: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+    # ==================== Consultas ====================
+
+    def get_by_uid(self, uid: str) -> Optional[Dict]:
+        """Usuario vigente con ese UID de RFID, o None"""
+        return self._get(self._by_uid, uid.upper().strip())
+
+    def get_by_code(self, codigo: str) -> Optional[Dict]:
+        """Usuario vigente con ese código virtual, o None"""
+        return self._get(self._by_code, codigo.upper().strip())
+
+    def _get(self, indice: Dict[str, int], clave: str) -> Optional[Dict]:
+        ahora = time.monotonic()
+        with self._lock:
+            usuario_id = indice.get(clave)
+            entrada = self._users.get(usuario_id) if usuario_id is not None else None
+            if entrada is None or ahora - max(entrada[1], self._ultimo_sync_ok or 0.0) > self.ttl:
+                self.misses += 1
+                return None
+            self._users.move_to_end(usuario_id)
+            self.hits += 1
+            return entrada[0]
+
+    # ==================== Actualización ====================
+
+    def put(self, usuario: Dict):
+        """Guardar o reemplazar un usuario (los inactivos se descartan)"""
+        with self._lock:
+            self._put(usuario, time.monotonic())
+
+    def _put(self, usuario: Dict, ahora: float) -> bool:
+        """
+        Aplicar una versión del usuario.
+
+        Una versión con la misma fecha_actualizacion que la guardada es la
+        misma (relectura de la ventana): solo renueva su instante de
+        recepción. Una fecha distinta, incluso anterior (cambio confirmado
+        tarde), reemplaza la entrada.
+
+        Returns:
+            bool: False si ya se tenía esa versión
+        """
+        entrada = self._users.get(usuario['id'])
+        if entrada is not None and usuario.get('fecha_actualizacion') and \
+                entrada[0].get('fecha_actualizacion') == usuario['fecha_actualizacion']:
+            self._users[usuario['id']] = (entrada[0], max(entrada[1], ahora))
+            return False
+
+        self._discard(usuario['id'])
+        if not usuario.get('activo', True):
+            return True
+
+        self._users[usuario['id']] = (usuario, ahora)
+        if usuario.get('uid_rfid'):
+            self._by_uid[usuario['uid_rfid'].upper()] = usuario['id']
+        if usuario.get('codigo_virtual'):
+            self._by_code[usuario['codigo_virtual'].upper()] = usuario['id']
+
+        while len(self._users) > self.capacity:
+            self._discard(next(iter(self._users)))
+        return True
+
+    def _discard(self, usuario_id: int):
+        entrada = self._users.pop(usuario_id, None)
+        if entrada is None:
+            return
+        usuario = entrada[0]
+        for indice, campo in ((self._by_uid, 'uid_rfid'), (self._by_code, 'codigo_virtual')):
+            clave = (usuario.get(campo) or '').upper()
+            # La clave puede haber pasado a otro usuario (tarjeta revinculada)
+            if indice.get(clave) == usuario_id:
+                del indice[clave]
+
+    def sync(self) -> Optional[int]:
+        """
+        Traer los usuarios modificados desde la última sincronización.
+
+        Returns:
+            int o None: Usuarios actualizados, o None si el backend no respondió
+        """
+        inicio = time.monotonic()
+        actualizados = 0
+
+        # Solo la primera página relee la ventana previa al cursor
+        margen = self.overlap if self._cursor else 0
+        while True:
+            result = self.api.get_user_changes(self._cursor, self.page_size, margen)
+            if result is None:
+                return None
+
+            with self._lock:
+                for usuario in result['usuarios']:
+                    actualizados += self._put(usuario, inicio)
+            self._cursor = result['cursor']
+            margen = 0
+
+            if not result.get('hay_mas'):
+                break
+
+        # Todas las páginas aplicadas: lo que no llegó sigue vigente
+        with self._lock:
+            self._ultimo_sync_ok = inicio
+        return actualizados
+
+    # ==================== Hilo de sincronización ====================
+
+    def start(self):
+        """Iniciar la sincronización periódica (la primera carga es inmediata)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='roster-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detener la sincronización"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(
+            f"Caché de usuarios: {len(self)} en memoria, "
+            f"{self.hits} aciertos, {self.misses} fallos"
+        )
+
+    def _run(self):
+        """Sincronizar hasta que se pida detener"""
+        primera = True
+        while not self._stop.is_set():
+            inicio = time.perf_counter()
+            try:
+                actualizados = self.sync()
+            except Exception as e:
+                logger.error(f"Error sincronizando usuarios: {e}")
+                actualizados = None
+
+            if actualizados is None:
+                logger.warning("No se pudo sincronizar la caché de usuarios")
+            elif primera or actualizados:
+                logger.info(
+                    f"Caché de usuarios sincronizada: {actualizados} cambios en "
+                    f"{(time.perf_counter() - inicio) * 1000:.0f}ms ({len(self)} en memoria)"
+                )
+                primera = False
+
+            self._stop.wait(self.sync_interval)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._users)
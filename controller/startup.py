@@ -0,0 +1,132 @@
+"""
+Orquestador de Arranque - Inicialización concurrente de componentes
+Cada componente (backend, Arduino, cámara, modelo) se inicializa en su propio
+hilo; el sistema queda listo cuando terminan los críticos
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+from backend.utils import setup_logger
+
+logger = setup_logger('eco_rvm.startup')
+
+
+@dataclass
+class StartupStep:
+    """Paso de arranque con su resultado y duración"""
+    nombre: str
+    funcion: Callable[[], bool]
+    critico: bool = True
+    exito: Optional[bool] = None
+    duracion: Optional[float] = None
+    hecho: threading.Event = field(default_factory=threading.Event)
+
+
+class StartupOrchestrator:
+    """
+    Ejecuta los pasos de arranque en paralelo y registra cuánto tarda cada
+    uno.
+
+    `wait_critical` retorna en cuanto terminan todos los pasos críticos (o
+    apenas uno falla); los no críticos, como la carga del modelo, siguen
+    ejecutándose en segundo plano.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, StartupStep] = {}
+        self._condition = threading.Condition()
+        self._inicio: Optional[float] = None
+
+    def add(self, nombre: str, funcion: Callable[[], bool], critico: bool = True):
+        """
+        Registrar un paso.
+
+        Args:
+            nombre: Nombre del componente (para logs y tiempos)
+            funcion: Inicializa el componente y retorna True si tuvo éxito
+            critico: Si el sistema necesita este paso para estar listo
+        """
+        self.steps[nombre] = StartupStep(nombre, funcion, critico)
+
+    def start(self):
+        """Lanzar todos los pasos"""
+        self._inicio = time.perf_counter()
+        for paso in self.steps.values():
+            threading.Thread(
+                target=self._run_step,
+                args=(paso,),
+                name=f'arranque-{paso.nombre}',
+                daemon=True
+            ).start()
+
+    def _run_step(self, paso: StartupStep):
+        inicio = time.perf_counter()
+        try:
+            exito = bool(paso.funcion())
+        except Exception as e:
+            logger.error(f"Error inicializando {paso.nombre}: {e}")
+            exito = False
+
+        with self._condition:
+            paso.duracion = time.perf_counter() - inicio
+            paso.exito = exito
+            paso.hecho.set()
+            self._condition.notify_all()
+
+        estado = "listo" if exito else "FALLÓ"
+        logger.info(f"[arranque] {paso.nombre}: {estado} en {paso.duracion:.2f}s")
+
+    def wait_critical(self, timeout: float = None) -> bool:
+        """
+        Esperar los pasos críticos.
+
+        Returns:
+            bool: True si todos terminaron con éxito dentro del timeout
+        """
+        criticos = [p for p in self.steps.values() if p.critico]
+        limite = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                if any(p.exito is False for p in criticos):
+                    return False
+                if all(p.exito for p in criticos):
+                    return True
+
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    pendientes = [p.nombre for p in criticos if p.exito is None]
+                    logger.error(f"[arranque] Timeout esperando: {', '.join(pendientes)}")
+                    return False
+                self._condition.wait(restante)
+
+    def wait(self, nombre: str, timeout: float = None) -> Optional[bool]:
+        """
+        Esperar un paso concreto.
+
+        Returns:
+            bool o None: Resultado del paso, o None si no terminó a tiempo
+        """
+        paso = self.steps[nombre]
+        paso.hecho.wait(timeout)
+        return paso.exito
+
+    def elapsed(self) -> float:
+        """Segundos desde el inicio del arranque"""
+        return time.perf_counter() - self._inicio if self._inicio else 0.0
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Duración de cada paso en segundos (None si sigue en curso)"""
+        return {nombre: paso.duracion for nombre, paso in self.steps.items()}
+
+    def log_summary(self):
+        """Escribir en el log el estado y el tiempo de cada paso"""
+        for paso in self.steps.values():
+            if paso.exito is None:
+                estado = "en curso"
+            else:
+                estado = f"{'ok' if paso.exito else 'error'} {paso.duracion:.2f}s"
+            tipo = "crítico" if paso.critico else "segundo plano"
+            logger.info(f"[arranque]   {paso.nombre:10s} ({tipo}): {estado}")
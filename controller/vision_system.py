@@ -2,11 +2,16 @@
 Sistema de Visión - Cámara y Clasificación por IA
 """
 
+import threading
+import time
 import cv2
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional, Sequence
+from controller.frame_grabber import FrameGrabber
+from controller.inference import InferenceBackend, create_backend
+from controller.preprocessing import FramePreprocessor
 from backend.utils import setup_logger
 
 logger = setup_logger('eco_rvm.vision')
@@ -21,58 +26,167 @@ class VisionSystem:
     CLASE_ACEPTADO = "Aceptado"
     CLASE_RECHAZADO = "Rechazado"
     
+    # Modos de selección de frame con el capturador en segundo plano
+    CAPTURA_ULTIMO = "latest"
+    CAPTURA_NITIDO = "sharpest"
+    
+    # Reglas para combinar las predicciones de una ráfaga
+    VOTO_MEDIA = "mean"
+    VOTO_MAYORIA = "majority"
+    VOTO_MAX = "max"
+    VOTOS = (VOTO_MEDIA, VOTO_MAYORIA, VOTO_MAX)
+    
     def __init__(
         self,
         camera_id: int = 0,
         model_path: str = None,
         min_confidence: float = 0.70,
-        captures_dir: str = "capturas"
+        captures_dir: str = "capturas",
+        use_grabber: bool = True,
+        buffer_size: int = 8,
+        capture_mode: str = CAPTURA_ULTIMO,
+        sharpest_window: float = 0.15,
+        inference_backend: str = 'auto',
+        inference_threads: int = None,
+        model_wait_timeout: float = 30.0,
+        roi: Tuple[float, float, float, float] = None,
+        burst_size: int = 1,
+        burst_window: float = 0.25,
+        burst_vote: str = VOTO_MEDIA,
+        burst_early_stop: bool = True
     ):
         """
         Inicializar sistema de visión.
         
         Args:
             camera_id: ID de la cámara (default: 0)
-            model_path: Ruta al modelo de IA (.h5)
+            model_path: Ruta al modelo de IA (.h5, .keras, .tflite u .onnx)
             min_confidence: Confianza mínima para aceptar clasificación
             captures_dir: Directorio para guardar capturas
+            use_grabber: Leer la cámara continuamente en un hilo
+            buffer_size: Frames conservados por el capturador
+            capture_mode: "latest" (más reciente) o "sharpest" (más nítido de la ventana)
+            sharpest_window: Ventana en segundos para el modo "sharpest"
+            inference_backend: 'auto' (según extensión), 'keras', 'savedmodel', 'tflite' u 'onnx'
+            inference_threads: Hilos del runtime de inferencia (None = por defecto)
+            model_wait_timeout: Espera máxima de classify() si el modelo
+                                todavía se está cargando en segundo plano
+            roi: Región del frame que ocupa la cámara de depósito (x, y,
+                 ancho, alto en fracciones); None = frame completo
+            burst_size: Frames por ráfaga (1 = clasificar un solo frame)
+            burst_window: Ventana en segundos para capturar la ráfaga
+            burst_vote: Regla de combinación: "mean", "majority" o "max"
+            burst_early_stop: Clasificar primero un frame y capturar el
+                              resto solo si no alcanza min_confidence
         """
+        if burst_vote not in self.VOTOS:
+            raise ValueError(f"Regla de ráfaga desconocida: {burst_vote}")
+        
         self.camera_id = camera_id
         self.model_path = Path(model_path) if model_path else None
         self.min_confidence = min_confidence
         self.captures_dir = Path(captures_dir)
         self.captures_dir.mkdir(exist_ok=True)
         
+        self.use_grabber = use_grabber
+        self.buffer_size = buffer_size
+        self.capture_mode = capture_mode
+        self.sharpest_window = sharpest_window
+        
+        self.burst_size = max(1, int(burst_size))
+        self.burst_window = burst_window
+        self.burst_vote = burst_vote
+        self.burst_early_stop = burst_early_stop
+        self.last_burst_frames = 0
+        
+        self.inference_backend = inference_backend
+        self.inference_threads = inference_threads
+        self.input_size = (224, 224)
+        self.roi = roi
+        self.preprocessor = FramePreprocessor(self.input_size, roi, self.burst_size)
+        
         self.camera = None
-        self.model = None
+        self.grabber: Optional[FrameGrabber] = None
+        self.model: Optional[InferenceBackend] = None
         self._model_loaded = False
+        
+        # Carga en segundo plano: classify() espera si el modelo está en
+        # camino. El evento está activo mientras no haya una carga pendiente
+        self.model_wait_timeout = model_wait_timeout
+        self._model_done = threading.Event()
+        self._model_done.set()
+    
+    def begin_model_load(self):
+        """
+        Marcar que el modelo se cargará en segundo plano. Llamarlo antes de
+        lanzar el hilo de carga: desde ese momento classify() espera a
+        load_model() en lugar de rechazar.
+        """
+        self._model_done.clear()
     
     def load_model(self) -> bool:
         """
-        Cargar modelo de TensorFlow/Keras.
+        Cargar el modelo con el backend de inferencia configurado
+        (Keras, TFLite u ONNX Runtime). create_backend ejecuta la
+        inferencia de precalentamiento antes de que el modelo quede
+        disponible para classify().
         
         Returns:
             bool: True si se cargó correctamente
         """
         if not self.model_path or not self.model_path.exists():
             logger.error(f"Modelo no encontrado: {self.model_path}")
+            self._model_done.set()
             return False
         
+        self._model_done.clear()
         try:
-            # Importar TensorFlow solo cuando se necesita
-            import tensorflow as tf
+            self.model = create_backend(
+                self.model_path,
+                backend=self.inference_backend,
+                num_threads=self.inference_threads
+            )
             
-            # Suprimir logs de TensorFlow
-            tf.get_logger().setLevel('ERROR')
+            # Tamaño de entrada declarado por el modelo (alto, ancho)
+            forma = self.model.input_shape
+            if forma and len(forma) == 4 and forma[1] and forma[2]:
+                self.input_size = (int(forma[1]), int(forma[2]))
+                self.preprocessor = FramePreprocessor(self.input_size, self.roi, self.burst_size)
+            
+            # Preparar los lotes de la ráfaga (N, o N-1 tras el primer frame con early stop)
+            if self.burst_size > 1:
+                self.model.warmup((self.burst_size - 1 if self.burst_early_stop else self.burst_size,))
             
-            self.model = tf.keras.models.load_model(str(self.model_path))
             self._model_loaded = True
-            logger.info(f"Modelo cargado: {self.model_path}")
+            logger.info(f"Modelo cargado: {self.model_path} (backend {self.model.name})")
             return True
             
         except Exception as e:
             logger.error(f"Error cargando modelo: {e}")
             return False
+        
+        finally:
+            self._model_done.set()
+    
+    def wait_for_model(self, timeout: float = None) -> bool:
+        """
+        Esperar a que termine una carga del modelo en curso (retorna de
+        inmediato si no hay ninguna pendiente).
+        
+        Args:
+            timeout: Segundos máximos de espera (None = model_wait_timeout)
+        
+        Returns:
+            bool: True si el modelo quedó listo
+        """
+        if self.is_model_ready:
+            return True
+        if self._model_done.is_set():
+            return False
+        
+        logger.info("Esperando a que termine la carga del modelo...")
+        self._model_done.wait(self.model_wait_timeout if timeout is None else timeout)
+        return self.is_model_ready
     
     def open_camera(self) -> bool:
         """
@@ -92,6 +206,10 @@ class VisionSystem:
             self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             
+            if self.use_grabber:
+                self.grabber = FrameGrabber(self.camera, self.buffer_size)
+                self.grabber.start()
+            
             logger.info(f"Cámara {self.camera_id} abierta")
             return True
             
@@ -101,6 +219,9 @@ class VisionSystem:
     
     def close_camera(self):
         """Cerrar conexión con la cámara"""
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
         if self.camera:
             self.camera.release()
             logger.info("Cámara cerrada")
@@ -115,10 +236,18 @@ class VisionSystem:
         """Verificar si el modelo está cargado"""
         return self._model_loaded and self.model is not None
     
-    def capture_frame(self) -> Optional[np.ndarray]:
+    def capture_frame(self, after: float = None) -> Optional[np.ndarray]:
         """
         Capturar un frame de la cámara.
         
+        Con el capturador en segundo plano retorna un frame tomado después
+        de `after` (instante time.perf_counter() del disparo) sin leer la
+        cámara en este hilo; según capture_mode, el más reciente o el más
+        nítido de la ventana configurada.
+        
+        Args:
+            after: Instante mínimo del frame (default: ahora)
+        
         Returns:
             np.ndarray o None: Imagen capturada o None si hay error
         """
@@ -126,6 +255,17 @@ class VisionSystem:
             logger.warning("Cámara no está lista")
             return None
         
+        if self.grabber and self.grabber.is_running:
+            instante = after if after is not None else time.perf_counter()
+            if self.capture_mode == self.CAPTURA_NITIDO:
+                frame = self.grabber.sharpest_after(instante, self.sharpest_window)
+            else:
+                frame = self.grabber.frame_after(instante)
+            
+            if frame is None:
+                logger.error("No se recibió un frame a tiempo")
+            return frame
+        
         ret, frame = self.camera.read()
         
         if not ret:
@@ -134,29 +274,124 @@ class VisionSystem:
         
         return frame
     
+    def capture_burst(
+        self,
+        after: float,
+        cantidad: int,
+        hasta: float
+    ) -> List[Tuple[float, np.ndarray]]:
+        """
+        Capturar hasta `cantidad` frames tomados después de `after`, sin
+        esperar más allá del instante `hasta`.
+        
+        Sin capturador en segundo plano lee la cámara en este hilo.
+        
+        Returns:
+            list: [(instante, frame), ...] (vacía si hay error)
+        """
+        if not self.is_camera_ready:
+            logger.warning("Cámara no está lista")
+            return []
+        
+        if self.grabber and self.grabber.is_running:
+            return self.grabber.frames_after(after, cantidad, hasta)
+        
+        rafaga = []
+        for _ in range(cantidad):
+            ret, frame = self.camera.read()
+            if ret:
+                rafaga.append((time.perf_counter(), frame))
+            if time.perf_counter() >= hasta:
+                break
+        
+        if not rafaga:
+            logger.error("Error capturando frame")
+        return rafaga
+    
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """
-        Preprocesar imagen para el modelo.
+        Preprocesar imagen para el modelo (recorte de la ROI, resize,
+        BGR→RGB y normalización a [0, 1]).
+        
+        Reutiliza los buffers del preprocesador: el resultado se sobrescribe
+        en la siguiente llamada.
         
         Args:
             image: Imagen BGR de OpenCV
         
         Returns:
-            np.ndarray: Imagen preprocesada
+            np.ndarray: Imagen preprocesada (1, alto, ancho, 3) float32
+        """
+        return self.preprocessor.process(image)
+    
+    def predict_scores(self, images: Sequence[np.ndarray]) -> np.ndarray:
         """
-        # Redimensionar a tamaño esperado por el modelo
-        resized = cv2.resize(image, (224, 224))
+        Probabilidad de "Aceptado" de cada imagen con una sola inferencia
+        (todas las imágenes van en el mismo lote).
         
-        # Convertir BGR a RGB
-        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        Args:
+            images: Imágenes BGR de OpenCV
         
-        # Normalizar a rango [0, 1]
-        normalized = rgb.astype(np.float32) / 255.0
+        Returns:
+            np.ndarray: Probabilidades (N,) float64
+        """
+        if len(images) == 1:
+            lote = self.preprocess_image(images[0])
+        else:
+            lote = self.preprocessor.process_batch(images)
         
-        # Agregar dimensión de batch
-        batched = np.expand_dims(normalized, axis=0)
+        prediction = self.model.predict(lote)
         
-        return batched
+        # El modelo binario retorna probabilidad de clase positiva (Aceptado)
+        if prediction.shape[1] == 1:
+            # Salida sigmoid (clasificación binaria con 1 neurona)
+            return np.array(prediction[:, 0], dtype=np.float64)
+        # Salida softmax (2 neuronas: [rechazado, aceptado])
+        return np.array(prediction[:, 1], dtype=np.float64)
+    
+    def decide(self, prob_aceptado: float) -> Tuple[str, float]:
+        """
+        Clase y confianza a partir de la probabilidad de "Aceptado".
+        
+        Returns:
+            tuple: (clase, confianza)
+        """
+        if prob_aceptado >= self.min_confidence:
+            return self.CLASE_ACEPTADO, prob_aceptado
+        return self.CLASE_RECHAZADO, 1.0 - prob_aceptado
+    
+    def combine_scores(self, probs: np.ndarray, voto: str = None) -> float:
+        """
+        Combinar las probabilidades de una ráfaga en una sola.
+        
+        - mean: media de las probabilidades
+        - majority: cada frame vota con su propia decisión; gana la clase
+          con más votos (empate = rechazo) y se promedian sus frames
+        - max: la del frame con mayor confianza en su propia decisión
+        
+        Args:
+            probs: Probabilidades de "Aceptado" por frame
+            voto: Regla a aplicar (default: burst_vote)
+        
+        Returns:
+            float: Probabilidad combinada de "Aceptado"
+        """
+        voto = voto or self.burst_vote
+        
+        if voto == self.VOTO_MEDIA:
+            return float(probs.mean())
+        
+        aceptados = probs >= self.min_confidence
+        if voto == self.VOTO_MAYORIA:
+            if aceptados.sum() * 2 > len(probs):
+                return float(probs[aceptados].mean())
+            return float(probs[~aceptados].mean())
+        
+        if voto == self.VOTO_MAX:
+            confianzas = np.where(aceptados, probs, 1.0 - probs)
+            return float(probs[int(np.argmax(confianzas))])
+        
+        raise ValueError(f"Regla de ráfaga desconocida: {voto}")
     
     def classify(self, image: np.ndarray) -> Tuple[str, float]:
         """
@@ -168,39 +403,98 @@ class VisionSystem:
         Returns:
             tuple: (clase, confianza)
         """
-        if not self.is_model_ready:
+        if not self.wait_for_model():
             logger.error("Modelo no cargado")
             return self.CLASE_RECHAZADO, 0.0
         
         try:
-            # Preprocesar
-            preprocessed = self.preprocess_image(image)
+            prob_aceptado = float(self.predict_scores([image])[0])
+            clase, confianza = self.decide(prob_aceptado)
             
-            # Predecir
-            prediction = self.model.predict(preprocessed, verbose=0)[0]
+            logger.info(
+                f"Clasificación: {clase} ({confianza:.2%}) "
+                f"en {self.model.last_latency_ms:.1f} ms"
+            )
+            return clase, confianza
             
-            # El modelo binario retorna probabilidad de clase positiva (Aceptado)
-            if len(prediction) == 1:
-                # Salida sigmoid (clasificación binaria con 1 neurona)
-                prob_aceptado = float(prediction[0])
-            else:
-                # Salida softmax (2 neuronas: [rechazado, aceptado])
-                prob_aceptado = float(prediction[1])
+        except Exception as e:
+            logger.error(f"Error en clasificación: {e}")
+            return self.CLASE_RECHAZADO, 0.0
+    
+    def classify_burst(
+        self,
+        after: float = None,
+        frames: Sequence[np.ndarray] = None
+    ) -> Tuple[str, float, Optional[np.ndarray]]:
+        """
+        Clasificar una ráfaga de hasta burst_size frames tomados en la
+        ventana burst_window posterior al disparo.
+        
+        Con burst_early_stop se clasifica primero un solo frame; si su
+        confianza alcanza min_confidence no se espera al resto. Si no, los
+        frames restantes (capturados mientras tanto) se clasifican en un
+        único lote. Sin early stop la ráfaga completa va en una inferencia.
+        Las probabilidades se combinan según burst_vote.
+        
+        Args:
+            after: Instante time.perf_counter() del disparo (default: ahora)
+            frames: Ráfaga ya capturada, en orden (no se lee la cámara)
+        
+        Returns:
+            tuple: (clase, confianza, frame más representativo o None)
+        """
+        instante = after if after is not None else time.perf_counter()
+        fin = instante + self.burst_window
+        primera = 1 if self.burst_early_stop else self.burst_size
+        self.last_burst_frames = 0
+        
+        if frames is not None:
+            rafaga = list(frames[:primera])
+        else:
+            capturados = self.capture_burst(instante, primera, fin)
+            rafaga = [frame for _, frame in capturados]
+        
+        if not rafaga:
+            logger.error("No se recibió un frame a tiempo")
+            return self.CLASE_RECHAZADO, 0.0, None
+        
+        if not self.wait_for_model():
+            logger.error("Modelo no cargado")
+            return self.CLASE_RECHAZADO, 0.0, rafaga[0]
+        
+        try:
+            inicio = time.perf_counter()
+            probs = self.predict_scores(rafaga)
+            inferencias = 1
             
-            # Determinar clase
-            if prob_aceptado >= self.min_confidence:
-                clase = self.CLASE_ACEPTADO
-                confianza = prob_aceptado
-            else:
-                clase = self.CLASE_RECHAZADO
-                confianza = 1.0 - prob_aceptado
+            restantes = self.burst_size - len(rafaga)
+            if restantes > 0 and self.decide(float(probs[0]))[1] < self.min_confidence:
+                if frames is not None:
+                    extra = list(frames[len(rafaga):self.burst_size])
+                else:
+                    extra = [f for _, f in self.capture_burst(capturados[-1][0], restantes, fin)]
+                
+                if extra:
+                    probs = np.concatenate([probs, self.predict_scores(extra)])
+                    rafaga.extend(extra)
+                    inferencias += 1
             
-            logger.info(f"Clasificación: {clase} ({confianza:.2%})")
-            return clase, confianza
+            clase, confianza = self.decide(self.combine_scores(probs))
+            self.last_burst_frames = len(rafaga)
+            
+            # Frame que mejor respalda la decisión (para la captura guardada)
+            indice = np.argmax(probs) if clase == self.CLASE_ACEPTADO else np.argmin(probs)
+            
+            logger.info(
+                f"Clasificación en ráfaga: {clase} ({confianza:.2%}) con "
+                f"{len(rafaga)} frames en {inferencias} inferencias "
+                f"({self.burst_vote}, {(time.perf_counter() - inicio) * 1000:.1f} ms)"
+            )
+            return clase, confianza, rafaga[int(indice)]
             
         except Exception as e:
             logger.error(f"Error en clasificación: {e}")
-            return self.CLASE_RECHAZADO, 0.0
+            return self.CLASE_RECHAZADO, 0.0, rafaga[0]
     
     def capture_and_classify(self) -> Tuple[str, float, Optional[str]]:
         """
@@ -209,11 +503,16 @@ class VisionSystem:
         Returns:
             tuple: (clase, confianza, ruta_imagen o None)
         """
-        frame = self.capture_frame()
-        if frame is None:
-            return self.CLASE_RECHAZADO, 0.0, None
-        
-        clase, confianza = self.classify(frame)
+        if self.burst_size > 1:
+            clase, confianza, frame = self.classify_burst()
+            if frame is None:
+                return clase, confianza, None
+        else:
+            frame = self.capture_frame()
+            if frame is None:
+                return self.CLASE_RECHAZADO, 0.0, None
+            
+            clase, confianza = self.classify(frame)
         
         # Guardar captura
         imagen_path = self.save_capture(frame, clase)
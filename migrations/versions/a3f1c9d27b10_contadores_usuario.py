@@ -0,0 +1,55 @@
+"""Contadores denormalizados en usuarios
+
+Revision ID: a3f1c9d27b10
+Revises: 
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9d27b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+COLUMNAS = [
+    ('total_reciclajes', sa.Integer()),
+    ('kg_reciclado', sa.Float()),
+    ('co2_evitado_kg', sa.Float()),
+    ('total_botellas', sa.Integer()),
+    ('total_latas', sa.Integer()),
+    ('total_canjes', sa.Integer()),
+    ('total_badges', sa.Integer()),
+]
+
+
+def _columnas_existentes():
+    inspector = sa.inspect(op.get_bind())
+    return {c['name'] for c in inspector.get_columns('usuarios')}
+
+
+def upgrade():
+    # db.create_all() ya crea las columnas en bases nuevas; solo agregar las que falten
+    existentes = _columnas_existentes()
+
+    with op.batch_alter_table('usuarios') as batch_op:
+        for nombre, tipo in COLUMNAS:
+            if nombre not in existentes:
+                batch_op.add_column(
+                    sa.Column(nombre, tipo, nullable=False, server_default='0')
+                )
+
+    # Los valores reales se calculan con scripts/reparar_contadores.py
+
+
+def downgrade():
+    existentes = _columnas_existentes()
+
+    with op.batch_alter_table('usuarios') as batch_op:
+        for nombre, _ in reversed(COLUMNAS):
+            if nombre in existentes:
+                batch_op.drop_column(nombre)
@@ -0,0 +1,44 @@
+"""Índices compuestos para el historial de transacciones
+
+Revision ID: b7d2e4f19c3a
+Revises: a3f1c9d27b10
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f19c3a'
+down_revision = 'a3f1c9d27b10'
+branch_labels = None
+depends_on = None
+
+
+INDICES = [
+    ('ix_transacciones_usuario_fecha', ['usuario_id', 'fecha_hora', 'id']),
+    ('ix_transacciones_fecha', ['fecha_hora', 'id']),
+]
+
+
+def _indices_existentes():
+    inspector = sa.inspect(op.get_bind())
+    return {i['name'] for i in inspector.get_indexes('transacciones')}
+
+
+def upgrade():
+    # db.create_all() ya crea los índices en bases nuevas; solo agregar los que falten
+    existentes = _indices_existentes()
+
+    for nombre, columnas in INDICES:
+        if nombre not in existentes:
+            op.create_index(nombre, 'transacciones', columnas)
+
+
+def downgrade():
+    existentes = _indices_existentes()
+
+    for nombre, _ in reversed(INDICES):
+        if nombre in existentes:
+            op.drop_index(nombre, table_name='transacciones')
@@ -0,0 +1,43 @@
+"""Identificador de depósito para reenvíos idempotentes
+
+Revision ID: c5e9a2d47f81
+Revises: b7d2e4f19c3a
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9a2d47f81'
+down_revision = 'b7d2e4f19c3a'
+branch_labels = None
+depends_on = None
+
+
+INDICE = 'uq_transacciones_id_deposito'
+
+
+def _columnas_existentes():
+    inspector = sa.inspect(op.get_bind())
+    return {c['name'] for c in inspector.get_columns('transacciones')}
+
+
+def upgrade():
+    # db.create_all() ya crea la columna en bases nuevas; solo agregarla si falta
+    if 'id_deposito' in _columnas_existentes():
+        return
+
+    with op.batch_alter_table('transacciones') as batch_op:
+        batch_op.add_column(sa.Column('id_deposito', sa.String(36), nullable=True))
+        batch_op.create_unique_constraint(INDICE, ['id_deposito'])
+
+
+def downgrade():
+    if 'id_deposito' not in _columnas_existentes():
+        return
+
+    with op.batch_alter_table('transacciones') as batch_op:
+        batch_op.drop_constraint(INDICE, type_='unique')
+        batch_op.drop_column('id_deposito')
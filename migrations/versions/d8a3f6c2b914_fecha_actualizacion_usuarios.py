@@ -0,0 +1,52 @@
+"""Fecha de actualización de usuarios para sincronización incremental
+
+Revision ID: d8a3f6c2b914
+Revises: c5e9a2d47f81
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f6c2b914'
+down_revision = 'c5e9a2d47f81'
+branch_labels = None
+depends_on = None
+
+
+INDICE = 'ix_usuarios_actualizacion'
+
+
+def _columnas_existentes():
+    inspector = sa.inspect(op.get_bind())
+    return {c['name'] for c in inspector.get_columns('usuarios')}
+
+
+def upgrade():
+    # db.create_all() ya crea la columna en bases nuevas; solo agregarla si falta
+    if 'fecha_actualizacion' in _columnas_existentes():
+        return
+
+    with op.batch_alter_table('usuarios') as batch_op:
+        batch_op.add_column(sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True))
+
+    # Punto de partida: la última actividad conocida de cada usuario
+    op.execute(
+        'UPDATE usuarios SET fecha_actualizacion = '
+        'COALESCE(ultima_actividad, fecha_registro, CURRENT_TIMESTAMP)'
+    )
+
+    with op.batch_alter_table('usuarios') as batch_op:
+        batch_op.alter_column('fecha_actualizacion', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index(INDICE, ['fecha_actualizacion', 'id'])
+
+
+def downgrade():
+    if 'fecha_actualizacion' not in _columnas_existentes():
+        return
+
+    with op.batch_alter_table('usuarios') as batch_op:
+        batch_op.drop_index(INDICE)
+        batch_op.drop_column('fecha_actualizacion')
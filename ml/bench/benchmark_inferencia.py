@@ -0,0 +1,398 @@
+"""
+Benchmark de Inferencia en CPU para Eco-RVM
+Mide lo que cuesta realmente VisionSystem.classify con cada artefacto del
+modelo (.h5/.keras, SavedModel, .tflite y variantes cuantizadas, .onnx) y
+cada combinación de hilos intra/inter-op.
+
+Cada combinación se ejecuta en un subproceso nuevo: el tiempo de import, el
+tiempo de carga y la memoria pico (RSS) no se contaminan entre runtimes, y
+la configuración de hilos de TensorFlow (que solo puede fijarse una vez por
+proceso) se aplica limpia.
+
+Uso:
+    python ml/bench/benchmark_inferencia.py --modelos ml/models --hilos 1,2,4
+    python ml/bench/benchmark_inferencia.py --referencia bench_anterior.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+
+# Raíz del repositorio (para importar controller.*)
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Configuración del benchmark
+CONFIG = {
+    'MODELOS': ['ml/models', '.'],
+    'HILOS_INTRA': [1, 2, 4],
+    'HILOS_INTER': [1],           # Solo aplica a TensorFlow (keras / savedmodel)
+    'LOTES': [1, 4, 8],
+    'WARMUP': 10,
+    'REPETICIONES': 100,
+    'FRAME': (480, 640),          # Resolución de la cámara (alto, ancho)
+    'TIMEOUT': 900,               # Segundos por subproceso
+    'SALIDA': 'bench_inferencia_{fecha}.json'
+}
+
+EXTENSIONES = ('.h5', '.keras', '.tflite', '.onnx')
+
+# Runtime que importa cada backend (para medir el import por separado)
+RUNTIMES = {
+    'keras': ['tensorflow'],
+    'savedmodel': ['tensorflow'],
+    'tflite': ['tflite_runtime.interpreter', 'tensorflow'],
+    'onnx': ['onnxruntime']
+}
+
+
+# =====================================================================
+# PROCESO HIJO: una combinación (modelo, backend, hilos)
+# =====================================================================
+
+def _rss_pico_mb():
+    """Memoria residente pico del proceso en MB"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB; macOS, bytes
+        return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+        except (ImportError, AttributeError):
+            return None
+
+
+def _percentiles(muestras_s):
+    """Estadísticas de latencia en milisegundos"""
+    import numpy as np
+    ms = np.asarray(muestras_s) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'media_ms': round(float(ms.mean()), 3),
+        'min_ms': round(float(ms.min()), 3)
+    }
+
+
+def _importar_runtime(backend):
+    """Importar el runtime del backend y devolver (modulo, version, segundos)"""
+    import importlib
+    inicio = time.perf_counter()
+    for nombre in RUNTIMES[backend]:
+        try:
+            importlib.import_module(nombre)
+        except ImportError:
+            continue
+        raiz = sys.modules[nombre.split('.')[0]]
+        return nombre, getattr(raiz, '__version__', None), time.perf_counter() - inicio
+    raise ImportError(f"Runtime no disponible para {backend}: {RUNTIMES[backend]}")
+
+
+def ejecutar_caso(caso):
+    """
+    Medir una combinación. Se ejecuta en el subproceso.
+
+    Args:
+        caso: dict con modelo, backend, intra, inter, lotes, warmup,
+            repeticiones y frame
+
+    Returns:
+        dict: Resultado del caso
+    """
+    sys.path.insert(0, RAIZ)
+    resultado = dict(caso)
+
+    runtime, version, import_s = _importar_runtime(caso['backend'])
+    resultado.update(runtime=runtime, version_runtime=version, import_s=round(import_s, 3))
+
+    if caso['backend'] in ('keras', 'savedmodel') and caso['inter']:
+        import tensorflow as tf
+        tf.config.threading.set_inter_op_parallelism_threads(caso['inter'])
+    else:
+        resultado['inter'] = None
+
+    import numpy as np
+    from controller.vision_system import VisionSystem
+
+    vision = VisionSystem(
+        model_path=caso['modelo'],
+        captures_dir=os.path.join(RAIZ, 'capturas'),
+        use_grabber=False,
+        inference_backend=caso['backend'],
+        inference_threads=caso['intra']
+    )
+    inicio = time.perf_counter()
+    if not vision.load_model():
+        raise RuntimeError(f"No se pudo cargar {caso['modelo']}")
+    resultado['carga_s'] = round(time.perf_counter() - inicio, 3)
+
+    modelo = vision.model
+    alto, ancho = caso['frame']
+    generador = np.random.default_rng(0)
+    frame = generador.integers(0, 256, (alto, ancho, 3), dtype=np.uint8)
+
+    # Warm-up (la primera inferencia tras la carga ya la hizo create_backend)
+    entrada = vision.preprocess_image(frame)
+    inicio = time.perf_counter()
+    for _ in range(caso['warmup']):
+        modelo.predict(entrada)
+    resultado['warmup_s'] = round(time.perf_counter() - inicio, 3)
+
+    # Imagen individual: preprocesado + inferencia, como en classify()
+    preprocesado, inferencia, total = [], [], []
+    for _ in range(caso['repeticiones']):
+        t0 = time.perf_counter()
+        entrada = vision.preprocess_image(frame)
+        t1 = time.perf_counter()
+        modelo.predict(entrada)
+        t2 = time.perf_counter()
+        preprocesado.append(t1 - t0)
+        inferencia.append(t2 - t1)
+        total.append(t2 - t0)
+
+    resultado['preprocesado'] = _percentiles(preprocesado)
+    resultado['inferencia'] = _percentiles(inferencia)
+    resultado['classify'] = _percentiles(total)
+    resultado['img_s'] = round(len(total) / sum(total), 2)
+
+    # Lotes (el primer lote de cada tamaño puede redimensionar tensores)
+    resultado['lotes'] = {}
+    for n in caso['lotes']:
+        if n == 1:
+            continue
+        lote = np.repeat(entrada, n, axis=0)
+        modelo.predict(lote)
+        muestras = []
+        for _ in range(max(10, caso['repeticiones'] // n)):
+            t0 = time.perf_counter()
+            modelo.predict(lote)
+            muestras.append(time.perf_counter() - t0)
+        estadisticas = _percentiles(muestras)
+        estadisticas['img_s'] = round(n * len(muestras) / sum(muestras), 2)
+        resultado['lotes'][str(n)] = estadisticas
+
+    resultado['rss_pico_mb'] = _rss_pico_mb()
+    return resultado
+
+
+# =====================================================================
+# PROCESO PRINCIPAL: descubrimiento, subprocesos y reporte
+# =====================================================================
+
+def descubrir_modelos(rutas):
+    """
+    Buscar artefactos de modelo en archivos o carpetas (sin recursión,
+    salvo para reconocer carpetas SavedModel).
+
+    Returns:
+        list: Rutas absolutas únicas y ordenadas
+    """
+    encontrados = set()
+    for ruta in rutas:
+        ruta = os.path.abspath(ruta)
+        if os.path.isfile(ruta) and ruta.lower().endswith(EXTENSIONES):
+            encontrados.add(ruta)
+        elif os.path.isdir(ruta):
+            if os.path.exists(os.path.join(ruta, 'saved_model.pb')):
+                encontrados.add(ruta)
+                continue
+            for nombre in os.listdir(ruta):
+                completa = os.path.join(ruta, nombre)
+                if os.path.isfile(completa) and nombre.lower().endswith(EXTENSIONES):
+                    encontrados.add(completa)
+                elif os.path.exists(os.path.join(completa, 'saved_model.pb')):
+                    encontrados.add(completa)
+    return sorted(encontrados)
+
+
+def _tamano_mb(ruta):
+    if os.path.isdir(ruta):
+        total = sum(
+            os.path.getsize(os.path.join(carpeta, f))
+            for carpeta, _, archivos in os.walk(ruta) for f in archivos
+        )
+    else:
+        total = os.path.getsize(ruta)
+    return round(total / (1024 * 1024), 2)
+
+
+def generar_casos(modelos, hilos_intra, hilos_inter):
+    """Combinaciones (modelo, backend, intra, inter) a medir"""
+    sys.path.insert(0, RAIZ)
+    from controller.inference import resolve_backend_name
+
+    casos = []
+    for modelo in modelos:
+        backend = resolve_backend_name(modelo)
+        # inter-op solo existe en TensorFlow
+        inters = hilos_inter if backend in ('keras', 'savedmodel') else [None]
+        for intra in hilos_intra:
+            for inter in inters:
+                casos.append({
+                    'modelo': modelo,
+                    'backend': backend,
+                    'intra': intra,
+                    'inter': inter,
+                    'lotes': CONFIG['LOTES'],
+                    'warmup': CONFIG['WARMUP'],
+                    'repeticiones': CONFIG['REPETICIONES'],
+                    'frame': list(CONFIG['FRAME'])
+                })
+    return casos
+
+
+def ejecutar_en_subproceso(caso):
+    """Ejecutar un caso en un intérprete nuevo y devolver su resultado"""
+    inicio = time.perf_counter()
+    try:
+        proceso = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--caso', json.dumps(caso)],
+            capture_output=True, text=True, timeout=CONFIG['TIMEOUT'], cwd=RAIZ
+        )
+    except subprocess.TimeoutExpired:
+        return dict(caso, error=f"Timeout ({CONFIG['TIMEOUT']}s)")
+
+    # El resultado es la última línea de stdout; los logs van antes o a stderr
+    lineas = [l for l in proceso.stdout.splitlines() if l.startswith('{')]
+    if proceso.returncode != 0 or not lineas:
+        error = (proceso.stderr.strip().splitlines() or ['sin salida'])[-1]
+        return dict(caso, error=error)
+
+    resultado = json.loads(lineas[-1])
+    resultado['proceso_s'] = round(time.perf_counter() - inicio, 2)
+    return resultado
+
+
+def _clave(resultado):
+    return (os.path.basename(resultado['modelo']), resultado['backend'],
+            resultado.get('intra'), resultado.get('inter'))
+
+
+def imprimir_tabla(resultados, referencia=None):
+    """Resumen legible; con referencia muestra la variación de p50"""
+    previos = {}
+    if referencia:
+        previos = {_clave(r): r for r in referencia.get('resultados', []) if 'error' not in r}
+
+    print(f"\n  {'Modelo':<32}{'Backend':<11}{'Hilos':>6}{'Carga s':>9}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'img/s':>8}{'RSS MB':>9}{'vs ref':>9}")
+    print("  " + "-" * 100)
+    for r in resultados:
+        nombre = os.path.basename(r['modelo'])[:31]
+        hilos = f"{r['intra']}/{r['inter'] or '-'}"
+        if 'error' in r:
+            print(f"  {nombre:<32}{r['backend']:<11}{hilos:>6}  [Error] {r['error'][:40]}")
+            continue
+
+        variacion = ''
+        previo = previos.get(_clave(r))
+        if previo:
+            cambio = r['classify']['p50_ms'] / previo['classify']['p50_ms'] - 1
+            variacion = f"{cambio:+.0%}"
+
+        print(f"  {nombre:<32}{r['backend']:<11}{hilos:>6}{r['carga_s']:>9.2f}"
+              f"{r['classify']['p50_ms']:>9.2f}{r['classify']['p99_ms']:>9.2f}"
+              f"{r['img_s']:>8.1f}{(r['rss_pico_mb'] or 0):>9.0f}{variacion:>9}")
+
+
+def benchmark(modelos, hilos_intra, hilos_inter, salida, referencia=None):
+    """
+    Ejecutar todas las combinaciones y guardar el reporte JSON.
+
+    Returns:
+        dict: Reporte completo
+    """
+    print("\n" + "=" * 70)
+    print("BENCHMARK DE INFERENCIA EN CPU")
+    print("=" * 70)
+
+    casos = generar_casos(modelos, hilos_intra, hilos_inter)
+    print(f"  Modelos: {len(modelos)} | Combinaciones: {len(casos)}")
+
+    resultados = []
+    for i, caso in enumerate(casos, 1):
+        print(f"  [{i}/{len(casos)}] {os.path.basename(caso['modelo'])} "
+              f"({caso['backend']}, intra={caso['intra']}, inter={caso['inter']})")
+        resultado = ejecutar_en_subproceso(caso)
+        resultado['modelo'] = os.path.relpath(caso['modelo'], RAIZ)
+        resultado['tamano_mb'] = _tamano_mb(caso['modelo'])
+        resultados.append(resultado)
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'sistema': {
+            'host': platform.node(),
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'nucleos': os.cpu_count(),
+            'python': platform.python_version()
+        },
+        'config': {k: CONFIG[k] for k in ('LOTES', 'WARMUP', 'REPETICIONES', 'FRAME')},
+        'resultados': resultados
+    }
+
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    imprimir_tabla(resultados, referencia)
+    print(f"\n[OK] Resultados guardados en: {salida}")
+    return reporte
+
+
+def _lista_enteros(texto):
+    return [int(v) for v in texto.split(',') if v.strip()]
+
+
+def main():
+    """
+    Benchmark de los artefactos del modelo
+    """
+    parser = argparse.ArgumentParser(description='Benchmark de inferencia en CPU de Eco-RVM')
+    parser.add_argument('--modelos', nargs='+', default=CONFIG['MODELOS'],
+                        help='Archivos o carpetas con modelos (.h5, .keras, .tflite, .onnx, SavedModel)')
+    parser.add_argument('--hilos', type=_lista_enteros, default=CONFIG['HILOS_INTRA'],
+                        help='Hilos intra-op separados por coma (ej. 1,2,4)')
+    parser.add_argument('--inter', type=_lista_enteros, default=CONFIG['HILOS_INTER'],
+                        help='Hilos inter-op de TensorFlow separados por coma')
+    parser.add_argument('--lotes', type=_lista_enteros, default=CONFIG['LOTES'],
+                        help='Tamaños de lote separados por coma')
+    parser.add_argument('--repeticiones', type=int, default=CONFIG['REPETICIONES'])
+    parser.add_argument('--salida', default=None, help='Archivo JSON de resultados')
+    parser.add_argument('--referencia', default=None,
+                        help='JSON de una ejecución anterior para comparar p50')
+    parser.add_argument('--caso', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Subproceso: medir un caso e imprimir el resultado como JSON
+    if args.caso:
+        resultado = ejecutar_caso(json.loads(args.caso))
+        print(json.dumps(resultado))
+        return
+
+    CONFIG['LOTES'] = args.lotes
+    CONFIG['REPETICIONES'] = args.repeticiones
+
+    modelos = descubrir_modelos(args.modelos)
+    if not modelos:
+        print(f"[Error] No se encontraron modelos en: {', '.join(args.modelos)}")
+        return
+
+    referencia = None
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as f:
+            referencia = json.load(f)
+
+    salida = args.salida or CONFIG['SALIDA'].format(fecha=datetime.now().strftime('%Y%m%d_%H%M%S'))
+    benchmark(modelos, args.hilos, args.inter, salida, referencia)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Microbenchmark del Preprocesado de Frames para Eco-RVM
+Compara el preprocesado original de VisionSystem (resize → cvtColor →
+astype → / 255 → expand_dims, un array nuevo en cada paso) con
+FramePreprocessor (buffers preasignados, BGR→RGB + normalización fusionados
+y recorte opcional de la ROI).
+
+Por variante mide la latencia por frame y la memoria asignada por frame
+(tracemalloc, en una pasada aparte para no sesgar los tiempos).
+
+Uso:
+    python ml/bench/benchmark_preprocesado.py
+    python ml/bench/benchmark_preprocesado.py --roi 0.2,0.1,0.6,0.8 --salida prep.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import cv2
+import numpy as np
+
+# Raíz del repositorio (para importar controller.*)
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, RAIZ)
+
+from controller.preprocessing import FramePreprocessor, parse_roi
+
+# Configuración del benchmark
+CONFIG = {
+    'FRAME': (480, 640),          # Resolución de la cámara (alto, ancho)
+    'TAMANO': (224, 224),         # Entrada del modelo (alto, ancho)
+    'ROI': '0.2,0.1,0.6,0.8',     # ROI de ejemplo para la variante recortada
+    'WARMUP': 50,
+    'REPETICIONES': 2000,
+    'FRAMES_DISTINTOS': 8         # Frames que se rotan (evita medir solo caché)
+}
+
+
+def preprocesado_original(frame, tamano):
+    """Preprocesado previo de VisionSystem.preprocess_image (referencia)"""
+    alto, ancho = tamano
+    resized = cv2.resize(frame, (ancho, alto))
+    rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    normalized = rgb.astype(np.float32) / 255.0
+    return np.expand_dims(normalized, axis=0)
+
+
+def _frames(cantidad, forma):
+    """Frames sintéticos con textura (el resize no es trivial)"""
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=forma + (3,), dtype=np.uint8) for _ in range(cantidad)]
+
+
+def medir(funcion, frames, repeticiones, warmup):
+    """
+    Latencia y memoria asignada por frame.
+
+    Returns:
+        dict: p50/p95/media en microsegundos, KB asignados por frame y pico
+    """
+    for i in range(warmup):
+        funcion(frames[i % len(frames)])
+
+    muestras = np.empty(repeticiones)
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(frames[i % len(frames)])
+        muestras[i] = time.perf_counter() - inicio
+
+    # Memoria: total asignado durante N llamadas (sin contar lo liberado)
+    n = min(200, repeticiones)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    asignado = 0
+    for i in range(n):
+        antes = tracemalloc.get_traced_memory()[0]
+        resultado = funcion(frames[i % len(frames)])
+        asignado += max(0, tracemalloc.get_traced_memory()[0] - antes)
+        del resultado
+    pico = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    us = muestras * 1e6
+    return {
+        'p50_us': round(float(np.percentile(us, 50)), 1),
+        'p95_us': round(float(np.percentile(us, 95)), 1),
+        'media_us': round(float(us.mean()), 1),
+        'kb_por_frame': round(asignado / n / 1024, 1),
+        'pico_kb': round(pico / 1024, 1)
+    }
+
+
+def verificar_equivalencia(frames, tamano):
+    """Diferencia máxima entre el preprocesado original y el nuevo (sin ROI)"""
+    preprocesador = FramePreprocessor(tamano)
+    return max(
+        float(np.abs(preprocesado_original(f, tamano) - preprocesador.process(f)).max())
+        for f in frames
+    )
+
+
+def benchmark(roi, repeticiones, salida=None):
+    """
+    Ejecutar el microbenchmark e imprimir la tabla comparativa.
+
+    Returns:
+        dict: Resultados por variante
+    """
+    print("\n" + "=" * 70)
+    print("MICROBENCHMARK DE PREPROCESADO")
+    print("=" * 70)
+
+    tamano = CONFIG['TAMANO']
+    frames = _frames(CONFIG['FRAMES_DISTINTOS'], CONFIG['FRAME'])
+    print(f"  Frame: {CONFIG['FRAME'][1]}x{CONFIG['FRAME'][0]} → {tamano[1]}x{tamano[0]} | "
+          f"Repeticiones: {repeticiones} | OpenCV hilos: {cv2.getNumThreads()}")
+
+    diferencia = verificar_equivalencia(frames, tamano)
+    estado = "[OK]" if diferencia < 1e-6 else "[Advertencia]"
+    print(f"  {estado} Diferencia máxima original vs nuevo: {diferencia:.2e}")
+
+    completo = FramePreprocessor(tamano)
+    recortado = FramePreprocessor(tamano, parse_roi(roi))
+    variantes = {
+        'original': lambda f: preprocesado_original(f, tamano),
+        'preasignado': completo.process,
+        'preasignado+roi': recortado.process
+    }
+
+    resultados = {}
+    for nombre, funcion in variantes.items():
+        resultados[nombre] = medir(funcion, frames, repeticiones, CONFIG['WARMUP'])
+
+    print(f"\n  {'Variante':<20}{'p50 µs':>10}{'p95 µs':>10}{'media µs':>10}"
+          f"{'KB/frame':>10}{'vs orig':>9}")
+    print("  " + "-" * 69)
+    referencia = resultados['original']['p50_us']
+    for nombre, r in resultados.items():
+        print(f"  {nombre:<20}{r['p50_us']:>10.1f}{r['p95_us']:>10.1f}{r['media_us']:>10.1f}"
+              f"{r['kb_por_frame']:>10.1f}{r['p50_us'] / referencia - 1:>+9.0%}")
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'config': {**CONFIG, 'ROI': roi, 'REPETICIONES': repeticiones},
+                'diferencia_maxima': diferencia,
+                'resultados': resultados
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n[OK] Resultados guardados en: {salida}")
+
+    return resultados
+
+
+def main():
+    """
+    Microbenchmark del preprocesado de frames
+    """
+    parser = argparse.ArgumentParser(description='Microbenchmark de preprocesado de Eco-RVM')
+    parser.add_argument('--roi', default=CONFIG['ROI'],
+                        help='ROI x,y,ancho,alto en fracciones para la variante recortada')
+    parser.add_argument('--repeticiones', type=int, default=CONFIG['REPETICIONES'])
+    parser.add_argument('--salida', default=None, help='Archivo JSON de resultados')
+    args = parser.parse_args()
+
+    benchmark(args.roi, args.repeticiones, args.salida)
+
+
+if __name__ == "__main__":
+    main()
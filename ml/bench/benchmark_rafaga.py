@@ -0,0 +1,278 @@
+"""
+Benchmark de Clasificación en Ráfaga para Eco-RVM
+Mide el compromiso precisión/latencia de VisionSystem.classify_burst según
+el tamaño de ráfaga, la regla de combinación (mean, majority, max) y el
+early stop.
+
+Cada imagen del dataset se convierte en una ráfaga sintética de frames de
+cámara: desplazamientos pequeños (el objeto se asienta en la bandeja), ruido
+y, en una fracción de los frames, desenfoque de movimiento y/o reflejos.
+Todas las configuraciones se evalúan sobre las mismas ráfagas.
+
+La latencia total estimada suma la espera de cámara (el k-ésimo frame llega
+k / FPS después del disparo) y el tiempo medido de preprocesado +
+inferencia. Es una cota superior: en el controlador la captura de la segunda
+etapa se solapa con la inferencia del primer frame.
+
+Uso:
+    python ml/bench/benchmark_rafaga.py --modelo ml/models/modelo_reciclaje.tflite
+    python ml/bench/benchmark_rafaga.py --tamanos 1,3,5 --muestras 200 --salida rafaga.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import cv2
+import numpy as np
+
+# Raíz del repositorio (para importar controller.*)
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, RAIZ)
+
+from controller.vision_system import VisionSystem
+
+# Configuración del benchmark
+CONFIG = {
+    'MODELO': 'ml/models/modelo_reciclaje.h5',
+    'DATASET': 'dataset-binario',
+    'MUESTRAS_POR_CLASE': 100,
+    'TAMANOS': [1, 2, 3, 5, 8],
+    'CONFIANZA': 0.70,
+    'FPS': 30,
+    'FRAME': (480, 640),          # Resolución de la cámara (alto, ancho)
+    'PROB_DEGRADADO': 0.5,        # Fracción de frames con desenfoque o reflejo
+    'SEMILLA': 0
+}
+
+# Carpeta del dataset -> clase esperada
+CARPETAS = {
+    'aceptado': VisionSystem.CLASE_ACEPTADO,
+    'rechazado': VisionSystem.CLASE_RECHAZADO
+}
+
+
+def cargar_muestras(dataset, por_clase, rng):
+    """
+    Elegir imágenes al azar de cada clase.
+
+    Returns:
+        list: [(ruta, clase_esperada), ...]
+    """
+    muestras = []
+    for carpeta, clase in CARPETAS.items():
+        directorio = os.path.join(dataset, carpeta)
+        if not os.path.isdir(directorio):
+            print(f"[Advertencia] No existe {directorio}")
+            continue
+        archivos = sorted(
+            f for f in os.listdir(directorio)
+            if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+        )
+        elegidos = rng.choice(len(archivos), min(por_clase, len(archivos)), replace=False)
+        muestras.extend((os.path.join(directorio, archivos[i]), clase) for i in elegidos)
+    return muestras
+
+
+def desenfoque_movimiento(frame, rng):
+    """Desenfoque lineal con longitud y ángulo aleatorios"""
+    longitud = int(rng.integers(9, 41))
+    kernel = np.zeros((longitud, longitud), dtype=np.float32)
+    kernel[longitud // 2, :] = 1.0
+    rotacion = cv2.getRotationMatrix2D((longitud / 2 - 0.5, longitud / 2 - 0.5), rng.uniform(0, 180), 1.0)
+    kernel = cv2.warpAffine(kernel, rotacion, (longitud, longitud))
+    return cv2.filter2D(frame, -1, kernel / max(kernel.sum(), 1e-6))
+
+
+def reflejo(frame, rng):
+    """Mancha brillante gaussiana (reflejo de la iluminación en el envase)"""
+    alto, ancho = frame.shape[:2]
+    cy, cx = rng.uniform(0, alto), rng.uniform(0, ancho)
+    sigma = rng.uniform(40, 120)
+    y, x = np.ogrid[:alto, :ancho]
+    mascara = np.exp(-((y - cy) ** 2 + (x - cx) ** 2) / (2 * sigma ** 2)).astype(np.float32)
+    brillo = rng.uniform(150, 255) * mascara[..., None]
+    return np.clip(frame.astype(np.float32) + brillo, 0, 255).astype(np.uint8)
+
+
+def generar_rafaga(imagen, cantidad, rng):
+    """
+    Frames sintéticos de una ráfaga a partir de una imagen limpia.
+
+    Returns:
+        list: Frames BGR uint8 con la resolución de la cámara
+    """
+    alto, ancho = CONFIG['FRAME']
+    base = cv2.resize(imagen, (ancho, alto))
+    frames = []
+
+    for _ in range(cantidad):
+        dx, dy = rng.integers(-20, 21, size=2)
+        desplazamiento = np.float32([[1, 0, dx], [0, 1, dy]])
+        frame = cv2.warpAffine(base, desplazamiento, (ancho, alto), borderMode=cv2.BORDER_REFLECT)
+
+        if rng.random() < CONFIG['PROB_DEGRADADO']:
+            tipo = rng.integers(3)
+            if tipo in (0, 2):
+                frame = desenfoque_movimiento(frame, rng)
+            if tipo in (1, 2):
+                frame = reflejo(frame, rng)
+
+        ruido = rng.normal(0, 4, frame.shape)
+        frames.append(np.clip(frame + ruido, 0, 255).astype(np.uint8))
+
+    return frames
+
+
+def configuraciones(tamanos):
+    """(tamaño, voto, early stop) a evaluar; con 1 frame la regla no aplica"""
+    combinaciones = []
+    for tamano in tamanos:
+        if tamano == 1:
+            combinaciones.append((1, VisionSystem.VOTO_MEDIA, False))
+            continue
+        for voto in VisionSystem.VOTOS:
+            for early_stop in (False, True):
+                combinaciones.append((tamano, voto, early_stop))
+    return combinaciones
+
+
+def _resumen(registros, fps):
+    """Precisión, frames e inferencias medias y latencias en ms"""
+    aciertos = np.array([r[0] for r in registros])
+    frames = np.array([r[1] for r in registros])
+    inferencias = np.array([r[2] for r in registros])
+    clasificacion_ms = np.array([r[3] for r in registros]) * 1000
+    total_ms = frames / fps * 1000 + clasificacion_ms
+    return {
+        'precision': round(float(aciertos.mean()), 4),
+        'frames_medios': round(float(frames.mean()), 2),
+        'inferencias_medias': round(float(inferencias.mean()), 2),
+        'clasificacion_p50_ms': round(float(np.percentile(clasificacion_ms, 50)), 1),
+        'clasificacion_p95_ms': round(float(np.percentile(clasificacion_ms, 95)), 1),
+        'total_p50_ms': round(float(np.percentile(total_ms, 50)), 1),
+        'total_p95_ms': round(float(np.percentile(total_ms, 95)), 1)
+    }
+
+
+def benchmark(modelo, dataset, por_clase, tamanos, confianza, salida=None):
+    """
+    Ejecutar el benchmark e imprimir la tabla por configuración.
+
+    Returns:
+        dict: Resultados por configuración
+    """
+    print("\n" + "=" * 70)
+    print("BENCHMARK DE CLASIFICACIÓN EN RÁFAGA")
+    print("=" * 70)
+
+    # Los logs por clasificación ensuciarían la tabla
+    logging.getLogger('eco_rvm.vision').setLevel(logging.WARNING)
+
+    vision = VisionSystem(
+        model_path=modelo,
+        min_confidence=confianza,
+        captures_dir=os.path.join(tempfile.gettempdir(), 'eco_rvm_bench_capturas'),
+        burst_size=max(tamanos)
+    )
+    if not vision.load_model():
+        print(f"[Error] No se pudo cargar el modelo: {modelo}")
+        return None
+
+    rng = np.random.default_rng(CONFIG['SEMILLA'])
+    muestras = cargar_muestras(dataset, por_clase, rng)
+    if not muestras:
+        print(f"[Error] No hay imágenes en {dataset}")
+        return None
+
+    fps = CONFIG['FPS']
+    combinaciones = configuraciones(tamanos)
+    print(f"  Modelo: {modelo} (backend {vision.model.name}, entrada {vision.input_size})")
+    print(f"  Muestras: {len(muestras)} | Tamaños: {tamanos} | Confianza mínima: {confianza} | "
+          f"Cámara: {fps} FPS")
+
+    # Calentar cada tamaño de lote (los runtimes preparan kernels por forma)
+    vacio = np.zeros(CONFIG['FRAME'] + (3,), dtype=np.uint8)
+    for tamano in sorted(set(tamanos) | {t - 1 for t in tamanos if t > 1}):
+        for _ in range(2):
+            vision.predict_scores([vacio] * tamano)
+
+    registros = {c: [] for c in combinaciones}
+    for i, (ruta, esperada) in enumerate(muestras, 1):
+        imagen = cv2.imread(ruta)
+        if imagen is None:
+            print(f"[Advertencia] No se pudo leer {ruta}")
+            continue
+        rafaga = generar_rafaga(imagen, max(tamanos), rng)
+
+        for combinacion in combinaciones:
+            vision.burst_size, vision.burst_vote, vision.burst_early_stop = combinacion
+            antes = vision.model.inferencias
+            inicio = time.perf_counter()
+            clase, _, _ = vision.classify_burst(frames=rafaga)
+            duracion = time.perf_counter() - inicio
+            registros[combinacion].append((
+                clase == esperada,
+                vision.last_burst_frames,
+                vision.model.inferencias - antes,
+                duracion
+            ))
+
+        if i % 25 == 0:
+            print(f"  ... {i}/{len(muestras)} ráfagas evaluadas")
+
+    resultados = {c: _resumen(r, fps) for c, r in registros.items() if r}
+    referencia = resultados[combinaciones[0]]['precision']
+
+    print(f"\n  {'Tamaño':>6} {'Voto':<9}{'Early':>6}{'Precisión':>10}{'Δ vs 1':>8}"
+          f"{'Frames':>7}{'Infer.':>7}{'Clasif. p50/p95 ms':>20}{'Total p50/p95 ms':>18}")
+    print("  " + "-" * 91)
+    for (tamano, voto, early_stop), r in resultados.items():
+        print(f"  {tamano:>6} {voto if tamano > 1 else '-':<9}{'sí' if early_stop else 'no':>6}"
+              f"{r['precision']:>10.1%}{r['precision'] - referencia:>+8.1%}"
+              f"{r['frames_medios']:>7.2f}{r['inferencias_medias']:>7.2f}"
+              f"{r['clasificacion_p50_ms']:>11.1f} / {r['clasificacion_p95_ms']:<6.1f}"
+              f"{r['total_p50_ms']:>9.1f} / {r['total_p95_ms']:<6.1f}")
+
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'config': {**CONFIG, 'MODELO': modelo, 'DATASET': dataset,
+                           'MUESTRAS_POR_CLASE': por_clase, 'TAMANOS': tamanos,
+                           'CONFIANZA': confianza},
+                'resultados': [
+                    {'tamano': t, 'voto': v, 'early_stop': e, **r}
+                    for (t, v, e), r in resultados.items()
+                ]
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n[OK] Resultados guardados en: {salida}")
+
+    return resultados
+
+
+def main():
+    """
+    Benchmark de clasificación en ráfaga
+    """
+    parser = argparse.ArgumentParser(description='Benchmark de clasificación en ráfaga de Eco-RVM')
+    parser.add_argument('--modelo', default=os.path.join(RAIZ, CONFIG['MODELO']))
+    parser.add_argument('--dataset', default=os.path.join(RAIZ, CONFIG['DATASET']))
+    parser.add_argument('--muestras', type=int, default=CONFIG['MUESTRAS_POR_CLASE'],
+                        help='Imágenes por clase')
+    parser.add_argument('--tamanos', default=','.join(str(t) for t in CONFIG['TAMANOS']),
+                        help='Tamaños de ráfaga separados por coma')
+    parser.add_argument('--confianza', type=float, default=CONFIG['CONFIANZA'],
+                        help='MIN_CONFIDENCE del controlador')
+    parser.add_argument('--salida', default=None, help='Archivo JSON de resultados')
+    args = parser.parse_args()
+
+    # Un solo frame siempre se incluye como referencia
+    tamanos = sorted({1} | {int(t) for t in args.tamanos.split(',') if t.strip()})
+    benchmark(args.modelo, args.dataset, args.muestras, tamanos, args.confianza, args.salida)
+
+
+if __name__ == "__main__":
+    main()
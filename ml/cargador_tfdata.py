@@ -0,0 +1,322 @@
+"""
+Cargador tf.data para Eco-RVM
+Alternativa a ImageDataGenerator: decodificación JPEG en
+paralelo, caché de las imágenes redimensionadas, Data Augmentation
+vectorizado por lote y prefetch.
+
+Lee las imágenes indicadas por el manifiesto del dataset, con el mismo
+split y el mismo orden de clases que IteradorManifiesto, de modo que los
+modelos entrenados con ambos cargadores son intercambiables.
+"""
+
+import os
+import math
+import time
+import argparse
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from manifiesto_dataset import MANIFIESTO_DEFECTO, IteradorManifiesto, listar_subset, obtener_manifiesto
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Configuración del cargador (valores por defecto de la línea de comandos)
+CONFIG = {
+    'DATASET_PATH': MANIFIESTO_DEFECTO,
+    'IMG_WIDTH': 224,
+    'IMG_HEIGHT': 224,
+    'BATCH_SIZE': 32,
+    'VALIDATION_SPLIT': 0.2,
+    'CACHE': '',            # '' = caché en memoria, ruta = caché en disco
+    'LOTES_BENCHMARK': 50
+}
+
+def _decodificar(ruta, etiqueta, img_size):
+    """Leer, decodificar y redimensionar una imagen (uint8 para la caché)"""
+    datos = tf.io.read_file(ruta)
+    imagen = tf.io.decode_image(datos, channels=3, expand_animations=False)
+    # 'nearest' es la interpolación por defecto de ImageDataGenerator
+    imagen = tf.image.resize(imagen, img_size, method='nearest')
+    return tf.cast(imagen, tf.uint8), etiqueta
+
+
+def _uniforme(n, limite):
+    """Valores uniformes en [-limite, limite] (ceros si limite es 0)"""
+    return tf.random.uniform([n], -limite, limite) if limite else tf.zeros([n])
+
+
+def crear_capa_augmentation(augmentacion, img_size):
+    """
+    Data Augmentation vectorizado equivalente a los parámetros de
+    ImageDataGenerator.
+
+    Como en ImageDataGenerator, rotación, desplazamiento, shear, zoom y flip
+    se combinan en una sola transformación afín por imagen; aquí se
+    construyen las matrices de todo el lote y se aplican en una única
+    llamada a ImageProjectiveTransformV3 (una sola interpolación por píxel,
+    en lugar de una por cada transformación).
+
+    Args:
+        augmentacion: dict con los argumentos de ImageDataGenerator
+            (rotation_range, width_shift_range, ..., brightness_range)
+        img_size: (alto, ancho) de las imágenes
+
+    Returns:
+        callable: funcion(lote float32 en [0, 1]) -> lote aumentado
+    """
+    alto, ancho = img_size
+    rotacion = math.radians(augmentacion.get('rotation_range', 0))
+    desp_x = augmentacion.get('width_shift_range', 0.0) * ancho
+    desp_y = augmentacion.get('height_shift_range', 0.0) * alto
+    # ImageDataGenerator interpreta shear_range en grados
+    shear = math.radians(augmentacion.get('shear_range', 0.0))
+    zoom = augmentacion.get('zoom_range', 0.0)
+    flip = augmentacion.get('horizontal_flip', False)
+    brillo = augmentacion.get('brightness_range')
+    relleno = augmentacion.get('fill_mode', 'nearest').upper()
+
+    cx, cy = (ancho - 1) / 2.0, (alto - 1) / 2.0
+
+    def aplicar(lote):
+        n = tf.shape(lote)[0]
+        uno, cero = tf.ones([n]), tf.zeros([n])
+
+        theta = _uniforme(n, rotacion)
+        tx, ty = _uniforme(n, desp_x), _uniforme(n, desp_y)
+        s = _uniforme(n, shear)
+        # Zoom independiente en cada eje, como ImageDataGenerator
+        zx = 1.0 + _uniforme(n, zoom)
+        zy = 1.0 + _uniforme(n, zoom)
+        if flip:
+            fx = tf.where(tf.random.uniform([n]) < 0.5, -1.0, 1.0)
+        else:
+            fx = uno
+
+        def matriz(filas):
+            return tf.reshape(tf.stack(filas, axis=1), [n, 3, 3])
+
+        # Mapeo salida → entrada, centrado en la imagen
+        centrar = matriz([uno, cero, uno * -cx, cero, uno, uno * -cy, cero, cero, uno])
+        volver = matriz([uno, cero, uno * cx, cero, uno, uno * cy, cero, cero, uno])
+        giro = matriz([tf.cos(theta), -tf.sin(theta), cero,
+                       tf.sin(theta), tf.cos(theta), cero, cero, cero, uno])
+        corte = matriz([uno, -tf.sin(s), cero, cero, tf.cos(s), cero, cero, cero, uno])
+        escala = matriz([zx * fx, cero, tx, cero, zy, ty, cero, cero, uno])
+
+        total = volver @ giro @ corte @ escala @ centrar
+        transformaciones = tf.concat(
+            [tf.reshape(total, [n, 9])[:, :6], tf.zeros([n, 2])], axis=1
+        )
+
+        lote = tf.raw_ops.ImageProjectiveTransformV3(
+            images=lote,
+            transforms=transformaciones,
+            output_shape=tf.constant([alto, ancho]),
+            fill_value=0.0,
+            interpolation='BILINEAR',
+            fill_mode=relleno
+        )
+
+        if brillo:
+            # Factor por imagen; se satura en blanco como con PIL
+            factores = tf.random.uniform([n, 1, 1, 1], brillo[0], brillo[1])
+            lote = tf.clip_by_value(lote * factores, 0.0, 1.0)
+        return lote
+
+    return aplicar
+
+
+def crear_dataset(
+    manifiesto,
+    subset,
+    img_size=(224, 224),
+    batch_size=32,
+    validation_split=0.2,
+    augmentacion=None,
+    cache='',
+    shuffle=True,
+    seed=42
+):
+    """
+    Crear un tf.data.Dataset de (lote float32 en [0, 1], etiquetas).
+
+    Orden de las etapas:
+        rutas → decodificación paralela → caché (uint8 redimensionado)
+        → shuffle → batch → augmentation vectorizado → prefetch
+
+    Args:
+        manifiesto: Manifiesto del dataset (dict, .json o carpeta por clase)
+        subset: 'training' o 'validation'
+        augmentacion: dict de Data Augmentation (None = sin aumento)
+        cache: '' para caché en memoria, una ruta para caché en disco,
+            None para no cachear
+
+    Returns:
+        tuple: (dataset, muestras, class_indices)
+    """
+    rutas, etiquetas, class_indices = listar_subset(
+        obtener_manifiesto(manifiesto), subset, validation_split
+    )
+
+    dataset = tf.data.Dataset.from_tensor_slices((rutas, etiquetas))
+    dataset = dataset.map(
+        lambda ruta, etiqueta: _decodificar(ruta, etiqueta, img_size),
+        num_parallel_calls=AUTOTUNE,
+        deterministic=True
+    )
+
+    if cache is not None:
+        # Sufijo por subset para que no se pisen las cachés en disco
+        dataset = dataset.cache(f"{cache}_{subset}" if cache else '')
+
+    if shuffle:
+        dataset = dataset.shuffle(len(rutas), seed=seed, reshuffle_each_iteration=True)
+
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(
+        lambda imagenes, y: (tf.cast(imagenes, tf.float32) / 255.0, y),
+        num_parallel_calls=AUTOTUNE
+    )
+
+    if augmentacion:
+        aumentar = crear_capa_augmentation(augmentacion, img_size)
+        dataset = dataset.map(
+            lambda imagenes, y: (aumentar(imagenes), y),
+            num_parallel_calls=AUTOTUNE
+        )
+
+    return dataset.prefetch(AUTOTUNE), len(rutas), class_indices
+
+
+def crear_datasets_tfdata(manifiesto, config, augmentacion):
+    """
+    Datasets de entrenamiento (con Data Augmentation) y validación (solo
+    rescalado) a partir del CONFIG de train_model.py
+
+    Returns:
+        tuple: (train_ds, val_ds, info) con info = {muestras_train,
+            muestras_val, class_indices}
+    """
+    comunes = dict(
+        img_size=(config['IMG_HEIGHT'], config['IMG_WIDTH']),
+        batch_size=config['BATCH_SIZE'],
+        validation_split=config['VALIDATION_SPLIT'],
+        cache=config.get('CACHE_TFDATA', '')
+    )
+
+    train_ds, n_train, class_indices = crear_dataset(
+        manifiesto, 'training', augmentacion=augmentacion, shuffle=True, **comunes
+    )
+    val_ds, n_val, _ = crear_dataset(
+        manifiesto, 'validation', augmentacion=None, shuffle=False, **comunes
+    )
+
+    info = {
+        'muestras_train': n_train,
+        'muestras_val': n_val,
+        'class_indices': class_indices
+    }
+    return train_ds, val_ds, info
+
+
+def _medir(iterable, lotes=None):
+    """Recorrer `lotes` lotes (None = todos) y devolver (imágenes, segundos)"""
+    imagenes = 0
+    inicio = time.perf_counter()
+    for i, (x, _) in enumerate(iterable):
+        if lotes is not None and i >= lotes:
+            break
+        imagenes += int(x.shape[0])
+    return imagenes, time.perf_counter() - inicio
+
+
+def benchmark_cargadores(manifiesto, augmentacion, lotes=50):
+    """
+    Comparar imágenes/segundo del subset de entrenamiento (con Data
+    Augmentation) entre ImageDataGenerator y tf.data.
+
+    tf.data se mide en su primera época completa (decodificación + llenado
+    de la caché) y después sobre `lotes` lotes ya servidos desde la caché.
+
+    Returns:
+        dict: {cargador: imagenes_por_segundo}
+    """
+    print("\n" + "=" * 70)
+    print("BENCHMARK DE CARGADORES")
+    print("=" * 70)
+
+    size = (CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT'])
+    resultados = {}
+
+    # 1. ImageDataGenerator (referencia)
+    datagen = ImageDataGenerator(
+        rescale=1./255,
+        validation_split=CONFIG['VALIDATION_SPLIT'],
+        **augmentacion
+    )
+    generador = IteradorManifiesto(
+        manifiesto,
+        datagen,
+        subset='training',
+        target_size=size,
+        batch_size=CONFIG['BATCH_SIZE'],
+        shuffle=True,
+        seed=42,
+        validation_split=CONFIG['VALIDATION_SPLIT']
+    )
+    lotes_gen = min(lotes, len(generador))
+    imagenes, segundos = _medir((generador[i] for i in range(lotes_gen)))
+    resultados['ImageDataGenerator'] = imagenes / segundos
+
+    # 2. tf.data: primera época (decodificación + caché) y épocas siguientes
+    dataset, muestras, _ = crear_dataset(
+        manifiesto, 'training',
+        img_size=(CONFIG['IMG_HEIGHT'], CONFIG['IMG_WIDTH']),
+        batch_size=CONFIG['BATCH_SIZE'],
+        validation_split=CONFIG['VALIDATION_SPLIT'],
+        augmentacion=augmentacion,
+        cache=CONFIG['CACHE']
+    )
+    imagenes, segundos = _medir(dataset)
+    resultados['tf.data (1ª época)'] = imagenes / segundos
+
+    imagenes, segundos = _medir(dataset, lotes)
+    resultados['tf.data (caché)'] = imagenes / segundos
+
+    referencia = resultados['ImageDataGenerator']
+    print(f"\n  Imágenes de entrenamiento: {muestras} | Batch: {CONFIG['BATCH_SIZE']}")
+    print(f"\n  {'Cargador':<22}{'img/s':>10}{'vs generador':>16}")
+    print("  " + "-" * 48)
+    for nombre, velocidad in resultados.items():
+        print(f"  {nombre:<22}{velocidad:>10.1f}{velocidad / referencia:>15.2f}x")
+
+    return resultados
+
+
+def main():
+    """
+    Benchmark del cargador tf.data contra ImageDataGenerator
+    """
+    parser = argparse.ArgumentParser(description='Benchmark del cargador tf.data de Eco-RVM')
+    parser.add_argument('--dataset', default=CONFIG['DATASET_PATH'],
+                        help='Manifiesto (.json) o carpeta con una subcarpeta por clase')
+    parser.add_argument('--lotes', type=int, default=CONFIG['LOTES_BENCHMARK'],
+                        help='Lotes a medir por cargador')
+    parser.add_argument('--batch', type=int, default=CONFIG['BATCH_SIZE'], help='Tamaño de lote')
+    parser.add_argument('--cache', default=CONFIG['CACHE'],
+                        help="Ruta de caché en disco ('' = memoria)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.dataset):
+        print(f"[Error] No se encuentra el dataset: {args.dataset}")
+        return
+
+    CONFIG['BATCH_SIZE'] = args.batch
+    CONFIG['CACHE'] = args.cache
+
+    # Mismos parámetros de aumento que el entrenamiento
+    from train_model import AUGMENTATION
+    benchmark_cargadores(obtener_manifiesto(args.dataset), AUGMENTATION, args.lotes)
+
+
+if __name__ == "__main__":
+    main()
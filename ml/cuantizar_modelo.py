@@ -0,0 +1,357 @@
+"""
+Cuantización Post-Entrenamiento para Eco-RVM
+Genera variantes TFLite (float32, rango dinámico, float16 e int8), las evalúa
+sobre el split de validación y elige la más rápida dentro de una tolerancia
+de accuracy respecto a float32.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from manifiesto_dataset import MANIFIESTO_DEFECTO, IteradorManifiesto, obtener_manifiesto
+
+# Configuración de la cuantización
+CONFIG = {
+    'MODELO': 'modelo_reciclaje.h5',
+    'DATASET_PATH': MANIFIESTO_DEFECTO,
+    'IMG_WIDTH': 224,
+    'IMG_HEIGHT': 224,
+    'VALIDATION_SPLIT': 0.2,
+    'MUESTRAS_REPRESENTATIVAS': 200,  # Imágenes de entrenamiento para calibrar int8
+    'MAX_VALIDACION': None,           # Limitar imágenes evaluadas (None = todas)
+    'TOLERANCIA_ACCURACY': 0.01,      # Pérdida máxima de accuracy aceptada vs float32
+    'HILOS': 1,                       # Hilos del intérprete (placas del kiosco)
+    'UMBRAL': 0.5
+}
+
+# Variantes generadas: nombre -> sufijo del archivo
+VARIANTES = {
+    'float32': '',
+    'dinamico': '_dinamico',
+    'float16': '_float16',
+    'int8': '_int8'
+}
+
+
+def _generador(manifiesto, subset, shuffle, batch_size=32):
+    """Generador con el mismo split (y orden de clases) que el entrenamiento"""
+    datagen = ImageDataGenerator(rescale=1./255)
+    return IteradorManifiesto(
+        manifiesto,
+        datagen,
+        subset=subset,
+        target_size=(CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT']),
+        batch_size=batch_size,
+        shuffle=shuffle,
+        seed=42,
+        validation_split=CONFIG['VALIDATION_SPLIT']
+    )
+
+
+def cargar_validacion(manifiesto, maximo=None):
+    """
+    Cargar el split de validación en memoria como uint8 (4x menos que float32).
+
+    Returns:
+        tuple: (imagenes uint8 (N, H, W, 3), etiquetas (N,), class_indices)
+    """
+    # Con límite se toma una muestra al azar para no quedarse con una sola clase
+    generador = _generador(manifiesto, 'validation', shuffle=bool(maximo))
+    total = generador.samples if not maximo else min(maximo, generador.samples)
+
+    imagenes = np.empty((total, CONFIG['IMG_HEIGHT'], CONFIG['IMG_WIDTH'], 3), dtype=np.uint8)
+    etiquetas = np.empty(total, dtype=np.float32)
+
+    cargadas = 0
+    for x, y in generador:
+        n = min(len(x), total - cargadas)
+        imagenes[cargadas:cargadas + n] = np.round(x[:n] * 255).astype(np.uint8)
+        etiquetas[cargadas:cargadas + n] = y[:n]
+        cargadas += n
+        if cargadas >= total:
+            break
+
+    return imagenes, etiquetas, generador.class_indices
+
+
+def dataset_representativo(manifiesto, muestras):
+    """
+    Generador de calibración para int8: imágenes del split de entrenamiento
+    preprocesadas igual que en inferencia ([0, 1], float32).
+    """
+    generador = _generador(manifiesto, 'training', shuffle=True, batch_size=1)
+    total = min(muestras, generador.samples)
+
+    def _representativo():
+        for i in range(total):
+            x, _ = generador[i]
+            yield [x.astype(np.float32)]
+
+    return _representativo
+
+
+def convertir_variante(modelo, variante, representativo=None):
+    """
+    Convertir el modelo Keras a TFLite.
+
+    Args:
+        modelo: Modelo Keras cargado
+        variante: 'float32', 'dinamico', 'float16' o 'int8'
+        representativo: Generador de calibración (requerido para int8)
+
+    Returns:
+        bytes: Modelo TFLite serializado
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(modelo)
+
+    if variante == 'dinamico':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variante == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variante == 'int8':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representativo
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def _crear_interprete(ruta, hilos):
+    """Intérprete LiteRT si está instalado, si no tf.lite"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=ruta, num_threads=hilos)
+
+
+def evaluar_tflite(ruta, imagenes, etiquetas, hilos=1, umbral=0.5):
+    """
+    Evaluar un modelo TFLite imagen por imagen (como en el kiosco).
+
+    Returns:
+        dict: accuracy, precision, recall, tamaño y latencias p50/p99 (ms)
+    """
+    interprete = _crear_interprete(ruta, hilos)
+    interprete.allocate_tensors()
+    entrada = interprete.get_input_details()[0]
+    salida = interprete.get_output_details()[0]
+
+    escala_in, cero_in = entrada['quantization']
+    escala_out, cero_out = salida['quantization']
+    cuantizada = entrada['dtype'] != np.float32
+
+    probabilidades = np.empty(len(imagenes), dtype=np.float32)
+    latencias = np.empty(len(imagenes), dtype=np.float64)
+
+    for i, imagen in enumerate(imagenes):
+        x = imagen[np.newaxis].astype(np.float32) / 255.0
+        if cuantizada:
+            info = np.iinfo(entrada['dtype'])
+            x = np.clip(np.round(x / escala_in + cero_in), info.min, info.max).astype(entrada['dtype'])
+
+        inicio = time.perf_counter()
+        interprete.set_tensor(entrada['index'], x)
+        interprete.invoke()
+        y = interprete.get_tensor(salida['index'])
+        latencias[i] = time.perf_counter() - inicio
+
+        if salida['dtype'] != np.float32:
+            y = (y.astype(np.float32) - cero_out) * escala_out
+        probabilidades[i] = float(y.reshape(-1)[-1])
+
+    predicciones = (probabilidades >= umbral).astype(np.float32)
+    vp = float(np.sum((predicciones == 1) & (etiquetas == 1)))
+    fp = float(np.sum((predicciones == 1) & (etiquetas == 0)))
+    fn = float(np.sum((predicciones == 0) & (etiquetas == 1)))
+
+    return {
+        'accuracy': float(np.mean(predicciones == etiquetas)),
+        'precision': vp / (vp + fp) if vp + fp else 0.0,
+        'recall': vp / (vp + fn) if vp + fn else 0.0,
+        'tamano_mb': os.path.getsize(ruta) / (1024 * 1024),
+        'latencia_p50_ms': float(np.percentile(latencias, 50) * 1000),
+        'latencia_p99_ms': float(np.percentile(latencias, 99) * 1000)
+    }
+
+
+def elegir_variante(resultados, tolerancia):
+    """
+    Elegir la variante más rápida (p50) cuya accuracy no baje más de
+    `tolerancia` respecto a float32.
+
+    Returns:
+        str: Nombre de la variante elegida
+    """
+    referencia = resultados['float32']['accuracy']
+    candidatas = [
+        nombre for nombre, r in resultados.items()
+        if r['accuracy'] >= referencia - tolerancia
+    ]
+    return min(candidatas, key=lambda nombre: resultados[nombre]['latencia_p50_ms'])
+
+
+def imprimir_tabla(resultados, elegida):
+    """Tabla comparativa en consola"""
+    print("\n" + "=" * 70)
+    print("COMPARACIÓN DE VARIANTES")
+    print("=" * 70)
+    print(f"  {'Variante':10s} {'Acc':>7s} {'Prec':>7s} {'Recall':>7s} "
+          f"{'MB':>7s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    print("-" * 70)
+    for nombre, r in resultados.items():
+        marca = '  <- elegida' if nombre == elegida else ''
+        print(f"  {nombre:10s} {r['accuracy']:7.4f} {r['precision']:7.4f} {r['recall']:7.4f} "
+              f"{r['tamano_mb']:7.2f} {r['latencia_p50_ms']:8.2f} {r['latencia_p99_ms']:8.2f}{marca}")
+
+
+def escribir_reporte(ruta_base, resultados, elegida, class_indices, n_validacion):
+    """
+    Guardar la comparación en Markdown y JSON junto al modelo.
+
+    Returns:
+        tuple: (ruta_md, ruta_json)
+    """
+    ruta_md = f"{ruta_base}_cuantizacion.md"
+    ruta_json = f"{ruta_base}_cuantizacion.json"
+
+    lineas = [
+        "# Cuantización post-entrenamiento",
+        "",
+        f"- Imágenes de validación: {n_validacion}",
+        f"- Clases: {class_indices} (precision/recall sobre la clase 1)",
+        f"- Tolerancia de accuracy: {CONFIG['TOLERANCIA_ACCURACY']}",
+        f"- Hilos del intérprete: {CONFIG['HILOS']}",
+        f"- Variante elegida: **{elegida}** (`{resultados[elegida]['archivo']}`)",
+        "",
+        "| Variante | Accuracy | Precision | Recall | Tamaño (MB) | p50 (ms) | p99 (ms) |",
+        "|----------|----------|-----------|--------|-------------|----------|----------|",
+    ]
+    for nombre, r in resultados.items():
+        lineas.append(
+            f"| {nombre} | {r['accuracy']:.4f} | {r['precision']:.4f} | {r['recall']:.4f} | "
+            f"{r['tamano_mb']:.2f} | {r['latencia_p50_ms']:.2f} | {r['latencia_p99_ms']:.2f} |"
+        )
+
+    with open(ruta_md, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lineas) + "\n")
+
+    with open(ruta_json, 'w', encoding='utf-8') as f:
+        json.dump({
+            'elegida': elegida,
+            'tolerancia_accuracy': CONFIG['TOLERANCIA_ACCURACY'],
+            'hilos': CONFIG['HILOS'],
+            'imagenes_validacion': n_validacion,
+            'class_indices': class_indices,
+            'variantes': resultados
+        }, f, indent=2, ensure_ascii=False)
+
+    return ruta_md, ruta_json
+
+
+def cuantizar_modelo(modelo, nombre_archivo, dataset=None):
+    """
+    Generar, evaluar y comparar las variantes cuantizadas de un modelo.
+
+    Args:
+        modelo: Modelo Keras entrenado
+        nombre_archivo: Ruta del .h5 (las variantes se guardan a su lado)
+        dataset: Manifiesto (dict o .json) o carpeta con una subcarpeta por
+            clase (default: CONFIG['DATASET_PATH'])
+
+    Returns:
+        tuple: (variante_elegida, resultados)
+    """
+    manifiesto = obtener_manifiesto(dataset or CONFIG['DATASET_PATH'])
+    ruta_base = os.path.splitext(nombre_archivo)[0]
+
+    print("\n" + "=" * 70)
+    print("CUANTIZACIÓN POST-ENTRENAMIENTO")
+    print("=" * 70)
+
+    imagenes, etiquetas, class_indices = cargar_validacion(
+        manifiesto,
+        CONFIG['MAX_VALIDACION']
+    )
+    print(f"  Validación: {len(imagenes)} imágenes, clases {class_indices}")
+
+    representativo = dataset_representativo(manifiesto, CONFIG['MUESTRAS_REPRESENTATIVAS'])
+
+    resultados = {}
+    for variante, sufijo in VARIANTES.items():
+        ruta = f"{ruta_base}{sufijo}.tflite"
+        print(f"\n  [{variante}] Convirtiendo...")
+        try:
+            tflite_model = convertir_variante(modelo, variante, representativo)
+        except Exception as e:
+            print(f"  [Advertencia] No se pudo generar {variante}: {e}")
+            continue
+
+        with open(ruta, 'wb') as f:
+            f.write(tflite_model)
+
+        print(f"  [{variante}] Evaluando {ruta}...")
+        resultados[variante] = evaluar_tflite(
+            ruta, imagenes, etiquetas,
+            hilos=CONFIG['HILOS'],
+            umbral=CONFIG['UMBRAL']
+        )
+        resultados[variante]['archivo'] = os.path.basename(ruta)
+
+    if 'float32' not in resultados:
+        print("[Error] No se pudo generar la variante de referencia float32")
+        return None, resultados
+
+    elegida = elegir_variante(resultados, CONFIG['TOLERANCIA_ACCURACY'])
+    imprimir_tabla(resultados, elegida)
+
+    ruta_md, ruta_json = escribir_reporte(
+        ruta_base, resultados, elegida, class_indices, len(imagenes)
+    )
+    print(f"\n[OK] Reporte guardado en: {ruta_md} y {ruta_json}")
+    print(f"[OK] Para el kiosco usar MODEL_PATH={resultados[elegida]['archivo']}")
+
+    return elegida, resultados
+
+
+def main():
+    """
+    Cuantizar un modelo ya entrenado
+    """
+    parser = argparse.ArgumentParser(description='Cuantización post-entrenamiento de Eco-RVM')
+    parser.add_argument('--modelo', default=CONFIG['MODELO'], help='Modelo Keras (.h5)')
+    parser.add_argument('--dataset', default=CONFIG['DATASET_PATH'], help='Manifiesto (.json) o carpeta con una subcarpeta por clase')
+    parser.add_argument('--tolerancia', type=float, default=CONFIG['TOLERANCIA_ACCURACY'],
+                        help='Pérdida máxima de accuracy vs float32')
+    parser.add_argument('--hilos', type=int, default=CONFIG['HILOS'],
+                        help='Hilos del intérprete para medir latencia')
+    parser.add_argument('--max-validacion', type=int, default=CONFIG['MAX_VALIDACION'],
+                        help='Limitar imágenes de validación evaluadas')
+    args = parser.parse_args()
+
+    CONFIG['TOLERANCIA_ACCURACY'] = args.tolerancia
+    CONFIG['HILOS'] = args.hilos
+    CONFIG['MAX_VALIDACION'] = args.max_validacion
+
+    if not os.path.exists(args.modelo):
+        print(f"[Error] No se encontró el modelo: {args.modelo}")
+        sys.exit(1)
+
+    if not os.path.exists(args.dataset):
+        print(f"[Error] No se encontró el dataset: {args.dataset}")
+        sys.exit(1)
+
+    modelo = tf.keras.models.load_model(args.modelo)
+    cuantizar_modelo(modelo, args.modelo, args.dataset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Escaneo del Dataset para Eco-RVM
+Valida que cada imagen del manifiesto se pueda decodificar, calcula su hash
+perceptual (pHash de 64 bits) y detecta casi-duplicados con un BK-tree
+sobre la distancia de Hamming. Genera un manifiesto limpio (sin corruptos
+ni duplicados) y un reporte.
+
+El análisis de imágenes se reparte entre todos los núcleos y se guarda en
+una caché por hash de contenido, de modo que al volver a escanear solo se
+procesan las imágenes nuevas o modificadas.
+"""
+
+import os
+import json
+import time
+import argparse
+from multiprocessing import Pool
+import numpy as np
+from PIL import Image
+
+# Sin importar manifiesto_dataset (y TensorFlow) a nivel de módulo: con el
+# método 'spawn' (Windows/macOS) cada proceso del pool reimporta este archivo
+MANIFIESTO_DEFECTO = 'dataset-manifiesto.json'
+
+# Configuración del escaneo
+CONFIG = {
+    'MANIFIESTO': MANIFIESTO_DEFECTO,
+    'SALIDA': 'dataset-manifiesto-limpio.json',
+    'CACHE': 'dataset-escaneo-cache.json',
+    'DISTANCIA_MAXIMA': 6,   # Bits distintos (de 64) para considerar casi-duplicado
+    'PROCESOS': None,        # None = todos los núcleos
+    'CHUNKSIZE': 64
+}
+
+
+def _matriz_dct(n):
+    """Matriz de la DCT-II de tamaño n (la DCT 2D es D @ X @ D.T)"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+
+
+_DCT_32 = _matriz_dct(32)
+
+
+def phash(imagen):
+    """
+    Hash perceptual (pHash) de 64 bits: signo respecto de la mediana de las
+    8x8 frecuencias más bajas de la DCT de una miniatura en grises de 32x32.
+
+    Más selectivo que un hash de diferencias para fotos sobre el mismo fondo
+    (como las de TrashNet o las de la bandeja del kiosco).
+    """
+    gris = imagen.convert('L').resize((32, 32), Image.LANCZOS)
+    coeficientes = (_DCT_32 @ np.asarray(gris, dtype=np.float64) @ _DCT_32.T)[:8, :8].flatten()
+    # El término DC (brillo medio) no entra en la mediana
+    bits = coeficientes > np.median(coeficientes[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def analizar_imagen(tarea):
+    """
+    Decodificar una imagen completa y calcular su pHash (se ejecuta en los
+    procesos del pool).
+
+    Args:
+        tarea: (ruta relativa, ruta absoluta)
+
+    Returns:
+        tuple: (ruta relativa, phash o None, error o None)
+    """
+    relativa, ruta = tarea
+    try:
+        with Image.open(ruta) as imagen:
+            # Decodificar a escala reducida: el flujo JPEG se lee completo
+            # (un archivo truncado falla igual) pero con mucho menos cómputo
+            imagen.draft('RGB', (128, 128))
+            imagen.load()
+            return relativa, phash(imagen), None
+    except Exception as e:
+        return relativa, None, f"{type(e).__name__}: {e}"
+
+
+def distancia_hamming(a, b):
+    """Bits distintos entre dos hashes"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    BK-tree sobre la distancia de Hamming. Permite buscar todos los hashes a
+    distancia <= d sin comparar contra el índice completo: por la
+    desigualdad triangular solo se visitan los hijos con arista en
+    [dist - d, dist + d].
+    """
+
+    def __init__(self):
+        self.raiz = None
+        self.tamano = 0
+
+    def agregar(self, valor, dato):
+        """Insertar un hash con su dato asociado"""
+        self.tamano += 1
+        if self.raiz is None:
+            self.raiz = (valor, dato, {})
+            return
+
+        nodo = self.raiz
+        while True:
+            d = distancia_hamming(valor, nodo[0])
+            hijo = nodo[2].get(d)
+            if hijo is None:
+                nodo[2][d] = (valor, dato, {})
+                return
+            nodo = hijo
+
+    def buscar(self, valor, maxima):
+        """
+        Hashes a distancia <= maxima.
+
+        Returns:
+            list: [(distancia, dato)] ordenada por distancia
+        """
+        if self.raiz is None:
+            return []
+
+        encontrados = []
+        pendientes = [self.raiz]
+        while pendientes:
+            nodo = pendientes.pop()
+            d = distancia_hamming(valor, nodo[0])
+            if d <= maxima:
+                encontrados.append((d, nodo[1]))
+            for arista, hijo in nodo[2].items():
+                if d - maxima <= arista <= d + maxima:
+                    pendientes.append(hijo)
+
+        return sorted(encontrados, key=lambda item: item[0])
+
+
+def _cargar_cache(ruta):
+    if ruta and os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _guardar_cache(ruta, cache):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(temporal, ruta)
+
+
+def analizar_manifiesto(manifiesto, procesos=None, ruta_cache=None, chunksize=64):
+    """
+    Validar y calcular el pHash de todas las imágenes del manifiesto.
+
+    Las imágenes ya analizadas (mismo SHA-1 de contenido) se toman de la
+    caché; el resto se reparte entre `procesos` procesos.
+
+    Returns:
+        dict: {ruta relativa: {'phash': hex o None, 'error': str o None}}
+    """
+    from manifiesto_dataset import raiz_dataset
+
+    raiz = raiz_dataset(manifiesto)
+    cache = _cargar_cache(ruta_cache)
+
+    resultados = {}
+    pendientes = []
+    sha_por_ruta = {}
+    for archivo in manifiesto['archivos']:
+        previo = cache.get(archivo['hash'])
+        if previo is not None:
+            resultados[archivo['ruta']] = previo
+        else:
+            sha_por_ruta[archivo['ruta']] = archivo['hash']
+            pendientes.append((archivo['ruta'], os.path.join(raiz, archivo['ruta'])))
+
+    print(f"  En caché: {len(resultados)} | A analizar: {len(pendientes)}")
+
+    if pendientes:
+        inicio = time.perf_counter()
+        with Pool(processes=procesos) as pool:
+            for i, (relativa, valor, error) in enumerate(
+                pool.imap_unordered(analizar_imagen, pendientes, chunksize=chunksize), 1
+            ):
+                # El hash se guarda como texto hexadecimal en el JSON
+                entrada = {'phash': f"{valor:016x}" if valor is not None else None, 'error': error}
+                resultados[relativa] = entrada
+                cache[sha_por_ruta[relativa]] = entrada
+                if i % 5000 == 0:
+                    print(f"  ... {i}/{len(pendientes)} imágenes")
+
+        segundos = time.perf_counter() - inicio
+        print(f"  Analizadas {len(pendientes)} imágenes en {segundos:.1f}s "
+              f"({len(pendientes) / segundos:.0f} img/s)")
+
+        if ruta_cache:
+            _guardar_cache(ruta_cache, cache)
+
+    return resultados
+
+
+def buscar_duplicados(manifiesto, analisis, distancia_maxima):
+    """
+    Recorrer las imágenes válidas en orden y conservar la primera de cada
+    grupo de casi-duplicados.
+
+    Primero se descartan los duplicados exactos (mismo SHA-1) y luego los
+    casi-duplicados con el BK-tree. Un casi-duplicado con distinta clase
+    mapeada se registra además como conflicto de etiqueta.
+
+    Returns:
+        tuple: (duplicados, conflictos) como listas de dicts
+    """
+    arbol = BKTree()
+    por_sha = {}
+    duplicados, conflictos = [], []
+
+    for archivo in sorted(manifiesto['archivos'], key=lambda a: a['ruta']):
+        info = analisis.get(archivo['ruta'])
+        if not info or info['error']:
+            continue
+
+        original = por_sha.get(archivo['hash'])
+        distancia = 0
+        if original is None:
+            valor = int(info['phash'], 16)
+            vecinos = arbol.buscar(valor, distancia_maxima)
+            if vecinos:
+                distancia, original = vecinos[0]
+            else:
+                arbol.agregar(valor, archivo)
+                por_sha[archivo['hash']] = archivo
+                continue
+
+        registro = {
+            'ruta': archivo['ruta'],
+            'original': original['ruta'],
+            'distancia': distancia
+        }
+        duplicados.append(registro)
+        if original['clase'] != archivo['clase']:
+            conflictos.append(dict(registro, clases=[original['clase'], archivo['clase']]))
+
+    return duplicados, conflictos
+
+
+def escanear_dataset(manifiesto, ruta_salida=None, distancia_maxima=None, procesos=None):
+    """
+    Escanear el dataset y guardar el manifiesto limpio y su reporte.
+
+    Args:
+        manifiesto: Manifiesto (dict, .json o carpeta con una subcarpeta por clase)
+        ruta_salida: Manifiesto limpio (default: CONFIG['SALIDA'])
+        distancia_maxima: Umbral de Hamming (default: CONFIG['DISTANCIA_MAXIMA'])
+        procesos: Procesos del pool (default: todos los núcleos)
+
+    Returns:
+        dict: Manifiesto limpio
+    """
+    from manifiesto_dataset import obtener_manifiesto, filtrar_manifiesto
+
+    ruta_salida = ruta_salida or CONFIG['SALIDA']
+    distancia_maxima = CONFIG['DISTANCIA_MAXIMA'] if distancia_maxima is None else distancia_maxima
+
+    print("\n" + "=" * 70)
+    print("ESCANEO DEL DATASET (CORRUPTOS Y CASI-DUPLICADOS)")
+    print("=" * 70)
+
+    manifiesto = obtener_manifiesto(manifiesto)
+    analisis = analizar_manifiesto(
+        manifiesto,
+        procesos=procesos or CONFIG['PROCESOS'],
+        ruta_cache=CONFIG['CACHE'],
+        chunksize=CONFIG['CHUNKSIZE']
+    )
+
+    corruptos = [
+        {'ruta': ruta, 'error': info['error']}
+        for ruta, info in sorted(analisis.items()) if info['error']
+    ]
+    duplicados, conflictos = buscar_duplicados(manifiesto, analisis, distancia_maxima)
+
+    excluir = {c['ruta'] for c in corruptos} | {d['ruta'] for d in duplicados}
+    limpio = filtrar_manifiesto(manifiesto, excluir, ruta_salida)
+
+    ruta_reporte = os.path.splitext(ruta_salida)[0] + '_reporte.json'
+    with open(ruta_reporte, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'distancia_maxima': distancia_maxima,
+            'total': len(manifiesto['archivos']),
+            'conservados': len(limpio['archivos']),
+            'corruptos': corruptos,
+            'duplicados': duplicados,
+            'conflictos_etiqueta': conflictos
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"\n  Total: {len(manifiesto['archivos'])} | Corruptos: {len(corruptos)} | "
+          f"Duplicados: {len(duplicados)} | Conservados: {len(limpio['archivos'])}")
+    for corrupto in corruptos[:10]:
+        print(f"  [Advertencia] Imagen corrupta: {corrupto['ruta']} ({corrupto['error']})")
+    if conflictos:
+        print(f"  [Advertencia] {len(conflictos)} casi-duplicados con distinta clase (ver reporte)")
+    print(f"[OK] Manifiesto limpio: {ruta_salida}")
+    print(f"[OK] Reporte: {ruta_reporte}")
+
+    return limpio
+
+
+def main():
+    """
+    Escanear un manifiesto y generar su versión limpia
+    """
+    parser = argparse.ArgumentParser(description='Escaneo de corruptos y casi-duplicados de Eco-RVM')
+    parser.add_argument('--manifiesto', default=CONFIG['MANIFIESTO'],
+                        help='Manifiesto (.json) o carpeta con una subcarpeta por clase')
+    parser.add_argument('--salida', default=CONFIG['SALIDA'], help='Manifiesto limpio')
+    parser.add_argument('--distancia', type=int, default=CONFIG['DISTANCIA_MAXIMA'],
+                        help='Distancia de Hamming máxima entre casi-duplicados')
+    parser.add_argument('--procesos', type=int, default=CONFIG['PROCESOS'],
+                        help='Procesos de análisis (default: todos los núcleos)')
+    parser.add_argument('--cache', default=CONFIG['CACHE'], help='Caché de análisis')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifiesto):
+        print(f"[Error] No se encontró el manifiesto: {args.manifiesto}")
+        return
+
+    CONFIG['CACHE'] = args.cache
+    escanear_dataset(args.manifiesto, args.salida, args.distancia, args.procesos)
+
+
+if __name__ == "__main__":
+    main()
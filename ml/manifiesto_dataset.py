@@ -0,0 +1,300 @@
+"""
+Manifiesto del Dataset para Eco-RVM
+Índice de las imágenes originales (ruta, clase original, clase mapeada, hash)
+que reemplaza a la copia física en `dataset-binario/`: el entrenamiento lee
+directamente de `dataset-resized/` aplicando MAPEO_CLASES en memoria.
+
+El manifiesto se actualiza de forma incremental: solo se leen (y se calcula
+el hash de) los archivos nuevos o cuyo tamaño o fecha de modificación
+cambió desde la última vez.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+from tensorflow.keras.preprocessing.image import Iterator, load_img, img_to_array
+
+# Manifiesto por defecto (junto al script de entrenamiento)
+MANIFIESTO_DEFECTO = 'dataset-manifiesto.json'
+VERSION = 1
+
+# Extensiones consideradas imágenes del dataset
+EXTENSIONES = ('.jpg', '.jpeg', '.png')
+
+
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-1 del contenido de un archivo"""
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(bloque), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def raiz_dataset(manifiesto):
+    """Carpeta del dataset (se guarda relativa al manifiesto)"""
+    base = os.path.dirname(os.path.abspath(manifiesto.get('_ruta', MANIFIESTO_DEFECTO)))
+    return os.path.normpath(os.path.join(base, manifiesto['raiz']))
+
+
+def cargar_manifiesto(ruta_manifiesto):
+    """
+    Leer un manifiesto del disco.
+
+    Returns:
+        dict o None: Manifiesto, o None si no existe o es de otra versión
+    """
+    if not os.path.exists(ruta_manifiesto):
+        return None
+    with open(ruta_manifiesto, encoding='utf-8') as f:
+        manifiesto = json.load(f)
+    if manifiesto.get('version') != VERSION:
+        return None
+    manifiesto['_ruta'] = ruta_manifiesto
+    return manifiesto
+
+
+def guardar_manifiesto(manifiesto, ruta_manifiesto):
+    """Escribir el manifiesto de forma atómica (archivo temporal + reemplazo)"""
+    datos = {k: v for k, v in manifiesto.items() if not k.startswith('_')}
+    temporal = f"{ruta_manifiesto}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=1, ensure_ascii=False)
+    os.replace(temporal, ruta_manifiesto)
+    manifiesto['_ruta'] = ruta_manifiesto
+
+
+def actualizar_manifiesto(dataset_path, mapeo=None, ruta_manifiesto=MANIFIESTO_DEFECTO):
+    """
+    Crear o actualizar el manifiesto de un dataset con una subcarpeta por
+    clase original.
+
+    Args:
+        dataset_path: Carpeta del dataset original (p. ej. dataset-resized)
+        mapeo: dict {clase_original: clase_final}. Solo se indexan las
+            carpetas del mapeo; None = cada carpeta es su propia clase.
+        ruta_manifiesto: Archivo JSON del manifiesto
+
+    Returns:
+        dict: Manifiesto actualizado
+    """
+    print("\n" + "=" * 70)
+    print("MANIFIESTO DEL DATASET")
+    print("=" * 70)
+
+    anterior = cargar_manifiesto(ruta_manifiesto)
+    previos = {}
+    if anterior and os.path.normpath(raiz_dataset(anterior)) == os.path.abspath(dataset_path):
+        previos = {a['ruta']: a for a in anterior['archivos']}
+
+    if mapeo is None:
+        carpetas = sorted(
+            d for d in os.listdir(dataset_path)
+            if os.path.isdir(os.path.join(dataset_path, d))
+        )
+        mapeo = {carpeta: carpeta for carpeta in carpetas}
+
+    archivos = []
+    conteo = {'nuevos': 0, 'modificados': 0, 'sin_cambios': 0}
+
+    for clase_original in sorted(mapeo):
+        carpeta = os.path.join(dataset_path, clase_original)
+        if not os.path.isdir(carpeta):
+            continue
+
+        for nombre in sorted(os.listdir(carpeta)):
+            if not nombre.lower().endswith(EXTENSIONES):
+                continue
+
+            relativa = f"{clase_original}/{nombre}"
+            info = os.stat(os.path.join(carpeta, nombre))
+            previo = previos.pop(relativa, None)
+
+            if previo and previo['tamano'] == info.st_size and previo['mtime_ns'] == info.st_mtime_ns:
+                digest = previo['hash']
+                conteo['sin_cambios'] += 1
+            else:
+                digest = hash_archivo(os.path.join(carpeta, nombre))
+                conteo['modificados' if previo else 'nuevos'] += 1
+
+            archivos.append({
+                'ruta': relativa,
+                'clase_original': clase_original,
+                'clase': mapeo[clase_original],
+                'hash': digest,
+                'tamano': info.st_size,
+                'mtime_ns': info.st_mtime_ns
+            })
+
+    conteo['eliminados'] = len(previos)
+
+    manifiesto = {
+        'version': VERSION,
+        'raiz': os.path.relpath(
+            os.path.abspath(dataset_path),
+            os.path.dirname(os.path.abspath(ruta_manifiesto))
+        ),
+        'mapeo': mapeo,
+        'archivos': archivos
+    }
+
+    cambios = conteo['nuevos'] + conteo['modificados'] + conteo['eliminados']
+    if anterior is None or cambios or anterior.get('mapeo') != mapeo or anterior.get('raiz') != manifiesto['raiz']:
+        guardar_manifiesto(manifiesto, ruta_manifiesto)
+    else:
+        manifiesto['_ruta'] = ruta_manifiesto
+
+    print(f"  Archivos indexados: {len(archivos)}")
+    print(f"  Nuevos: {conteo['nuevos']} | Modificados: {conteo['modificados']} | "
+          f"Eliminados: {conteo['eliminados']} | Sin cambios: {conteo['sin_cambios']}")
+    print(f"[OK] Manifiesto: {ruta_manifiesto}")
+
+    return manifiesto
+
+
+def filtrar_manifiesto(manifiesto, excluir, ruta_salida):
+    """
+    Guardar una copia del manifiesto sin los archivos indicados.
+
+    Args:
+        manifiesto: Manifiesto de origen (dict)
+        excluir: Conjunto de rutas relativas a descartar
+        ruta_salida: Archivo JSON del manifiesto filtrado
+
+    Returns:
+        dict: Manifiesto filtrado
+    """
+    filtrado = {
+        'version': VERSION,
+        'raiz': os.path.relpath(
+            raiz_dataset(manifiesto),
+            os.path.dirname(os.path.abspath(ruta_salida))
+        ),
+        'mapeo': manifiesto['mapeo'],
+        'archivos': [a for a in manifiesto['archivos'] if a['ruta'] not in excluir]
+    }
+    guardar_manifiesto(filtrado, ruta_salida)
+    return filtrado
+
+
+def obtener_manifiesto(origen):
+    """
+    Normalizar el origen de datos a un manifiesto.
+
+    Args:
+        origen: Manifiesto (dict), ruta a un manifiesto .json, o carpeta con
+            una subcarpeta por clase (se indexa en <carpeta>/.manifiesto.json)
+
+    Raises:
+        FileNotFoundError: Si el origen no existe
+    """
+    if isinstance(origen, dict):
+        return origen
+    if os.path.isdir(origen):
+        return actualizar_manifiesto(origen, None, os.path.join(origen, '.manifiesto.json'))
+
+    manifiesto = cargar_manifiesto(origen)
+    if manifiesto is None:
+        raise FileNotFoundError(f"No se encontró un manifiesto válido: {origen}")
+    return manifiesto
+
+
+def listar_subset(manifiesto, subset, validation_split):
+    """
+    Rutas y etiquetas de un subset.
+
+    Reproduce el split de flow_from_directory sobre la antigua carpeta
+    `dataset-binario/` (archivos renombrados como <clase_original>_<nombre>):
+    clases finales en orden alfabético y, dentro de cada una, la primera
+    fracción `validation_split` de los nombres ordenados para validación.
+
+    Args:
+        manifiesto: Manifiesto (dict)
+        subset: 'training', 'validation' o None (todas las imágenes)
+
+    Returns:
+        tuple: (rutas absolutas, etiquetas float32, class_indices)
+    """
+    raiz = raiz_dataset(manifiesto)
+    clases = sorted({a['clase'] for a in manifiesto['archivos']})
+    class_indices = {clase: i for i, clase in enumerate(clases)}
+
+    rutas, etiquetas = [], []
+    for clase in clases:
+        nombres = sorted(
+            (f"{a['clase_original']}_{os.path.basename(a['ruta'])}", a['ruta'])
+            for a in manifiesto['archivos'] if a['clase'] == clase
+        )
+        corte = int(validation_split * len(nombres))
+        if subset == 'validation':
+            nombres = nombres[:corte]
+        elif subset == 'training':
+            nombres = nombres[corte:]
+
+        rutas.extend(os.path.join(raiz, relativa) for _, relativa in nombres)
+        etiquetas.extend([float(class_indices[clase])] * len(nombres))
+
+    return rutas, np.array(etiquetas, dtype=np.float32), class_indices
+
+
+class IteradorManifiesto(Iterator):
+    """
+    Equivalente a DirectoryIterator (flow_from_directory, class_mode
+    'binary') leyendo las imágenes indicadas por el manifiesto. Aplica las
+    transformaciones aleatorias y el rescalado del ImageDataGenerator dado.
+    """
+
+    def __init__(self, manifiesto, datagen, subset, target_size=(224, 224),
+                 batch_size=32, shuffle=True, seed=None, validation_split=0.2,
+                 interpolation='nearest'):
+        self.filepaths, self.classes, self.class_indices = listar_subset(
+            obtener_manifiesto(manifiesto), subset, validation_split
+        )
+        self.samples = len(self.filepaths)
+        self.datagen = datagen
+        self.target_size = tuple(target_size)
+        self.interpolation = interpolation
+        super().__init__(self.samples, batch_size, shuffle, seed)
+
+    def _get_batches_of_transformed_samples(self, index_array):
+        lote = np.zeros((len(index_array),) + self.target_size + (3,), dtype=np.float32)
+        for i, j in enumerate(index_array):
+            imagen = load_img(
+                self.filepaths[j],
+                target_size=self.target_size,
+                interpolation=self.interpolation
+            )
+            x = img_to_array(imagen, dtype=np.float32)
+            params = self.datagen.get_random_transform(x.shape)
+            x = self.datagen.apply_transform(x, params)
+            lote[i] = self.datagen.standardize(x)
+        return lote, self.classes[index_array]
+
+
+def main():
+    """
+    Crear o actualizar el manifiesto del dataset
+    """
+    parser = argparse.ArgumentParser(description='Manifiesto del dataset de Eco-RVM')
+    parser.add_argument('--dataset', default='dataset-resized', help='Dataset original')
+    parser.add_argument('--manifiesto', default=MANIFIESTO_DEFECTO, help='Archivo del manifiesto')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dataset):
+        print(f"[Error] No se encontró la carpeta: {args.dataset}")
+        return
+
+    from train_model import MAPEO_CLASES
+    manifiesto = actualizar_manifiesto(args.dataset, MAPEO_CLASES, args.manifiesto)
+
+    conteo = {}
+    for archivo in manifiesto['archivos']:
+        conteo[archivo['clase']] = conteo.get(archivo['clase'], 0) + 1
+    for clase, cantidad in sorted(conteo.items()):
+        print(f"  {clase:12s}: {cantidad:4d} imágenes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Shards Empaquetados para Eco-RVM
+Convierte las imágenes del manifiesto (ya redimensionadas a 224x224, uint8)
+en pocos archivos .npy grandes, uno por cada N imágenes, con un índice de
+desplazamientos. El lector los abre mapeados en memoria: entrenar y evaluar
+no vuelve a decodificar JPEGs ni abrir miles de archivos pequeños.
+
+Estructura de salida (por subset):
+    <subset>_shard_000.npy ...  imágenes uint8 (n, alto, ancho, 3)
+    <subset>_etiquetas.npy      etiquetas float32 (N,)
+    <subset>_indice.json        shards, desplazamientos, rutas y huella
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from multiprocessing import Pool
+import numpy as np
+from PIL import Image
+
+# Configuración del empaquetado
+CONFIG = {
+    'MANIFIESTO': 'dataset-manifiesto.json',
+    'DIRECTORIO': 'dataset-shards',
+    'IMG_WIDTH': 224,
+    'IMG_HEIGHT': 224,
+    'VALIDATION_SPLIT': 0.2,
+    'IMAGENES_POR_SHARD': 4096,   # ~600 MB por shard a 224x224x3
+    'PROCESOS': None,             # None = todos los núcleos
+    'CHUNKSIZE': 32
+}
+
+SUBSETS = ('training', 'validation')
+
+
+def _leer_imagen(tarea):
+    """
+    Decodificar y redimensionar una imagen (se ejecuta en los procesos del
+    pool). Igual que load_img de Keras: RGB e interpolación 'nearest'.
+    """
+    ruta, ancho, alto = tarea
+    with Image.open(ruta) as imagen:
+        imagen = imagen.convert('RGB')
+        if imagen.size != (ancho, alto):
+            imagen = imagen.resize((ancho, alto), Image.NEAREST)
+        return np.asarray(imagen, dtype=np.uint8)
+
+
+def _huella(manifiesto, subset, img_size, validation_split, imagenes_por_shard):
+    """Huella del contenido de un subset: si no cambia, los shards siguen válidos"""
+    h = hashlib.sha1()
+    h.update(json.dumps([subset, list(img_size), validation_split, imagenes_por_shard]).encode())
+    for archivo in sorted(manifiesto['archivos'], key=lambda a: a['ruta']):
+        h.update(f"{archivo['ruta']}|{archivo['clase']}|{archivo['hash']}\n".encode())
+    return h.hexdigest()
+
+
+def _ruta_indice(directorio, subset):
+    return os.path.join(directorio, f'{subset}_indice.json')
+
+
+def empaquetar_subset(manifiesto, subset, directorio, img_size=(224, 224),
+                      validation_split=0.2, imagenes_por_shard=4096, procesos=None):
+    """
+    Empaquetar un subset en shards (si cambió desde el último empaquetado).
+
+    Args:
+        manifiesto: Manifiesto (dict, .json o carpeta con una subcarpeta por clase)
+        subset: 'training' o 'validation'
+        directorio: Carpeta de salida
+        img_size: (alto, ancho)
+
+    Returns:
+        dict: Índice del subset
+    """
+    from manifiesto_dataset import obtener_manifiesto, listar_subset
+
+    manifiesto = obtener_manifiesto(manifiesto)
+    huella = _huella(manifiesto, subset, img_size, validation_split, imagenes_por_shard)
+
+    ruta_indice = _ruta_indice(directorio, subset)
+    if os.path.exists(ruta_indice):
+        with open(ruta_indice, encoding='utf-8') as f:
+            indice = json.load(f)
+        if indice.get('huella') == huella:
+            print(f"  [Shards] {subset}: sin cambios ({indice['muestras']} imágenes)")
+            return indice
+
+    os.makedirs(directorio, exist_ok=True)
+    rutas, etiquetas, class_indices = listar_subset(manifiesto, subset, validation_split)
+    alto, ancho = img_size
+    total = len(rutas)
+
+    shards = []
+    inicio = time.perf_counter()
+    with Pool(processes=procesos) as pool:
+        imagenes = pool.imap(
+            _leer_imagen,
+            ((ruta, ancho, alto) for ruta in rutas),
+            chunksize=CONFIG['CHUNKSIZE']
+        )
+        for desde in range(0, total, imagenes_por_shard):
+            n = min(imagenes_por_shard, total - desde)
+            archivo = f'{subset}_shard_{len(shards):03d}.npy'
+            destino = np.lib.format.open_memmap(
+                os.path.join(directorio, archivo), mode='w+',
+                dtype=np.uint8, shape=(n, alto, ancho, 3)
+            )
+            for fila in range(n):
+                destino[fila] = next(imagenes)
+            destino.flush()
+            del destino
+
+            shards.append({'archivo': archivo, 'inicio': desde, 'n': n})
+            print(f"  [Shards] {archivo}: {n} imágenes")
+
+    # Eliminar shards sobrantes de un empaquetado anterior más grande
+    vigentes = {s['archivo'] for s in shards}
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(f'{subset}_shard_') and nombre not in vigentes:
+            os.remove(os.path.join(directorio, nombre))
+
+    np.save(os.path.join(directorio, f'{subset}_etiquetas.npy'), etiquetas)
+
+    segundos = time.perf_counter() - inicio
+    indice = {
+        'huella': huella,
+        'muestras': total,
+        'img_size': [alto, ancho],
+        'class_indices': class_indices,
+        'shards': shards,
+        'rutas': [os.path.relpath(r, os.path.dirname(os.path.abspath(ruta_indice))) for r in rutas]
+    }
+    temporal = f"{ruta_indice}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(temporal, ruta_indice)
+
+    print(f"  [Shards] {subset}: {total} imágenes en {segundos:.1f}s "
+          f"({total / max(segundos, 1e-9):.0f} img/s)")
+    return indice
+
+
+def empaquetar_dataset(manifiesto, directorio=None, procesos=None):
+    """
+    Empaquetar los subsets de entrenamiento y validación con el CONFIG actual.
+
+    Returns:
+        dict: {subset: índice}
+    """
+    print("\n" + "=" * 70)
+    print("EMPAQUETADO DEL DATASET EN SHARDS")
+    print("=" * 70)
+
+    directorio = directorio or CONFIG['DIRECTORIO']
+    return {
+        subset: empaquetar_subset(
+            manifiesto, subset, directorio,
+            img_size=(CONFIG['IMG_HEIGHT'], CONFIG['IMG_WIDTH']),
+            validation_split=CONFIG['VALIDATION_SPLIT'],
+            imagenes_por_shard=CONFIG['IMAGENES_POR_SHARD'],
+            procesos=procesos or CONFIG['PROCESOS']
+        )
+        for subset in SUBSETS
+    }
+
+
+class LectorShards:
+    """
+    Acceso aleatorio a un subset empaquetado. Los shards se abren mapeados
+    en memoria, así que solo se leen de disco las páginas de las imágenes
+    pedidas.
+    """
+
+    def __init__(self, directorio, subset):
+        with open(_ruta_indice(directorio, subset), encoding='utf-8') as f:
+            self.indice = json.load(f)
+
+        self.shards = [
+            np.load(os.path.join(directorio, s['archivo']), mmap_mode='r')
+            for s in self.indice['shards']
+        ]
+        self.inicios = np.array([s['inicio'] for s in self.indice['shards']], dtype=np.int64)
+        self.etiquetas = np.load(os.path.join(directorio, f'{subset}_etiquetas.npy'))
+        self.class_indices = self.indice['class_indices']
+
+    def __len__(self):
+        return self.indice['muestras']
+
+    def rango(self, desde, hasta):
+        """
+        Imágenes [desde, hasta) sin copiar cuando caen en un solo shard.
+
+        Returns:
+            tuple: (imagenes uint8, etiquetas)
+        """
+        shard = int(np.searchsorted(self.inicios, desde, side='right')) - 1
+        base = self.inicios[shard]
+        if hasta - base <= len(self.shards[shard]):
+            return self.shards[shard][desde - base:hasta - base], self.etiquetas[desde:hasta]
+        return self.lote(np.arange(desde, hasta))
+
+    def lote(self, indices):
+        """
+        Imágenes en posiciones arbitrarias (un gather por shard).
+
+        Returns:
+            tuple: (imagenes uint8 en el orden pedido, etiquetas)
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        shard_de = np.searchsorted(self.inicios, indices, side='right') - 1
+
+        alto, ancho = self.indice['img_size']
+        salida = np.empty((len(indices), alto, ancho, 3), dtype=np.uint8)
+        for shard in np.unique(shard_de):
+            posiciones = np.nonzero(shard_de == shard)[0]
+            filas = indices[posiciones] - self.inicios[shard]
+            # Filas ordenadas: lectura secuencial dentro del archivo
+            orden = np.argsort(filas)
+            salida[posiciones[orden]] = self.shards[shard][filas[orden]]
+
+        return salida, self.etiquetas[indices]
+
+
+def crear_secuencia_shards(lector, batch_size, barajar=True, augmentacion=None):
+    """
+    keras.utils.Sequence sobre un LectorShards que entrega lotes float32 en
+    [0, 1] (y aplica el Data Augmentation vectorizado de cargador_tfdata si
+    se indica).
+    """
+    # Import diferido: los procesos del pool de empaquetado no cargan TensorFlow
+    from tensorflow import keras
+
+    class SecuenciaShards(keras.utils.Sequence):
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.lector = lector
+            self.samples = len(lector)
+            self.class_indices = lector.class_indices
+            self.orden = np.arange(self.samples)
+            self.aumentar = None
+            if augmentacion:
+                from cargador_tfdata import crear_capa_augmentation
+                self.aumentar = crear_capa_augmentation(augmentacion, lector.indice['img_size'])
+            self.on_epoch_end()
+
+        def __len__(self):
+            return int(np.ceil(self.samples / batch_size))
+
+        def __getitem__(self, i):
+            if barajar:
+                x, y = self.lector.lote(self.orden[i * batch_size:(i + 1) * batch_size])
+            else:
+                x, y = self.lector.rango(i * batch_size, min((i + 1) * batch_size, self.samples))
+            x = x.astype(np.float32) / 255.0
+            if self.aumentar is not None:
+                x = self.aumentar(x).numpy()
+            return x, y
+
+        def on_epoch_end(self):
+            if barajar:
+                np.random.shuffle(self.orden)
+
+    return SecuenciaShards()
+
+
+def crear_secuencias_shards(manifiesto, config, augmentacion):
+    """
+    Empaquetar (si hace falta) y crear las secuencias de entrenamiento y
+    validación a partir del CONFIG de train_model.py
+
+    Returns:
+        tuple: (train_seq, val_seq, info)
+    """
+    for clave in ('IMG_WIDTH', 'IMG_HEIGHT', 'VALIDATION_SPLIT'):
+        CONFIG[clave] = config[clave]
+    directorio = config.get('DIRECTORIO_SHARDS', CONFIG['DIRECTORIO'])
+    empaquetar_dataset(manifiesto, directorio)
+
+    train = LectorShards(directorio, 'training')
+    val = LectorShards(directorio, 'validation')
+    info = {
+        'muestras_train': len(train),
+        'muestras_val': len(val),
+        'class_indices': train.class_indices
+    }
+    return (
+        crear_secuencia_shards(train, config['BATCH_SIZE'], True, augmentacion),
+        crear_secuencia_shards(val, config['BATCH_SIZE'], False),
+        info
+    )
+
+
+def main():
+    """
+    Empaquetar el dataset y medir la lectura de lotes desde los shards
+    """
+    parser = argparse.ArgumentParser(description='Empaquetado del dataset de Eco-RVM en shards')
+    parser.add_argument('--manifiesto', default=CONFIG['MANIFIESTO'],
+                        help='Manifiesto (.json) o carpeta con una subcarpeta por clase')
+    parser.add_argument('--directorio', default=CONFIG['DIRECTORIO'], help='Carpeta de los shards')
+    parser.add_argument('--por-shard', type=int, default=CONFIG['IMAGENES_POR_SHARD'],
+                        help='Imágenes por shard')
+    parser.add_argument('--procesos', type=int, default=CONFIG['PROCESOS'],
+                        help='Procesos de decodificación (default: todos los núcleos)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifiesto):
+        print(f"[Error] No se encontró el manifiesto: {args.manifiesto}")
+        return
+
+    CONFIG['IMAGENES_POR_SHARD'] = args.por_shard
+    empaquetar_dataset(args.manifiesto, args.directorio, args.procesos)
+
+    lector = LectorShards(args.directorio, 'training')
+    orden = np.random.permutation(len(lector))
+    inicio = time.perf_counter()
+    for desde in range(0, len(lector), 32):
+        lector.lote(orden[desde:desde + 32])
+    segundos = time.perf_counter() - inicio
+    print(f"\n[OK] Lectura aleatoria: {len(lector) / segundos:.0f} img/s "
+          f"({len(lector)} imágenes, lotes de 32)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ Clasificación Binaria: Aceptado (plastic+metal) vs Rechazado (glass+paper+cardb
 """
 
 import os
+import json
+import hashlib
+import time
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
@@ -13,17 +16,49 @@ from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 import matplotlib.pyplot as plt
 from datetime import datetime
+from manifiesto_dataset import actualizar_manifiesto, IteradorManifiesto
 
 # Configuración del modelo
 CONFIG = {
     'DATASET_PATH': 'dataset-resized',
+    'MANIFIESTO': 'dataset-manifiesto.json',  # Índice con el mapeo a clases binarias
+    'ESCANEAR_DATASET': True,  # Descartar imágenes corruptas y casi-duplicados
     'IMG_WIDTH': 224,
     'IMG_HEIGHT': 224,
     'BATCH_SIZE': 32,
     'EPOCHS': 50,
     'LEARNING_RATE': 0.001,
     'VALIDATION_SPLIT': 0.2,
-    'MODELO_OUTPUT': 'modelo_reciclaje.h5'
+    'MODELO_OUTPUT': 'modelo_reciclaje.h5',
+    'CUANTIZAR': True,  # Generar y comparar variantes TFLite cuantizadas
+    
+    # Cargador de imágenes en modo completo:
+    #   'tfdata'     - decodificación paralela, caché y prefetch (cargador_tfdata.py)
+    #   'generador'  - ImageDataGenerator (IteradorManifiesto)
+    #   'shards'     - imágenes empaquetadas en .npy mapeados (shards_dataset.py)
+    'CARGADOR': 'tfdata',
+    'CACHE_TFDATA': '',  # '' = caché en memoria, ruta = caché en disco
+    'DIRECTORIO_SHARDS': 'dataset-shards',
+    
+    # Modo de entrenamiento:
+    #   'completo'  - MobileNetV2 + cabeza en cada época (ImageDataGenerator)
+    #   'cacheado'  - embeddings de MobileNetV2 calculados una vez y cabeza sola
+    'MODO_ENTRENAMIENTO': 'completo',
+    'VISTAS_AUMENTADAS': 4,          # Vistas aumentadas por imagen en modo cacheado
+    'CACHE_FEATURES': 'cache-features'
+}
+
+# Data Augmentation de entrenamiento (compartido por ambos modos)
+# Simula condiciones de iluminación variable dentro de la caja
+AUGMENTATION = {
+    'rotation_range': 40,           # Rotación de objetos
+    'width_shift_range': 0.2,       # Desplazamiento horizontal
+    'height_shift_range': 0.2,      # Desplazamiento vertical
+    'shear_range': 0.2,             # Transformación de corte
+    'zoom_range': 0.2,              # Zoom in/out
+    'brightness_range': [0.5, 1.5], # Simular oscuridad de la caja
+    'horizontal_flip': True,        # Espejo horizontal
+    'fill_mode': 'nearest'
 }
 
 # Mapeo de clases según lógica de negocio Eco-RVM
@@ -128,46 +163,7 @@ def contar_imagenes_por_clase(dataset_path):
     return conteo_original, conteo_mapeado
 
 
-def crear_estructura_clases_binarias(dataset_path, output_path='dataset-binario'):
-    """
-    Reorganizar dataset en estructura binaria: aceptado / rechazado
-    """
-    print("\n" + "=" * 70)
-    print("REORGANIZACIÓN DE DATASET A ESTRUCTURA BINARIA")
-    print("=" * 70)
-    
-    import shutil
-    
-    # Crear directorios de salida
-    for clase in CLASES_FINALES:
-        os.makedirs(os.path.join(output_path, clase), exist_ok=True)
-    
-    # Copiar archivos según mapeo
-    for carpeta_origen, clase_destino in MAPEO_CLASES.items():
-        ruta_origen = os.path.join(dataset_path, carpeta_origen)
-        ruta_destino = os.path.join(output_path, clase_destino)
-        
-        if not os.path.exists(ruta_origen):
-            continue
-        
-        archivos = [f for f in os.listdir(ruta_origen) 
-                   if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        
-        print(f"  Copiando {len(archivos)} archivos de {carpeta_origen}/ → {clase_destino}/")
-        
-        for archivo in archivos:
-            # Agregar prefijo para evitar colisiones de nombres
-            nuevo_nombre = f"{carpeta_origen}_{archivo}"
-            shutil.copy2(
-                os.path.join(ruta_origen, archivo),
-                os.path.join(ruta_destino, nuevo_nombre)
-            )
-    
-    print(f"\n[OK] Dataset binario creado en: {output_path}/")
-    return output_path
-
-
-def crear_generadores_datos(dataset_path):
+def crear_generadores_datos(manifiesto):
     """
     Crear generadores de datos con Data Augmentation específico
     para simular condiciones reales de la caja de reciclaje
@@ -177,18 +173,10 @@ def crear_generadores_datos(dataset_path):
     print("=" * 70)
     
     # Data Augmentation para entrenamiento
-    # Simula condiciones de iluminación variable dentro de la caja
     train_datagen = ImageDataGenerator(
         rescale=1./255,
         validation_split=CONFIG['VALIDATION_SPLIT'],
-        rotation_range=40,           # Rotación de objetos
-        width_shift_range=0.2,       # Desplazamiento horizontal
-        height_shift_range=0.2,      # Desplazamiento vertical
-        shear_range=0.2,             # Transformación de corte
-        zoom_range=0.2,              # Zoom in/out
-        brightness_range=[0.5, 1.5], # Simular oscuridad de la caja
-        horizontal_flip=True,        # Espejo horizontal
-        fill_mode='nearest'
+        **AUGMENTATION
     )
     
     # Solo rescalado para validación
@@ -206,25 +194,27 @@ def crear_generadores_datos(dataset_path):
     print("  - Validación: Solo rescalado")
     
     # Generador de entrenamiento
-    train_generator = train_datagen.flow_from_directory(
-        dataset_path,
+    train_generator = IteradorManifiesto(
+        manifiesto,
+        train_datagen,
+        subset='training',
         target_size=(CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT']),
         batch_size=CONFIG['BATCH_SIZE'],
-        class_mode='binary',  # Clasificación binaria
-        subset='training',
         shuffle=True,
-        seed=42
+        seed=42,
+        validation_split=CONFIG['VALIDATION_SPLIT']
     )
     
     # Generador de validación
-    validation_generator = val_datagen.flow_from_directory(
-        dataset_path,
+    validation_generator = IteradorManifiesto(
+        manifiesto,
+        val_datagen,
+        subset='validation',
         target_size=(CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT']),
         batch_size=CONFIG['BATCH_SIZE'],
-        class_mode='binary',
-        subset='validation',
         shuffle=False,
-        seed=42
+        seed=42,
+        validation_split=CONFIG['VALIDATION_SPLIT']
     )
     
     print(f"\n[Generadores Creados]")
@@ -281,27 +271,13 @@ def crear_modelo_cnn():
     return modelo
 
 
-def entrenar_modelo(train_gen, val_gen):
+def crear_callbacks(checkpoint=True):
     """
-    Entrenar el modelo con callbacks
+    Callbacks de entrenamiento (checkpoint, early stopping, reducción de LR)
     """
-    print("\n" + "=" * 70)
-    print("ENTRENAMIENTO DEL MODELO")
-    print("=" * 70)
-    
-    # Crear modelo
-    modelo = crear_modelo_cnn()
-    
-    # Callbacks
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     callbacks = [
-        ModelCheckpoint(
-            filepath=f'modelo_checkpoint_{timestamp}.h5',
-            monitor='val_accuracy',
-            save_best_only=True,
-            verbose=1
-        ),
         EarlyStopping(
             monitor='val_loss',
             patience=8,
@@ -317,15 +293,43 @@ def entrenar_modelo(train_gen, val_gen):
         )
     ]
     
-    # Calcular steps
-    steps_per_epoch = train_gen.samples // CONFIG['BATCH_SIZE']
-    validation_steps = val_gen.samples // CONFIG['BATCH_SIZE']
+    if checkpoint:
+        callbacks.insert(0, ModelCheckpoint(
+            filepath=f'modelo_checkpoint_{timestamp}.h5',
+            monitor='val_accuracy',
+            save_best_only=True,
+            verbose=1
+        ))
+    
+    return callbacks
+
+
+def entrenar_modelo(train_gen, val_gen):
+    """
+    Entrenar el modelo con callbacks
+    """
+    print("\n" + "=" * 70)
+    print("ENTRENAMIENTO DEL MODELO")
+    print("=" * 70)
+    
+    # Crear modelo
+    modelo = crear_modelo_cnn()
+    
+    # Callbacks
+    callbacks = crear_callbacks()
+    
+    # Calcular steps (un tf.data.Dataset recorre la época completa)
+    if isinstance(train_gen, tf.data.Dataset):
+        steps_per_epoch = validation_steps = None
+    else:
+        steps_per_epoch = train_gen.samples // CONFIG['BATCH_SIZE']
+        validation_steps = val_gen.samples // CONFIG['BATCH_SIZE']
     
     print(f"\n[Configuración de Entrenamiento]")
     print(f"  Épocas: {CONFIG['EPOCHS']}")
     print(f"  Batch size: {CONFIG['BATCH_SIZE']}")
-    print(f"  Steps por época: {steps_per_epoch}")
-    print(f"  Validation steps: {validation_steps}")
+    print(f"  Steps por época: {steps_per_epoch or 'época completa'}")
+    print(f"  Validation steps: {validation_steps or 'época completa'}")
     print("\n[Iniciando entrenamiento...]")
     print("-" * 70)
     
@@ -343,6 +347,222 @@ def entrenar_modelo(train_gen, val_gen):
     return modelo, history
 
 
+# =====================================================================
+# MODO CACHEADO: embeddings del backbone calculados una sola vez
+# =====================================================================
+
+def crear_extractor_features():
+    """
+    MobileNetV2 congelado + GlobalAveragePooling2D (mismos pesos ImageNet
+    que la base de crear_modelo_cnn). Produce vectores de 1280 valores.
+    """
+    return keras.applications.MobileNetV2(
+        input_shape=(CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT'], 3),
+        include_top=False,
+        weights='imagenet',
+        pooling='avg'
+    )
+
+
+def _huella_subset(generador, vistas):
+    """Huella de los archivos del subset (ruta, tamaño, mtime) y parámetros"""
+    h = hashlib.sha1()
+    h.update(json.dumps({
+        'vistas': vistas,
+        'img': [CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT']],
+        'split': CONFIG['VALIDATION_SPLIT'],
+        'augmentation': AUGMENTATION,
+        'clases': generador.class_indices
+    }, sort_keys=True).encode())
+    for ruta in generador.filepaths:
+        info = os.stat(ruta)
+        h.update(f"{ruta}|{info.st_size}|{info.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def extraer_features_cacheadas(manifiesto, subset, vistas, extractor=None):
+    """
+    Calcular (o reutilizar) los embeddings de un subset en un .npy mapeado
+    en memoria.
+    
+    Para 'training' se guarda la vista original más `vistas` vistas con
+    Data Augmentation; para 'validation' solo la original. Si los archivos
+    y parámetros no cambiaron desde la última ejecución se reutiliza la
+    caché sin pasar ninguna imagen por el backbone.
+    
+    Returns:
+        tuple: (features memmap (N, 1280) float16, etiquetas (N,), extractor)
+    """
+    directorio = CONFIG['CACHE_FEATURES']
+    os.makedirs(directorio, exist_ok=True)
+    
+    ruta_x = os.path.join(directorio, f'{subset}_x.npy')
+    ruta_y = os.path.join(directorio, f'{subset}_y.npy')
+    ruta_meta = os.path.join(directorio, f'{subset}_meta.json')
+    
+    vistas = vistas if subset == 'training' else 0
+    
+    base = ImageDataGenerator(rescale=1./255, validation_split=CONFIG['VALIDATION_SPLIT'])
+    kwargs = dict(
+        subset=subset,
+        target_size=(CONFIG['IMG_WIDTH'], CONFIG['IMG_HEIGHT']),
+        batch_size=CONFIG['BATCH_SIZE'],
+        shuffle=False,
+        validation_split=CONFIG['VALIDATION_SPLIT']
+    )
+    generador = IteradorManifiesto(manifiesto, base, **kwargs)
+    huella = _huella_subset(generador, vistas)
+    
+    if os.path.exists(ruta_meta) and os.path.exists(ruta_x) and os.path.exists(ruta_y):
+        with open(ruta_meta) as f:
+            if json.load(f).get('huella') == huella:
+                print(f"  [Caché] {subset}: reutilizando {ruta_x}")
+                return np.load(ruta_x, mmap_mode='r'), np.load(ruta_y), extractor
+    
+    if extractor is None:
+        extractor = crear_extractor_features()
+    
+    n = generador.samples
+    total = n * (1 + vistas)
+    dimension = extractor.output_shape[-1]
+    
+    features = np.lib.format.open_memmap(ruta_x, mode='w+', dtype=np.float16, shape=(total, dimension))
+    etiquetas = np.empty(total, dtype=np.float32)
+    
+    aumentado = ImageDataGenerator(
+        rescale=1./255,
+        validation_split=CONFIG['VALIDATION_SPLIT'],
+        **AUGMENTATION
+    )
+    
+    for vista in range(1 + vistas):
+        # Vista 0: imagen original; el resto: aumentadas
+        gen = generador if vista == 0 else IteradorManifiesto(manifiesto, aumentado, **kwargs)
+        inicio = time.perf_counter()
+        fila = vista * n
+        
+        for lote in range(len(gen)):
+            x, y = gen[lote]
+            salida = extractor(x, training=False)
+            features[fila:fila + len(x)] = np.asarray(salida, dtype=np.float16)
+            etiquetas[fila:fila + len(x)] = y
+            fila += len(x)
+        
+        print(f"  [Caché] {subset} vista {vista}: {n} imágenes en {time.perf_counter() - inicio:.1f}s")
+    
+    features.flush()
+    np.save(ruta_y, etiquetas)
+    with open(ruta_meta, 'w') as f:
+        json.dump({'huella': huella, 'muestras': total, 'vistas': vistas}, f)
+    
+    del features
+    return np.load(ruta_x, mmap_mode='r'), etiquetas, extractor
+
+
+class SecuenciaFeatures(keras.utils.Sequence):
+    """
+    Lotes desde los embeddings mapeados en memoria, barajados por época.
+    Solo se lee de disco el lote en uso.
+    """
+    
+    def __init__(self, features, etiquetas, batch_size, barajar=True, **kwargs):
+        super().__init__(**kwargs)
+        self.features = features
+        self.etiquetas = etiquetas
+        self.batch_size = batch_size
+        self.barajar = barajar
+        self.indices = np.arange(len(etiquetas))
+        self.on_epoch_end()
+    
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.batch_size))
+    
+    def __getitem__(self, i):
+        # Índices ordenados dentro del lote: lectura más secuencial del memmap
+        lote = np.sort(self.indices[i * self.batch_size:(i + 1) * self.batch_size])
+        return self.features[lote].astype(np.float32), self.etiquetas[lote]
+    
+    def on_epoch_end(self):
+        if self.barajar:
+            np.random.shuffle(self.indices)
+
+
+def crear_cabeza_clasificacion(dimension):
+    """
+    Cabeza de crear_modelo_cnn (después del pooling) como modelo independiente
+    """
+    cabeza = keras.Sequential([
+        keras.Input(shape=(dimension,)),
+        layers.Dropout(0.3),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.5),
+        layers.Dense(1, activation='sigmoid')
+    ], name='EcoRVM_Cabeza')
+    
+    cabeza.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=CONFIG['LEARNING_RATE']),
+        loss='binary_crossentropy',
+        metrics=['accuracy', keras.metrics.Precision(), keras.metrics.Recall()]
+    )
+    return cabeza
+
+
+def ensamblar_modelo(cabeza):
+    """
+    Construir el modelo completo de crear_modelo_cnn y copiar los pesos
+    entrenados de la cabeza: el resultado tiene exactamente el mismo
+    formato que el del modo completo.
+    """
+    modelo = crear_modelo_cnn()
+    
+    densas_modelo = [l for l in modelo.layers if isinstance(l, layers.Dense)]
+    densas_cabeza = [l for l in cabeza.layers if isinstance(l, layers.Dense)]
+    for destino, origen in zip(densas_modelo, densas_cabeza):
+        destino.set_weights(origen.get_weights())
+    
+    return modelo
+
+
+def entrenar_modelo_cacheado(manifiesto):
+    """
+    Entrenar solo la cabeza sobre embeddings cacheados del backbone congelado
+    """
+    print("\n" + "=" * 70)
+    print("ENTRENAMIENTO CON FEATURES CACHEADAS")
+    print("=" * 70)
+    print(f"  Vistas aumentadas por imagen: {CONFIG['VISTAS_AUMENTADAS']}")
+    print(f"  Directorio de caché: {CONFIG['CACHE_FEATURES']}/")
+    
+    x_train, y_train, extractor = extraer_features_cacheadas(
+        manifiesto, 'training', CONFIG['VISTAS_AUMENTADAS']
+    )
+    x_val, y_val, _ = extraer_features_cacheadas(
+        manifiesto, 'validation', 0, extractor
+    )
+    
+    cabeza = crear_cabeza_clasificacion(x_train.shape[1])
+    
+    print(f"\n[Configuración de Entrenamiento]")
+    print(f"  Muestras de entrenamiento: {len(y_train)}")
+    print(f"  Muestras de validación: {len(y_val)}")
+    print(f"  Épocas: {CONFIG['EPOCHS']}")
+    print("\n[Iniciando entrenamiento de la cabeza...]")
+    print("-" * 70)
+    
+    inicio = time.perf_counter()
+    history = cabeza.fit(
+        SecuenciaFeatures(x_train, y_train, CONFIG['BATCH_SIZE']),
+        epochs=CONFIG['EPOCHS'],
+        validation_data=SecuenciaFeatures(x_val, y_val, CONFIG['BATCH_SIZE'], barajar=False),
+        callbacks=crear_callbacks(checkpoint=False),
+        verbose=1
+    )
+    print(f"\n[OK] Cabeza entrenada en {time.perf_counter() - inicio:.1f}s")
+    
+    modelo = ensamblar_modelo(cabeza)
+    return modelo, history
+
+
 def guardar_modelo_final(modelo, nombre_archivo):
     """
     Guardar modelo entrenado
@@ -431,18 +651,50 @@ def main():
     # Contar imágenes
     contar_imagenes_por_clase(CONFIG['DATASET_PATH'])
     
-    # Reorganizar dataset a estructura binaria
-    dataset_binario = crear_estructura_clases_binarias(CONFIG['DATASET_PATH'])
-    
-    # Crear generadores de datos
-    train_gen, val_gen = crear_generadores_datos(dataset_binario)
-    
-    # Entrenar modelo
-    modelo, history = entrenar_modelo(train_gen, val_gen)
+    # Indexar el dataset con el mapeo a clases binarias (sin copiar archivos;
+    # solo se leen los archivos nuevos o modificados desde la última vez)
+    manifiesto = actualizar_manifiesto(CONFIG['DATASET_PATH'], MAPEO_CLASES, CONFIG['MANIFIESTO'])
+    
+    if CONFIG['ESCANEAR_DATASET']:
+        from escanear_dataset import escanear_dataset
+        manifiesto = escanear_dataset(manifiesto)
+    
+    if CONFIG['MODO_ENTRENAMIENTO'] == 'cacheado':
+        # Backbone una sola vez, luego solo la cabeza
+        modelo, history = entrenar_modelo_cacheado(manifiesto)
+    elif CONFIG['CARGADOR'] == 'tfdata':
+        from cargador_tfdata import crear_datasets_tfdata
+        train_ds, val_ds, info = crear_datasets_tfdata(manifiesto, CONFIG, AUGMENTATION)
+        print(f"\n[Cargador tf.data]")
+        print(f"  Entrenamiento: {info['muestras_train']} imágenes")
+        print(f"  Validación: {info['muestras_val']} imágenes")
+        print(f"  Clases: {info['class_indices']}")
+        
+        modelo, history = entrenar_modelo(train_ds, val_ds)
+    elif CONFIG['CARGADOR'] == 'shards':
+        from shards_dataset import crear_secuencias_shards
+        train_seq, val_seq, info = crear_secuencias_shards(manifiesto, CONFIG, AUGMENTATION)
+        print(f"\n[Cargador shards]")
+        print(f"  Entrenamiento: {info['muestras_train']} imágenes")
+        print(f"  Validación: {info['muestras_val']} imágenes")
+        print(f"  Clases: {info['class_indices']}")
+        
+        modelo, history = entrenar_modelo(train_seq, val_seq)
+    else:
+        # Crear generadores de datos
+        train_gen, val_gen = crear_generadores_datos(manifiesto)
+        
+        # Entrenar modelo
+        modelo, history = entrenar_modelo(train_gen, val_gen)
     
     # Guardar modelo final
     guardar_modelo_final(modelo, CONFIG['MODELO_OUTPUT'])
     
+    # Cuantización post-entrenamiento (rango dinámico, float16, int8)
+    if CONFIG['CUANTIZAR']:
+        from cuantizar_modelo import cuantizar_modelo
+        cuantizar_modelo(modelo, CONFIG['MODELO_OUTPUT'], manifiesto)
+    
     # Visualizar métricas
     visualizar_metricas(history)
     
@@ -0,0 +1,36 @@
+"""
+Script para regenerar las tablas de resumen a partir de las transacciones.
+Ejecutar tras importaciones masivas o si las estadísticas se desincronizan.
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar directorio raíz al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from backend.app import create_app
+from backend.services import StatsService
+
+
+def main():
+    """Reconstruir el resumen diario y el ranking por período"""
+    app = create_app()
+
+    with app.app_context():
+        print("🔄 Reconstruyendo resumen diario desde transacciones...")
+
+        filas = StatsService.reconstruir_resumen_diario()
+
+        print(f"✅ Resumen diario regenerado: {filas} filas (día × tipo de objeto)")
+
+        print("🔄 Reconstruyendo ranking por período (semana, mes, total)...")
+
+        filas = StatsService.reconstruir_ranking_periodos()
+
+        print(f"✅ Ranking por período regenerado: {filas} filas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Script para reparar los contadores denormalizados de usuarios.
+Recalcula reciclajes, kg, CO2, botellas, latas, canjes y badges desde las tablas de origen.
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar directorio raíz al path
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from backend.app import create_app
+from backend.services import UserService
+
+
+def main():
+    """Recalcular contadores de todos los usuarios (o uno si se pasa su ID)"""
+    usuario_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    app = create_app()
+
+    with app.app_context():
+        objetivo = f"usuario {usuario_id}" if usuario_id else "todos los usuarios"
+        print(f"🔄 Reparando contadores de {objetivo}...")
+
+        corregidos = UserService.reparar_contadores(usuario_id)
+
+        print(f"✅ Contadores corregidos en {corregidos} usuario(s)")
+
+
+if __name__ == '__main__':
+    main()
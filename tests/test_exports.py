@@ -0,0 +1,57 @@
+"""
+Tests de Eco-RVM - Exportaciones en Streaming
+"""
+
+import csv
+import io
+import json
+
+
+class TestExportsAPI:
+    """Tests para endpoints de exportación"""
+    
+    def _depositos(self, client, uid):
+        client.post('/api/add_points/batch', json={
+            'depositos': [
+                {'uid': uid, 'puntos': 10, 'tipo_objeto': 'botella_plastico',
+                 'fecha_hora': '2023-06-01T09:00:00'},
+                {'uid': uid, 'puntos': 5, 'tipo_objeto': 'lata_metal',
+                 'fecha_hora': '2023-06-02T09:00:00'},
+                {'uid': uid, 'puntos': 7, 'tipo_objeto': 'botella_plastico',
+                 'fecha_hora': '2023-06-03T09:00:00'}
+            ]
+        })
+    
+    def test_export_transactions_ndjson(self, client, sample_user):
+        """Exportar transacciones filtradas como NDJSON"""
+        self._depositos(client, sample_user.uid_rfid)
+        
+        response = client.get(
+            f'/api/export/transacciones?usuario_id={sample_user.id}'
+            '&desde=2023-06-01&hasta=2023-06-02'
+        )
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        filas = [json.loads(l) for l in response.get_data(as_text=True).splitlines()]
+        assert [f['puntos_otorgados'] for f in filas] == [10, 5]
+        assert filas[0]['uid_rfid'] == sample_user.uid_rfid
+    
+    def test_export_transactions_csv(self, client, sample_user):
+        """Exportar transacciones como CSV con filtro por tipo"""
+        self._depositos(client, sample_user.uid_rfid)
+        
+        response = client.get(
+            f'/api/export/transacciones?formato=csv&uid={sample_user.uid_rfid}'
+            '&tipo_objeto=botella_plastico'
+        )
+        
+        assert response.status_code == 200
+        filas = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert len(filas) == 2
+        assert {f['tipo_objeto'] for f in filas} == {'botella_plastico'}
+    
+    def test_export_invalid_params(self, client):
+        """Formato o fechas inválidas"""
+        assert client.get('/api/export/canjes?formato=xml').status_code == 400
+        assert client.get('/api/export/transacciones?desde=ayer').status_code == 400
@@ -0,0 +1,62 @@
+"""
+Tests de Eco-RVM - Caché Local de Usuarios del Controlador
+"""
+
+from controller import roster_cache
+from controller.roster_cache import RosterCache
+
+
+class FakeAPI:
+    """Backend simulado: entrega una página de cambios por llamada"""
+
+    def __init__(self, paginas):
+        self.paginas = list(paginas)
+        self.disponible = True
+
+    def get_user_changes(self, cursor, limite, margen):
+        if not self.disponible:
+            return None
+        usuarios = self.paginas.pop(0) if self.paginas else []
+        return {'usuarios': usuarios, 'cursor': 'c1', 'hay_mas': False}
+
+
+class TestRosterCache:
+    """Tests para la vigencia de la caché de usuarios"""
+
+    USUARIO = {
+        'id': 1,
+        'uid_rfid': '04ABC',
+        'codigo_virtual': 'ECO1',
+        'activo': True,
+        'fecha_actualizacion': '2026-01-01T10:00:00'
+    }
+
+    def test_empty_syncs_keep_entries_fresh(self, monkeypatch):
+        """Las sincronizaciones vacías exitosas mantienen vigentes a los usuarios sin cambios"""
+        reloj = [1000.0]
+        monkeypatch.setattr(roster_cache.time, 'monotonic', lambda: reloj[0])
+        cache = RosterCache(FakeAPI([[self.USUARIO]]), ttl=300.0)
+
+        assert cache.sync() == 1
+        for _ in range(20):
+            reloj[0] += 30
+            assert cache.sync() == 0
+
+        # 600 s después de la carga, más que el TTL
+        assert cache.get_by_uid('04abc')['id'] == 1
+        assert cache.get_by_code('eco1')['id'] == 1
+
+    def test_entries_expire_without_sync(self, monkeypatch):
+        """Sin sincronizaciones exitosas las entradas vencen al pasar el TTL"""
+        reloj = [1000.0]
+        monkeypatch.setattr(roster_cache.time, 'monotonic', lambda: reloj[0])
+        api = FakeAPI([[self.USUARIO]])
+        cache = RosterCache(api, ttl=300.0)
+
+        assert cache.sync() == 1
+        api.disponible = False
+        for _ in range(20):
+            reloj[0] += 30
+            assert cache.sync() is None
+
+        assert cache.get_by_uid('04ABC') is None
@@ -65,3 +65,146 @@ class TestStatsAPI:
         assert 'impacto_ambiental' in data
         assert 'reciclajes_semana' in data
         assert 'top_recicladores' in data
+    
+    def test_daily_summary_updated_on_add_points(self, client, sample_user):
+        """El resumen diario acumula cada reciclaje registrado"""
+        antes = client.get('/api/stats/impacto').get_json()
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        
+        despues = client.get('/api/stats/impacto').get_json()
+        assert despues['total_reciclajes'] == antes['total_reciclajes'] + 1
+        assert despues['peso_reciclado_kg'] > antes['peso_reciclado_kg']
+        
+        periodo = client.get('/api/stats/reciclajes/periodo?dias=1').get_json()
+        assert sum(periodo.values()) >= 1
+    
+    def test_rebuild_daily_summary(self, client, sample_user, app):
+        """Reconstruir el resumen coincide con las transacciones"""
+        from sqlalchemy import func
+        from backend.extensions import db
+        from backend.models import Transaccion, ResumenDiario
+        from backend.services import StatsService
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 5,
+            'tipo_objeto': 'lata'
+        })
+        
+        StatsService.reconstruir_resumen_diario()
+        
+        total_resumen = db.session.query(
+            func.sum(ResumenDiario.total_reciclajes)
+        ).scalar()
+        assert total_resumen == Transaccion.query.count()
+    
+    def test_summary_rows_upserted(self, sample_user):
+        """La primera fila del día y del período se crea o acumula con un upsert"""
+        from datetime import date
+        from backend.extensions import db
+        from backend.models import ResumenDiario, RankingPeriodo
+        
+        fecha = date(2020, 3, 4)
+        ResumenDiario.registrar(fecha, 'lata', 1, 10, 0.015, 0.1)
+        ResumenDiario.registrar(fecha, 'lata', 2, 20, 0.03, 0.2)
+        RankingPeriodo.registrar(sample_user.id, fecha, 1, 10)
+        RankingPeriodo.registrar(sample_user.id, fecha, 2, 20)
+        db.session.commit()
+        
+        filas = ResumenDiario.query.filter_by(fecha=fecha, tipo_objeto='lata').all()
+        assert len(filas) == 1
+        assert filas[0].total_reciclajes == 3
+        assert filas[0].total_puntos == 30
+        
+        semana = RankingPeriodo.query.filter_by(
+            periodo=RankingPeriodo.PERIODO_SEMANA,
+            inicio=RankingPeriodo.inicio_periodo(RankingPeriodo.PERIODO_SEMANA, fecha),
+            usuario_id=sample_user.id
+        ).all()
+        assert len(semana) == 1
+        assert semana[0].reciclajes == 3
+        assert semana[0].puntos == 30
+        
+        # Limpiar (las filas de ranking se eliminan con el usuario)
+        db.session.delete(filas[0])
+        db.session.commit()
+    
+    def test_dashboard_cached_and_invalidated(self, client, sample_user):
+        """El dashboard se sirve desde caché hasta que se registra un reciclaje"""
+        client.get('/api/stats/dashboard')
+        
+        response = client.get('/api/stats/dashboard')
+        assert response.headers['X-Cache'] == 'HIT'
+        total_antes = response.get_json()['estadisticas']['total_transacciones']
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        
+        response = client.get('/api/stats/dashboard')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json()['estadisticas']['total_transacciones'] == total_antes + 1
+    
+    def test_dashboard_cache_counters(self, client, app):
+        """Contadores de aciertos y fallos de la caché"""
+        client.get('/api/stats/dashboard')
+        client.get('/api/stats/dashboard')
+        
+        response = client.get('/api/stats/dashboard/cache')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['hits'] >= 1
+        assert data['misses'] >= 1
+        assert data['ttl_segundos'] == app.config['DASHBOARD_CACHE_TTL']
+    
+    def test_top_recyclers_periods(self, client, sample_user):
+        """Top recicladores por semana, mes y total"""
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        
+        for periodo in ('semana', 'mes', 'total'):
+            response = client.get(f'/api/stats/top-recicladores?periodo={periodo}')
+            
+            assert response.status_code == 200
+            data = response.get_json()
+            ids = [t['usuario']['id'] for t in data['top_recicladores']]
+            assert sample_user.id in ids
+    
+    def test_top_recyclers_table_matches_transactions(self, client, sample_user):
+        """La tabla de ranking coincide con la agrupación de transacciones"""
+        from backend.services import StatsService
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'lata'
+        })
+        
+        desde_tabla = StatsService.obtener_top_recicladores(10, 'mes', desde_tabla=True)
+        agrupado = StatsService.obtener_top_recicladores(10, 'mes', desde_tabla=False)
+        
+        assert [(t['usuario']['id'], t['reciclajes_periodo']) for t in desde_tabla] == \
+            [(t['usuario']['id'], t['reciclajes_periodo']) for t in agrupado]
+        
+        StatsService.reconstruir_ranking_periodos()
+        reconstruido = StatsService.obtener_top_recicladores(10, 'mes', desde_tabla=True)
+        
+        assert [(t['usuario']['id'], t['reciclajes_periodo']) for t in reconstruido] == \
+            [(t['usuario']['id'], t['reciclajes_periodo']) for t in agrupado]
+    
+    def test_top_recyclers_invalid_period(self, client):
+        """Período inválido"""
+        response = client.get('/api/stats/top-recicladores?periodo=anio')
+        
+        assert response.status_code == 400
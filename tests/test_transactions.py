@@ -85,3 +85,134 @@ class TestTransactionsAPI:
         assert response.status_code == 200
         data = response.get_json()
         assert 'transacciones' in data
+    
+    def test_add_points_batch_partial(self, client, sample_user, app):
+        """Lote con depósitos válidos e inválidos"""
+        from backend.models import Usuario
+        from backend.extensions import db
+        
+        initial_points = sample_user.puntos_totales
+        
+        response = client.post('/api/add_points/batch', json={
+            'depositos': [
+                {'uid': sample_user.uid_rfid, 'puntos': 10, 'tipo_objeto': 'botella_plastico'},
+                {'uid': '04NOEXISTE123', 'puntos': 10},
+                {'uid': sample_user.uid_rfid.lower(), 'puntos': 5, 'tipo_objeto': 'lata_metal',
+                 'fecha_hora': '2024-01-15T10:00:00'},
+                {'uid': sample_user.uid_rfid, 'puntos': 0}
+            ]
+        })
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['procesados'] == 2
+        assert data['fallidos'] == 2
+        assert [r['exito'] for r in data['resultados']] == [True, False, True, False]
+        assert data['resultados'][1]['error'] == 'Usuario no encontrado'
+        assert data['usuarios'][0]['puntos_nuevos'] == initial_points + 15
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        assert usuario.total_reciclajes == 2
+        assert usuario.total_botellas == 1
+        assert usuario.total_latas == 1
+    
+    def test_add_points_batch_idempotent(self, client, sample_user):
+        """Reenviar un id_deposito ya registrado no vuelve a sumar puntos"""
+        from backend.models import Usuario
+        from backend.extensions import db
+        
+        initial_points = sample_user.puntos_totales
+        lote = {'depositos': [
+            {'uid': sample_user.uid_rfid, 'puntos': 10, 'id_deposito': 'dep-0001'},
+            {'uid': sample_user.uid_rfid, 'puntos': 10, 'id_deposito': 'dep-0002'}
+        ]}
+        
+        primero = client.post('/api/add_points/batch', json=lote).get_json()
+        assert primero['procesados'] == 2
+        assert primero['duplicados'] == 0
+        
+        lote['depositos'].append(
+            {'uid': sample_user.uid_rfid, 'puntos': 10, 'id_deposito': 'dep-0003'}
+        )
+        segundo = client.post('/api/add_points/batch', json=lote).get_json()
+        assert segundo['procesados'] == 3
+        assert segundo['duplicados'] == 2
+        assert [r.get('duplicado', False) for r in segundo['resultados']] == [True, True, False]
+        assert segundo['resultados'][0]['transaccion_id'] == primero['resultados'][0]['transaccion_id']
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        assert usuario.puntos_totales == initial_points + 30
+        assert usuario.total_reciclajes == 3
+    
+    def test_add_points_batch_streak_by_date(self, client, sample_user):
+        """La racha se calcula con la fecha de cada depósito reenviado"""
+        from datetime import datetime
+        from backend.models import Usuario
+        from backend.extensions import db
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        usuario.ultima_actividad = datetime(2024, 3, 1, 18, 0)
+        usuario.racha_dias = 1
+        db.session.commit()
+        
+        # Backlog de un corte: llega desordenado y abarca varios días
+        client.post('/api/add_points/batch', json={'depositos': [
+            {'uid': sample_user.uid_rfid, 'puntos': 1, 'fecha_hora': '2024-03-03T09:00:00'},
+            {'uid': sample_user.uid_rfid, 'puntos': 1, 'fecha_hora': '2024-03-02T08:00:00'},
+            {'uid': sample_user.uid_rfid, 'puntos': 1, 'fecha_hora': '2024-03-02T20:00:00'}
+        ]})
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        assert usuario.racha_dias == 3
+        assert usuario.ultima_actividad == datetime(2024, 3, 3, 9, 0)
+        
+        # Un depósito más antiguo no hace retroceder la última actividad
+        client.post('/api/add_points/batch', json={'depositos': [
+            {'uid': sample_user.uid_rfid, 'puntos': 1, 'fecha_hora': '2024-03-01T12:00:00'}
+        ]})
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        assert usuario.racha_dias == 3
+        assert usuario.ultima_actividad == datetime(2024, 3, 3, 9, 0)
+    
+    def test_add_points_batch_invalid(self, client):
+        """Lote vacío o mal formado"""
+        response = client.post('/api/add_points/batch', json={'depositos': []})
+        assert response.status_code == 400
+        
+        response = client.post('/api/add_points/batch', json={'uid': '04TEST123456'})
+        assert response.status_code == 400
+    
+    def test_transactions_cursor_pagination(self, client, sample_user):
+        """Recorrer el historial con cursor sin repetir ni saltar registros"""
+        response = client.post('/api/add_points/batch', json={
+            'depositos': [
+                {'uid': sample_user.uid_rfid, 'puntos': 1, 'fecha_hora': '2024-03-01T10:00:00'},
+                {'uid': sample_user.uid_rfid, 'puntos': 2, 'fecha_hora': '2024-03-01T10:00:00'},
+                {'uid': sample_user.uid_rfid, 'puntos': 3, 'fecha_hora': '2024-03-02T10:00:00'}
+            ]
+        })
+        esperados = sorted(
+            (r['transaccion_id'] for r in response.get_json()['resultados']),
+            reverse=True
+        )
+        
+        vistos = []
+        cursor = None
+        for _ in range(5):
+            url = f'/api/transacciones/{sample_user.id}?limite=2'
+            if cursor:
+                url += f'&cursor={cursor}'
+            data = client.get(url).get_json()
+            vistos.extend(t['id'] for t in data['transacciones'])
+            cursor = data['siguiente_cursor']
+            if not cursor:
+                break
+        
+        assert vistos == esperados
+    
+    def test_transactions_invalid_cursor(self, client, sample_user):
+        """Un cursor mal formado se rechaza"""
+        response = client.get('/api/transacciones/recientes?cursor=no-es-un-cursor')
+        
+        assert response.status_code == 400
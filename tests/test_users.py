@@ -77,6 +77,64 @@ class TestUserAPI:
         assert data['total'] >= 1
         assert isinstance(data['usuarios'], list)
     
+    def test_user_changes_delta_sync(self, client, sample_user):
+        """Sincronizar solo los usuarios modificados desde el último cursor"""
+        cursor = ''
+        vistos = []
+        for _ in range(50):
+            data = client.get(f'/api/usuarios/cambios?limite=2&cursor={cursor}').get_json()
+            vistos.extend(u['uid_rfid'] for u in data['usuarios'])
+            cursor = data['cursor']
+            if not data['hay_mas']:
+                break
+        
+        assert sample_user.uid_rfid in vistos
+        assert len(vistos) == len(set(vistos))
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        
+        data = client.get(f'/api/usuarios/cambios?cursor={cursor}').get_json()
+        assert [u['uid_rfid'] for u in data['usuarios']] == [sample_user.uid_rfid]
+        assert data['usuarios'][0]['puntos_totales'] == 110
+        
+        # Sin cambios nuevos el cursor se conserva
+        siguiente = client.get(f"/api/usuarios/cambios?cursor={data['cursor']}").get_json()
+        assert siguiente['total'] == 0
+        assert siguiente['cursor'] == data['cursor']
+    
+    def test_user_changes_overlap_window(self, client, sample_user):
+        """Con margen se releen los cambios confirmados tarde con fecha anterior al cursor"""
+        from datetime import timedelta
+        from backend.extensions import db
+        from backend.models import Usuario
+        from backend.utils.cursor import decodificar_cursor
+        
+        cursor = client.get('/api/usuarios/cambios?limite=1000').get_json()['cursor']
+        fecha_cursor, _ = decodificar_cursor(cursor)
+        
+        # Cambio cuyo flush fue anterior al cursor pero que confirmó después
+        usuario = db.session.get(Usuario, sample_user.id)
+        usuario.activo = False
+        usuario.fecha_actualizacion = fecha_cursor - timedelta(seconds=5)
+        db.session.commit()
+        
+        data = client.get(f'/api/usuarios/cambios?cursor={cursor}').get_json()
+        assert data['total'] == 0
+        
+        data = client.get(f'/api/usuarios/cambios?cursor={cursor}&margen=30').get_json()
+        assert sample_user.id in [u['id'] for u in data['usuarios']]
+        assert data['cursor'] == cursor
+    
+    def test_user_changes_invalid_cursor(self, client):
+        """Un cursor mal formado se rechaza"""
+        response = client.get('/api/usuarios/cambios?cursor=no-es-un-cursor')
+        
+        assert response.status_code == 400
+    
     def test_ranking(self, client, sample_user):
         """Obtener ranking"""
         response = client.get('/api/ranking?limite=5')
@@ -84,3 +142,131 @@ class TestUserAPI:
         assert response.status_code == 200
         data = response.get_json()
         assert 'ranking' in data
+    
+    def test_user_counters_maintained(self, client, sample_user):
+        """Los contadores del usuario se actualizan con cada reciclaje"""
+        from backend.extensions import db
+        from backend.models import Usuario
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella_plastico'
+        })
+        
+        response = client.get(f'/api/stats/impacto/{sample_user.id}')
+        data = response.get_json()
+        assert data['total_reciclajes'] == 1
+        assert data['botellas_plastico'] == 1
+        assert data['kg_reciclado'] > 0
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        perfil = usuario.to_dict_perfil()
+        assert perfil['total_transacciones'] == 1
+        assert perfil['total_badges'] == usuario.badges.count()
+    
+    def test_repair_user_counters(self, client, sample_user):
+        """El job de reparación recalcula contadores desincronizados"""
+        from backend.extensions import db
+        from backend.models import Usuario
+        from backend.services import UserService
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'lata_metal'
+        })
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        usuario.total_reciclajes = 99
+        usuario.total_latas = 0
+        db.session.commit()
+        
+        assert UserService.reparar_contadores(sample_user.id) == 1
+        
+        usuario = db.session.get(Usuario, sample_user.id)
+        assert usuario.total_reciclajes == 1
+        assert usuario.total_latas == 1
+        assert UserService.reparar_contadores(sample_user.id) == 0
+    
+    def test_ranking_position(self, client, sample_user, app):
+        """Posición de un usuario en el ranking con vecinos"""
+        from backend.models import Usuario
+        
+        response = client.get(f'/api/ranking/usuario/{sample_user.id}?vecinos=1')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        esperado = Usuario.query.filter(
+            Usuario.activo.is_(True),
+            (Usuario.puntos_totales > sample_user.puntos_totales) |
+            ((Usuario.puntos_totales == sample_user.puntos_totales) & (Usuario.id < sample_user.id))
+        ).count() + 1
+        assert data['posicion'] == esperado
+        assert any(v['es_usuario'] for v in data['vecinos'])
+    
+    def test_ranking_position_updates_on_points(self, client, sample_user):
+        """La posición se actualiza al sumar puntos"""
+        client.get(f'/api/ranking/usuario/{sample_user.id}')
+        
+        client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 1000,
+            'tipo_objeto': 'botella'
+        })
+        
+        data = client.get(f'/api/ranking/usuario/{sample_user.id}').get_json()
+        assert data['posicion'] == 1
+        assert data['puntos_totales'] == 1100
+        
+        ranking = client.get('/api/ranking?limite=1').get_json()
+        assert ranking['ranking'][0]['id'] == sample_user.id
+    
+    def test_ranking_position_not_found(self, client):
+        """Posición de usuario inexistente"""
+        response = client.get('/api/ranking/usuario/99999')
+        
+        assert response.status_code == 404
+    
+    def test_badges_awarded_on_threshold(self, client, sample_user):
+        """Se otorgan solo los badges cuyo umbral se cruza"""
+        response = client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        nombres = [b['nombre'] for b in response.get_json()['badges_nuevos']]
+        assert 'Primer Paso' in nombres
+        
+        response = client.post('/api/add_points', json={
+            'uid': sample_user.uid_rfid,
+            'puntos': 10,
+            'tipo_objeto': 'botella'
+        })
+        assert response.get_json()['badges_nuevos'] == []
+    
+    def test_badge_catalog_invalidated(self, client, sample_user, app):
+        """Un badge nuevo entra al catálogo compilado sin reiniciar"""
+        from backend.extensions import db
+        from backend.models import Badge
+        from backend.services.badge_engine import MotorBadges
+        
+        MotorBadges.catalogo()
+        
+        badge = Badge(
+            nombre='Test Umbral',
+            condicion_tipo='puntos',
+            condicion_valor=105
+        )
+        db.session.add(badge)
+        db.session.commit()
+        
+        try:
+            cruzados = MotorBadges.badges_cruzados({'puntos': 100}, {'puntos': 110})
+            assert 'Test Umbral' in [b['nombre'] for b in cruzados]
+        finally:
+            db.session.delete(badge)
+            db.session.commit()
+        
+        cruzados = MotorBadges.badges_cruzados({'puntos': 100}, {'puntos': 110})
+        assert 'Test Umbral' not in [b['nombre'] for b in cruzados]